@@ -0,0 +1,68 @@
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Sequence, Union
+from src.models import Product
+from src.handlers.catalog import InMemoryCatalog, ISupermarketCatalog
+
+Latency = Union[float, Callable[[Product], float]]
+
+
+class IAsyncSupermarketCatalog(ABC):
+    """Abstract base class for catalogs whose lookups are awaited, e.g. a remote price service."""
+
+    @abstractmethod
+    async def unit_price(self, product: Product) -> float:
+        pass
+
+    async def unit_prices(self, products: Sequence[Product]) -> List[float]:
+        """Returns the unit prices of many products, in order; override to batch the lookups."""
+        return list(await asyncio.gather(*(self.unit_price(product) for product in products)))
+
+
+class ThreadedCatalog(IAsyncSupermarketCatalog):
+    """Serves a blocking catalog from an executor, so lookups do not block the event loop."""
+
+    def __init__(self, catalog: ISupermarketCatalog, executor: Optional[Executor] = None):
+        self.catalog = catalog
+        self.executor = executor
+
+    async def unit_price(self, product: Product) -> float:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.catalog.unit_price, product)
+
+    async def unit_prices(self, products: Sequence[Product]) -> List[float]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.catalog.unit_prices, list(products))
+
+
+class FakeAsyncCatalog(IAsyncSupermarketCatalog):
+    """
+    In-memory async catalog for tests that simulates a remote service.
+    Every call sleeps for latency seconds, given as a number or per product as a callable;
+    calls counts the requests made and in_flight the requests currently awaited.
+    """
+
+    def __init__(self, latency: Latency = 0.0):
+        self.catalog = InMemoryCatalog()
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def add_product(self, product: Product, price: float) -> None:
+        self.catalog.add_product(product, price)
+
+    async def unit_price(self, product: Product) -> float:
+        return (await self.unit_prices([product]))[0]
+
+    async def unit_prices(self, products: Sequence[Product]) -> List[float]:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            latency = self.latency
+            await asyncio.sleep(max(map(latency, products), default=0.0) if callable(latency) else latency)
+            return self.catalog.unit_prices(products)
+        finally:
+            self.in_flight -= 1
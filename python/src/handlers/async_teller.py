@@ -0,0 +1,97 @@
+import asyncio
+from time import perf_counter
+from typing import List, Optional, Sequence
+from src.models import Product
+from src.handlers.receipt import Receipt
+from src.handlers.shopping_cart import IShoppingCart
+from src.handlers.async_catalog import IAsyncSupermarketCatalog
+from src.handlers.discount_calculator import DiscountMemo
+from src.handlers.teller import BaseTeller
+from src.handlers.instrumentation import Instrumentation
+
+
+class AsyncTeller(BaseTeller):
+    """
+    Checks out carts against an async catalog from a single event loop.
+    The prices of a cart are fetched concurrently in batches of batch_size products;
+    at most max_concurrency catalog calls are in flight across all carts of this teller,
+    and each call fails with TimeoutError after timeout seconds (None waits forever).
+    Receipts, carts and offers are the same as for the blocking Teller.
+    """
+
+    def __init__(
+        self,
+        catalog: IAsyncSupermarketCatalog,
+        max_concurrency: int = 16,
+        timeout: Optional[float] = None,
+        batch_size: int = 1,
+        instrumentation: Optional[Instrumentation] = None,
+        discount_memo: Optional[DiscountMemo] = None,
+    ):
+        if max_concurrency < 1 or batch_size < 1:
+            raise ValueError("max_concurrency and batch_size must be at least 1")
+        self.catalog = catalog
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        super().__init__(instrumentation, discount_memo)
+
+    async def checks_out_articles_from(self, the_cart: IShoppingCart, at: Optional[float] = None) -> Receipt:
+        """Processes a shopping cart and generates a receipt, with the offers valid at time at (default: now)."""
+        instrumentation = self.instrumentation
+        enabled = instrumentation.enabled
+        started = perf_counter() if enabled else 0.0
+        receipt: Receipt = Receipt()
+        product_quantities = the_cart.product_quantities()
+        products = list(product_quantities)
+        unit_prices = dict(zip(products, await self.unit_prices(products)))
+        if enabled:
+            looked_up = self._observe_catalog_lookup(started, len(products))
+
+        for product, quantity in product_quantities.items():
+            unit_price = unit_prices[product]
+            receipt.add_product(product, quantity, unit_price, quantity * unit_price)
+        if enabled:
+            built = perf_counter()
+            instrumentation.observe("receipt_build", built - looked_up)
+
+        the_cart.handle_offers(receipt, self.plan_at(at), None, unit_prices, product_quantities)
+        if enabled:
+            instrumentation.observe("offers", perf_counter() - built)
+            instrumentation.receipts.inc()
+            instrumentation.receipt_lines.inc(len(products))
+        return receipt
+
+    async def checks_out_many(self, carts: Sequence[IShoppingCart], at: Optional[float] = None) -> List[Receipt]:
+        """Checks out many carts concurrently, returning their receipts in order."""
+        return await self._gather([self.checks_out_articles_from(cart, at) for cart in carts])
+
+    async def unit_prices(self, products: Sequence[Product]) -> List[float]:
+        """Fetches the prices of products in concurrent, bounded and timed batches."""
+        size = self.batch_size
+        batches = await self._gather(
+            [self._fetch(products[start:start + size]) for start in range(0, len(products), size)]
+        )
+        return [price for batch in batches for price in batch]
+
+    async def _fetch(self, products: Sequence[Product]) -> List[float]:
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        async with self._semaphore:
+            return await asyncio.wait_for(self.catalog.unit_prices(products), self.timeout)
+
+    @staticmethod
+    async def _gather(coroutines: list) -> list:
+        """Runs coroutines concurrently; when one fails, the others are cancelled."""
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
@@ -0,0 +1,291 @@
+import argparse
+import csv
+import mmap
+import struct
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.models import Product, ProductUnit
+from src.handlers.catalog import InMemoryCatalog, ISupermarketCatalog
+
+MAGIC = b"SRCAT001"
+HEADER = struct.Struct("<8sIIQQ")
+RECORD_DTYPE = np.dtype(
+    [
+        ("sku", "<i8"),
+        ("price", "<f8"),
+        ("name_offset", "<u8"),
+        ("name_length", "<u4"),
+        ("unit", "u1"),
+        ("padding", "V3"),
+    ]
+)
+NO_SKU = -1
+Buffer = Union[mmap.mmap, memoryview]
+
+
+CatalogRow = Tuple[str, ProductUnit, float, Optional[int]]
+
+
+def read_catalog_csv(csv_path: Union[str, Path]) -> Iterator[CatalogRow]:
+    """Reads the (name, unit, price, sku) rows of a catalog CSV with name, unit, price and an optional sku column."""
+    with open(csv_path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            sku = row.get("sku")
+            yield row["name"], ProductUnit[row["unit"]], float(row["price"]), int(sku) if sku else None
+
+
+def encode_catalog(rows: Iterable[CatalogRow]) -> bytes:
+    """
+    Encodes catalog rows in the binary format read by CatalogImage.
+
+    Layout, little-endian: a 32-byte header (magic, count, record size, string table
+    offset, name index offset); fixed-width records sorted by SKU; the UTF-8 string
+    table of names; and a uint32 index of record numbers sorted by name.
+    """
+    names: List[bytes] = []
+    skus: List[int] = []
+    prices: List[float] = []
+    units: List[int] = []
+    for name, unit, price, sku in rows:
+        names.append(name.encode("utf-8"))
+        skus.append(NO_SKU if sku is None else sku)
+        prices.append(price)
+        units.append(unit.value)
+
+    count = len(names)
+    order = np.argsort(np.array(skus, dtype=np.int64), kind="stable")
+    sorted_names = [names[row] for row in order.tolist()]
+    lengths = np.array([len(name) for name in sorted_names], dtype=np.uint64)
+    records = np.zeros(count, dtype=RECORD_DTYPE)
+    records["sku"] = np.array(skus, dtype=np.int64)[order]
+    records["price"] = np.array(prices, dtype=np.float64)[order]
+    records["unit"] = np.array(units, dtype=np.uint8)[order]
+    records["name_length"] = lengths
+    records["name_offset"] = np.cumsum(lengths) - lengths
+    assigned = records["sku"][records["sku"] != NO_SKU]
+    if np.any(assigned[1:] == assigned[:-1]):
+        raise ValueError("catalog contains duplicate SKUs")
+
+    string_table = b"".join(sorted_names)
+    name_order = sorted(range(count), key=sorted_names.__getitem__)
+    for previous, current in zip(name_order, name_order[1:]):
+        if sorted_names[previous] == sorted_names[current]:
+            raise ValueError(f"catalog contains duplicate name {sorted_names[current].decode('utf-8')!r}")
+    name_index = np.array(name_order, dtype="<u4")
+    strings_offset = HEADER.size + records.nbytes
+    name_index_offset = strings_offset + len(string_table)
+    padding = -name_index_offset % 4
+    name_index_offset += padding
+    return b"".join(
+        [
+            HEADER.pack(MAGIC, count, RECORD_DTYPE.itemsize, strings_offset, name_index_offset),
+            records.tobytes(),
+            string_table,
+            b"\0" * padding,
+            name_index.tobytes(),
+        ]
+    )
+
+
+def compile_catalog(csv_path: Union[str, Path], output_path: Union[str, Path]) -> int:
+    """
+    Compiles a catalog CSV (name, unit, price and an optional sku column) into the
+    binary format read by MappedCatalog, and returns the number of products.
+    """
+    image = encode_catalog(read_catalog_csv(csv_path))
+    with open(output_path, "wb") as out:
+        out.write(image)
+    return HEADER.unpack_from(image)[1]
+
+
+class CatalogImage:
+    """
+    The lookups of a catalog encoded by encode_catalog, over any buffer holding it:
+    prices by SKU with a binary search over the records, or by name through the name
+    index. The records and the index are NumPy views of the buffer, nothing is copied.
+    An owner of the buffer, such as its mapping, is kept alive for as long as the image.
+    """
+
+    def __init__(self, buffer: Buffer, source: str, owner: Optional[object] = None):
+        magic, count, record_size, strings_offset, name_index_offset = HEADER.unpack_from(buffer)
+        if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{source} is not a compiled catalog")
+        self._buffer = buffer
+        self._count = count
+        self._strings_offset = strings_offset
+        self._records = np.frombuffer(buffer, dtype=RECORD_DTYPE, count=count, offset=HEADER.size)
+        self._skus = self._records["sku"]
+        self._prices = self._records["price"]
+        self._name_index = np.frombuffer(buffer, dtype="<u4", count=count, offset=name_index_offset)
+        # Set last, so that the views above are dropped before the owner when the image is collected.
+        self._owner = owner
+
+    def unit_price(self, product: Product) -> float:
+        position = self._find(product)
+        return float(self._prices[position]) if position is not None else 0.0
+
+    def unit_prices(self, products: Iterable[Product]) -> List[float]:
+        """Looks up all SKUs with one vectorized binary search; products without SKU, or with one not in the file, go by name."""
+        products = list(products)
+        skus = np.array([NO_SKU if p.sku is None else p.sku for p in products], dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._skus, skus), max(self._count - 1, 0))
+        found = (skus != NO_SKU) & (self._skus[positions] == skus) if self._count else np.zeros(len(skus), bool)
+        prices = np.where(found, self._prices[positions] if self._count else 0.0, 0.0).tolist()
+        for index in np.flatnonzero(~found).tolist():
+            position = self._find_name(products[index].name)
+            if position is not None:
+                prices[index] = float(self._prices[position])
+        return prices
+
+    def product_by_sku(self, sku: int) -> Optional[Product]:
+        position = self._find_sku(sku)
+        return self._product_at(position) if position is not None else None
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        position = self._find_name(name)
+        return self._product_at(position) if position is not None else None
+
+    def products_with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        encoded = prefix.encode("utf-8")
+        products: List[Product] = []
+        rank = self._name_rank(encoded)
+        while rank < self._count and len(products) < limit:
+            position = int(self._name_index[rank])
+            if not self._name_bytes(position).startswith(encoded):
+                break
+            products.append(self._product_at(position))
+            rank += 1
+        return products
+
+    def __len__(self) -> int:
+        return self._count
+
+    def release(self) -> None:
+        """Drops the views into the buffer, so that it can be closed."""
+        del self._records, self._skus, self._prices, self._name_index, self._buffer
+
+    def _find(self, product: Product) -> Optional[int]:
+        if product.sku is not None:
+            position = self._find_sku(product.sku)
+            if position is not None:
+                return position
+        return self._find_name(product.name)
+
+    def _find_sku(self, sku: int) -> Optional[int]:
+        position = int(np.searchsorted(self._skus, sku))
+        if position < self._count and self._skus[position] == sku:
+            return position
+        return None
+
+    def _find_name(self, name: str) -> Optional[int]:
+        encoded = name.encode("utf-8")
+        rank = self._name_rank(encoded)
+        if rank < self._count:
+            position = int(self._name_index[rank])
+            if self._name_bytes(position) == encoded:
+                return position
+        return None
+
+    def _name_rank(self, encoded: bytes) -> int:
+        """Binary search for the first name, in name order, not below encoded."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_bytes(int(self._name_index[middle])) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _name_bytes(self, position: int) -> bytes:
+        record = self._records[position]
+        start = self._strings_offset + int(record["name_offset"])
+        return bytes(self._buffer[start:start + int(record["name_length"])])
+
+    def _product_at(self, position: int) -> Product:
+        record = self._records[position]
+        sku = int(record["sku"])
+        name = self._name_bytes(position).decode("utf-8")
+        return Product(name, ProductUnit(int(record["unit"])), None if sku == NO_SKU else sku)
+
+
+class MappedCatalog(ISupermarketCatalog):
+    """
+    Catalog that memory-maps a file written by compile_catalog.
+    Opening it only maps the file, so startup does not depend on the catalog size,
+    and every process mapping the same file shares its pages. The file is never
+    written: add_product keeps products in an in-memory overlay of this process,
+    which takes precedence over the file until the catalog is recompiled.
+    """
+
+    indexed = True
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._image = CatalogImage(self._map, str(self.path))
+        except ValueError:
+            self._map.close()
+            raise
+        self._overlay = InMemoryCatalog()
+
+    def add_product(self, product: Product, price: float) -> None:
+        """Adds or reprices a product in this process's overlay; the file is left as it is."""
+        self._overlay.add_product(product, price)
+
+    def unit_price(self, product: Product) -> float:
+        price = self._overlay.products.get(product)
+        return price if price is not None else self._image.unit_price(product)
+
+    def unit_prices(self, products: Iterable[Product]) -> List[float]:
+        products = list(products)
+        prices = self._image.unit_prices(products)
+        overlay = self._overlay.products
+        if overlay:
+            for index, product in enumerate(products):
+                if product in overlay:
+                    prices[index] = overlay[product]
+        return prices
+
+    def product_by_sku(self, sku: int) -> Optional[Product]:
+        product = self._overlay.product_by_sku(sku)
+        return product if product is not None else self._image.product_by_sku(sku)
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        product = self._overlay.product_by_name(name)
+        return product if product is not None else self._image.product_by_name(name)
+
+    def products_with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        products = self._image.products_with_prefix(prefix, limit)
+        if self._overlay.products:
+            merged = {product.name: product for product in products}
+            merged.update((product.name, product) for product in self._overlay.products_with_prefix(prefix, limit))
+            products = [merged[name] for name in sorted(merged)[:limit]]
+        return products
+
+    def __len__(self) -> int:
+        return len(self._image) + sum(
+            self._image.product_by_name(product.name) is None for product in self._overlay.products
+        )
+
+    def close(self) -> None:
+        """Releases the views into the mapping and unmaps the file."""
+        self._image.release()
+        self._map.close()
+
+
+def main(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(description="Compile a catalog CSV into a memory-mappable file.")
+    parser.add_argument("csv_path", type=Path)
+    parser.add_argument("output_path", type=Path)
+    options = parser.parse_args(argv)
+    count = compile_catalog(options.csv_path, options.output_path)
+    print(f"compiled {count} products into {options.output_path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,262 @@
+import heapq
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from src.models import Bundle, Discount, Product
+
+Units = Dict[Product, int]
+
+
+class BundleMatch:
+    """A bundle applied a number of times, with the units it took and the discount it gives."""
+
+    __slots__ = ("bundle", "applications", "units", "discount_amount")
+
+    def __init__(self, bundle: Bundle, applications: int, units: Units, discount_amount: float):
+        self.bundle: Bundle = bundle
+        self.applications: int = applications
+        self.units: Units = units
+        self.discount_amount: float = discount_amount
+
+    @property
+    def product(self) -> Product:
+        """
+        The product the receipt discount is attributed to: the first product the match took
+        units of, the bundle's first product for a fixed bundle and the most expensive one
+        taken for a group bundle, so it is always a product of the cart.
+        """
+        return next(iter(self.units))
+
+    def discount(self) -> Discount:
+        """The receipt discount, attributed to product and described by the bundle."""
+        return Discount(self.product, self.bundle.description, -self.discount_amount)
+
+
+class BundleIndex:
+    """
+    Maps products to the bundles they can complete, so a cart is only matched against
+    bundles touching its products. A fixed bundle needs all of its products, so it is
+    indexed under its first product only; a group bundle is indexed under every member.
+    touching() finds every bundle a product is a member of.
+    """
+
+    def __init__(self, bundles: Iterable[Bundle] = ()):
+        self._by_product: Dict[Product, List[Bundle]] = {}
+        self._by_member: Dict[Product, List[Bundle]] = {}
+        self._count = 0
+        for bundle in bundles:
+            self.add(bundle)
+
+    def add(self, bundle: Bundle) -> None:
+        keys = bundle.products if bundle.size is not None else bundle.products[:1]
+        for product in keys:
+            self._by_product.setdefault(product, []).append(bundle)
+        for product in bundle.products:
+            self._by_member.setdefault(product, []).append(bundle)
+        self._count += 1
+
+    def touching(self, product: Product) -> List[Bundle]:
+        """Returns the bundles product is a member of."""
+        return self._by_member.get(product, [])
+
+    def candidates(self, products: Iterable[Product]) -> List[Bundle]:
+        """Returns the bundles indexed under any of products, each once, in a stable order."""
+        by_product = self._by_product
+        found: Dict[Bundle, None] = {}
+        for product in products:
+            bundles = by_product.get(product)
+            if bundles:
+                found.update(dict.fromkeys(bundles))
+        return list(found)
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class _Pricing:
+    """The prices of one cart, with each group bundle's members ranked most expensive first."""
+
+    __slots__ = ("unit_prices", "_ranked")
+
+    def __init__(self, unit_prices: Mapping[Product, float]):
+        self.unit_prices = unit_prices
+        self._ranked: Dict[Bundle, List[Product]] = {}
+
+    def apply_once(self, bundle: Bundle, available: Units) -> Optional[Tuple[Units, float]]:
+        """Returns the units one application of bundle takes from available and its saving, if it fits."""
+        unit_prices = self.unit_prices
+        if bundle.size is None:
+            regular = 0.0
+            for product, needed in bundle.quantities.items():
+                if available.get(product, 0) < needed:
+                    return None
+                regular += needed * unit_prices[product]
+            return bundle.quantities, regular - bundle.price
+
+        members = self._ranked.get(bundle)
+        if members is None:
+            members = self._ranked[bundle] = sorted(
+                [product for product in bundle.products if product in unit_prices],
+                key=unit_prices.__getitem__,
+                reverse=True,
+            )
+        units: Units = {}
+        regular = 0.0
+        missing = bundle.size
+        for product in members:
+            taken = min(available.get(product, 0), missing)
+            if taken:
+                units[product] = taken
+                regular += taken * unit_prices[product]
+                missing -= taken
+                if not missing:
+                    return units, regular - bundle.price
+        return None
+
+
+def _repeats(units: Units, available: Units) -> int:
+    """How many times in a row the same units can be taken from available."""
+    return min(available[product] // count for product, count in units.items())
+
+
+def _max_applications(bundle: Bundle, available: Units) -> int:
+    """How often bundle fits into available at most."""
+    if bundle.size is None:
+        return min(available.get(product, 0) // needed for product, needed in bundle.quantities.items())
+    return sum(available.get(product, 0) for product in bundle.products) // bundle.size
+
+
+def _take(available: Units, units: Units, times: int = 1) -> Units:
+    remaining = dict(available)
+    for product, count in units.items():
+        remaining[product] -= count * times
+    return remaining
+
+
+class BundleMatcher:
+    """
+    Assigns the whole units of a cart to bundles for the largest total saving.
+    Candidate bundles come from the index; up to exact_limit candidates are matched
+    exactly by branch and bound (seeded with the greedy result and stopped after
+    max_nodes nodes), larger sets greedily by the best saving per application.
+    A group bundle always takes the most expensive units of its group.
+    """
+
+    def __init__(self, bundles: Sequence[Bundle], exact_limit: int = 8, max_nodes: int = 2_000):
+        self.bundles: List[Bundle] = list(bundles)
+        self.index = BundleIndex(self.bundles)
+        self.exact_limit = exact_limit
+        self.max_nodes = max_nodes
+
+    def match(self, quantities: Mapping[Product, float], unit_prices: Mapping[Product, float]) -> List[BundleMatch]:
+        """Returns the bundles to apply to a cart; the units they use are excluded from other offers."""
+        available = {product: int(quantity) for product, quantity in quantities.items() if quantity >= 1}
+        pricing = _Pricing(unit_prices)
+        candidates: List[Tuple[float, Bundle, Units]] = []
+        for bundle in self.index.candidates(available):
+            applied = pricing.apply_once(bundle, available)
+            if applied is not None and applied[1] > 0:
+                candidates.append((applied[1], bundle, applied[0]))
+        if not candidates:
+            return []
+        matches = self._greedy(candidates, dict(available), pricing)
+        if len(candidates) <= self.exact_limit:
+            bundles = [bundle for _, bundle, _ in candidates]
+            matches = self._branch_and_bound(bundles, available, pricing, matches)
+        order = {bundle: position for position, (_, bundle, _) in enumerate(candidates)}
+        return sorted(matches, key=lambda match: order[match.bundle])
+
+    @staticmethod
+    def _greedy(
+        candidates: List[Tuple[float, Bundle, Units]], available: Units, pricing: _Pricing
+    ) -> List[BundleMatch]:
+        """
+        Repeatedly applies the bundle with the best saving, as often as the same units fit.
+        A bundle's saving never grows as units are used up, so savings sit in a heap and
+        are only re-evaluated when popped, and only if units of the products the evaluation
+        took have been used since; availability only shrinks, so otherwise it still holds.
+        Takes units out of available in place.
+        """
+        matches: Dict[Bundle, BundleMatch] = {}
+        used_at: Dict[Product, int] = {}
+        step = 0
+        heap = [(-saving, position, bundle, units, 0) for position, (saving, bundle, units) in enumerate(candidates)]
+        heapq.heapify(heap)
+        while heap:
+            negative_saving, position, bundle, units, evaluated = heapq.heappop(heap)
+            saving = -negative_saving
+            if units is None or any(used_at.get(product, 0) > evaluated for product in units):
+                applied = pricing.apply_once(bundle, available)
+                if applied is None or applied[1] <= 0:
+                    continue
+                units, saving = applied
+                if saving < -negative_saving:
+                    heapq.heappush(heap, (-saving, position, bundle, units, step))
+                    continue
+            times = _repeats(units, available)
+            step += 1
+            for product, count in units.items():
+                available[product] -= count * times
+                used_at[product] = step
+            _record(matches, bundle, units, saving, times)
+            if bundle.size is not None:
+                heapq.heappush(heap, (-saving, position, bundle, None, step))
+        return list(matches.values())
+
+    def _branch_and_bound(
+        self,
+        candidates: List[Bundle],
+        available: Units,
+        pricing: _Pricing,
+        incumbent: List[BundleMatch],
+    ) -> List[BundleMatch]:
+        best_value = sum(match.discount_amount for match in incumbent)
+        best: List[BundleMatch] = incumbent
+        nodes = 0
+
+        def bound(start: int, state: Units) -> float:
+            total = 0.0
+            for bundle in candidates[start:]:
+                applied = pricing.apply_once(bundle, state)
+                if applied is not None and applied[1] > 0:
+                    total += _max_applications(bundle, state) * applied[1]
+            return total
+
+        def search(start: int, state: Units, value: float, chosen: List[Tuple[Bundle, Units, float]]) -> None:
+            nonlocal best_value, best, nodes
+            nodes += 1
+            if value > best_value:
+                best_value = value
+                matches: Dict[Bundle, BundleMatch] = {}
+                for bundle, units, saving in chosen:
+                    _record(matches, bundle, units, saving, 1)
+                best = list(matches.values())
+            if start == len(candidates) or nodes > self.max_nodes:
+                return
+            if value + bound(start, state) <= best_value:
+                return
+            bundle = candidates[start]
+            branches: List[Tuple[Units, float, List[Tuple[Bundle, Units, float]]]] = [(state, value, chosen)]
+            while True:
+                current_state, current_value, current_chosen = branches[-1]
+                applied = pricing.apply_once(bundle, current_state)
+                if applied is None or applied[1] <= 0:
+                    break
+                units, saving = applied
+                branches.append(
+                    (_take(current_state, units), current_value + saving, current_chosen + [(bundle, units, saving)])
+                )
+            for branch_state, branch_value, branch_chosen in reversed(branches):
+                search(start + 1, branch_state, branch_value, branch_chosen)
+
+        search(0, available, 0.0, [])
+        return best
+
+
+def _record(matches: Dict[Bundle, BundleMatch], bundle: Bundle, units: Units, saving: float, times: int) -> None:
+    """Adds times applications of bundle to the matches, merging with earlier ones."""
+    match = matches.get(bundle)
+    if match is None:
+        match = matches[bundle] = BundleMatch(bundle, 0, {}, 0.0)
+    match.applications += times
+    match.discount_amount += saving * times
+    for product, count in units.items():
+        match.units[product] = match.units.get(product, 0) + count * times
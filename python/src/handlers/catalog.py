@@ -1,10 +1,20 @@
+import bisect
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict
-from src.models import Product
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from src.models import PRODUCTS, Product
 
 
 class ISupermarketCatalog(ABC):
-    """Abstract base class for catalog operations."""
+    """
+    Abstract base class for catalog operations.
+    Catalogs that can find products by SKU or name set indexed and override the lookups;
+    the defaults of an unindexed catalog find nothing.
+    """
+
+    indexed: bool = False
 
     @abstractmethod
     def add_product(self, product: Product, price: float) -> None:
@@ -14,28 +24,254 @@ class ISupermarketCatalog(ABC):
     def unit_price(self, product: Product) -> float:
         pass
 
+    def unit_prices(self, products: Iterable[Product]) -> List[float]:
+        """Returns the unit prices of many products, in order; override to batch the lookups."""
+        return [self.unit_price(product) for product in products]
+
+    def product_by_sku(self, sku: int) -> Optional[Product]:
+        """Returns the catalog product with the given SKU (barcode), if any."""
+        return None
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        """Returns the catalog product with exactly the given name, if any."""
+        return None
+
+    def products_with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        """Returns up to limit catalog products whose name starts with prefix, ordered by name."""
+        return []
+
+
+def find_product(
+    catalog: Optional[ISupermarketCatalog], name: Optional[str] = None, sku: Optional[int] = None
+) -> Optional[Product]:
+    """
+    Finds a product by SKU if one is given, else by name, in the catalog, or among
+    the registered products if there is no catalog or it is not indexed.
+    """
+    indexed = catalog is not None and catalog.indexed
+    if sku is not None:
+        return catalog.product_by_sku(sku) if indexed else PRODUCTS.find_sku(sku)
+    if name is not None:
+        return catalog.product_by_name(name) if indexed else PRODUCTS.find(name)
+    return None
+
+
 class SupermarketCatalog(ISupermarketCatalog):
 
+    indexed = True
+
     def add_product(self, product: Product, price: float) -> None:
         raise Exception("cannot be called from a unit test - it accesses the database")
 
     def unit_price(self, product: Product) -> float:
         raise Exception("cannot be called from a unit test - it accesses the database")
 
+    def product_by_sku(self, sku: int) -> Optional[Product]:
+        raise Exception("cannot be called from a unit test - it accesses the database")
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        raise Exception("cannot be called from a unit test - it accesses the database")
+
+    def products_with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        raise Exception("cannot be called from a unit test - it accesses the database")
+
+
+
+class CatalogIndex:
+    """
+    Finds catalog products by SKU, exact name and case-sensitive name prefix.
+    SKU and name lookups are hash lookups; prefix lookups bisect a name list
+    that is sorted lazily, so bulk loading stays linear until the first query.
+    """
+
+    def __init__(self):
+        self._by_sku: Dict[int, Product] = {}
+        self._by_name: Dict[str, Product] = {}
+        self._names: List[str] = []
+        self._names_sorted = True
+
+    def add(self, product: Product) -> None:
+        if product.name not in self._by_name:
+            if self._names and product.name < self._names[-1]:
+                self._names_sorted = False
+            self._names.append(product.name)
+        self._by_name[product.name] = product
+        if product.sku is not None:
+            self._by_sku[product.sku] = product
+
+    def by_sku(self, sku: int) -> Optional[Product]:
+        return self._by_sku.get(sku)
+
+    def by_name(self, name: str) -> Optional[Product]:
+        return self._by_name.get(name)
+
+    def with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        if not self._names_sorted:
+            self._names.sort()
+            self._names_sorted = True
+        names = self._names
+        matches: List[Product] = []
+        index = bisect.bisect_left(names, prefix)
+        while index < len(names) and len(matches) < limit and names[index].startswith(prefix):
+            matches.append(self._by_name[names[index]])
+            index += 1
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._by_name)
 
 
 class InMemoryCatalog(ISupermarketCatalog):
     """Concrete implementation of ISupermarketCatalog for in-memory storage."""
 
+    indexed = True
+
     def __init__(self):
         self.products: Dict[Product, float] = {}
+        self.index = CatalogIndex()
 
     def add_product(self, product: Product, price: float) -> None:
         self.products[product] = price
+        self.index.add(product)
 
     def unit_price(self, product: Product) -> float:
         return self.products.get(product, 0.0)
-    
+
+    def unit_prices(self, products: Iterable[Product]) -> List[float]:
+        get = self.products.get
+        return [get(product, 0.0) for product in products]
+
+    def product_by_sku(self, sku: int) -> Optional[Product]:
+        return self.index.by_sku(sku)
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        return self.index.by_name(name)
+
+    def products_with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        return self.index.with_prefix(prefix, limit)
+
+
+class CachingCatalog(ISupermarketCatalog):
+    """
+    Decorator that caches the unit prices of any catalog.
+    Entries are evicted least-recently-used beyond max_size and expire after ttl seconds
+    (None never expires); prices changed behind the catalog's back must be invalidated.
+    It is safe to share between threads; the backing catalog is queried outside its lock.
+    """
+
+    def __init__(
+        self,
+        catalog: ISupermarketCatalog,
+        max_size: int = 10_000,
+        ttl: Optional[float] = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.catalog = catalog
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Product, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    def add_product(self, product: Product, price: float) -> None:
+        self.catalog.add_product(product, price)
+        self.invalidate(product)
+
+    def unit_price(self, product: Product) -> float:
+        now = self._clock()
+        with self._lock:
+            price = self._cached(product, now)
+            if price is not None:
+                return price
+            self.misses += 1
+
+        price = self.catalog.unit_price(product)
+        self._store([(product, price)], now)
+        return price
+
+    def unit_prices(self, products: Iterable[Product]) -> List[float]:
+        """Answers cached prices directly and fetches all misses in one bulk lookup."""
+        products = list(products)
+        prices: List[Optional[float]] = [None] * len(products)
+        missing: Dict[Product, List[int]] = {}
+        now = self._clock()
+        with self._lock:
+            for index, product in enumerate(products):
+                prices[index] = self._cached(product, now)
+                if prices[index] is None:
+                    missing.setdefault(product, []).append(index)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = list(zip(missing, self.catalog.unit_prices(list(missing))))
+            self._store(fetched, now)
+            for product, price in fetched:
+                for index in missing[product]:
+                    prices[index] = price
+        return prices
+
+    @property
+    def indexed(self) -> bool:
+        return self.catalog.indexed
+
+    def product_by_sku(self, sku: int) -> Optional[Product]:
+        return self.catalog.product_by_sku(sku)
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        return self.catalog.product_by_name(name)
+
+    def products_with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        return self.catalog.products_with_prefix(prefix, limit)
+
+    def invalidate(self, product: Product) -> None:
+        """Drops the cached price of a product."""
+        with self._lock:
+            self._entries.pop(product, None)
+
+    def invalidate_all(self) -> None:
+        """Drops every cached price."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cached(self, product: Product, now: float) -> Optional[float]:
+        """The cached price of a product, or None if it has none; the caller holds the lock."""
+        entry = self._entries.get(product)
+        if entry is None:
+            return None
+        price, expires_at = entry
+        if now < expires_at:
+            self._entries.move_to_end(product)
+            self.hits += 1
+            return price
+        del self._entries[product]
+        self.expirations += 1
+        return None
+
+    def _store(self, prices: Iterable[Tuple[Product, float]], now: float) -> None:
+        expires_at = now + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            for product, price in prices:
+                self._entries[product] = (price, expires_at)
+                self._entries.move_to_end(product)
+                if len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
 
 class CatalogFactory:
     """Factory class for creating catalog instances."""
@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class CheckoutError(Exception):
+    """The checkout server answered with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class CheckoutClient:
+    """A client for the CheckoutServer that sends its requests over one kept-alive connection."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def checkout(self, cart: Dict[str, Any]) -> Dict[str, Any]:
+        """Sends a JSON cart and returns the JSON receipt."""
+        status, body = await self.request("POST", "/checkout", json.dumps(cart).encode())
+        if status != 200:
+            raise CheckoutError(status, body.get("error", ""))
+        return body
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, Dict[str, Any]]:
+        """Sends one request and returns the status and the decoded JSON body."""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await self._writer.drain()
+        status_line = await self._reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError("the server closed the connection")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        payload = await self._reader.readexactly(int(headers.get("content-length", "0")))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, json.loads(payload) if payload else {}
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._reader = self._writer = None
+
+    async def __aenter__(self) -> "CheckoutClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class LoadTestReport(NamedTuple):
+    """The outcome of a load test; latencies are in seconds, sorted."""
+
+    requests: int
+    errors: int
+    seconds: float
+    latencies: List[float]
+
+    @property
+    def throughput(self) -> float:
+        """Successful requests per second."""
+        return (self.requests - self.errors) / self.seconds if self.seconds else 0.0
+
+    def percentile(self, percent: float) -> float:
+        if not self.latencies:
+            return 0.0
+        index = min(len(self.latencies) - 1, int(len(self.latencies) * percent / 100))
+        return self.latencies[index]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.errors} errors in {self.seconds:.2f}s: "
+            f"{self.throughput:.0f} requests/s, latency p50 {self.percentile(50) * 1000:.2f} ms, "
+            f"p99 {self.percentile(99) * 1000:.2f} ms"
+        )
+
+
+async def run_load_test(
+    carts: Sequence[Dict[str, Any]],
+    requests: int = 1000,
+    concurrency: int = 64,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+) -> LoadTestReport:
+    """
+    Sends requests checkouts from concurrency connections at once, cycling through carts,
+    and reports the throughput and latencies.
+    """
+    latencies: List[float] = []
+    errors = 0
+    sent = 0
+
+    async def worker() -> None:
+        nonlocal errors, sent
+        async with CheckoutClient(host, port) as client:
+            while sent < requests:
+                cart = carts[sent % len(carts)]
+                sent += 1
+                started = perf_counter()
+                try:
+                    await client.checkout(cart)
+                except (CheckoutError, ConnectionError):
+                    errors += 1
+                    await client.close()
+                latencies.append(perf_counter() - started)
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return LoadTestReport(requests, errors, perf_counter() - started, sorted(latencies))
+
+
+def main(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(description="Load-test a running checkout server.")
+    parser.add_argument("carts", type=Path, help="a JSON file with one cart or a list of carts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    options = parser.parse_args(argv)
+    carts = json.loads(options.carts.read_text())
+    if isinstance(carts, dict):
+        carts = [carts]
+    report = asyncio.run(run_load_test(carts, options.requests, options.concurrency, options.host, options.port))
+    print(report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
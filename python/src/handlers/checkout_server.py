@@ -0,0 +1,364 @@
+import argparse
+import asyncio
+import json
+import math
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Set, Tuple, TypeVar
+from src.models import Product
+from src.handlers.receipt import Receipt
+from src.handlers.catalog import ISupermarketCatalog, find_product
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects items submitted by concurrent coroutines and processes them in batches.
+    A batch is processed as soon as it holds max_batch_size items, or max_wait seconds
+    after its first item arrived, so an item waits at most max_wait for company.
+    process gets the items in order and returns one result per item. It runs on executor,
+    by default a single worker thread of the batcher, so batches are processed one at a
+    time and in order while the event loop keeps accepting requests. If process raises
+    for a batch, its items are processed one by one, so only the submitters whose own
+    item fails get an exception.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[T]], Sequence[R]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.002,
+        executor: Optional[Executor] = None,
+    ):
+        if max_batch_size < 1 or max_wait < 0:
+            raise ValueError("max_batch_size must be at least 1 and max_wait not negative")
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        """Adds item to the current batch and returns its result once the batch is processed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Sends the pending items to the executor now; their submitters get the results."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += 1
+        self.items += len(pending)
+        task = asyncio.ensure_future(self._run(pending))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    def close(self) -> None:
+        """Shuts down the batcher's own worker thread, once the batches sent to it are done."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _run(self, pending: List[Tuple[T, asyncio.Future]]) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batcher")
+        items = [item for item, _ in pending]
+        try:
+            outcomes = await asyncio.get_running_loop().run_in_executor(self._executor, self._process_batch, items)
+        except Exception as error:
+            outcomes = [(False, error)] * len(pending)
+        for (_, future), (ok, outcome) in zip(pending, outcomes):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(outcome)
+            else:
+                future.set_exception(outcome)
+
+    def _process_batch(self, items: List[T]) -> List[Tuple[bool, Any]]:
+        """Returns (True, result) or (False, exception) per item, retrying items alone if the batch fails."""
+        try:
+            return [(True, result) for result in self.process(items)]
+        except Exception as error:
+            self.failed_batches += 1
+            if len(items) == 1:
+                return [(False, error)]
+        return [self._process_one(item) for item in items]
+
+    def _process_one(self, item: T) -> Tuple[bool, Any]:
+        try:
+            return True, self.process([item])[0]
+        except Exception as error:
+            return False, error
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+
+class BadRequest(Exception):
+    """A request the server cannot price, answered with 400."""
+
+
+MAX_QUANTITY = 10_000
+
+
+def cart_from_json(
+    data: Any, catalog: Optional[ISupermarketCatalog] = None, max_quantity: float = MAX_QUANTITY
+) -> ShoppingCart:
+    """
+    Builds a cart from {"items": [{"product": name, "quantity": 2}, {"sku": 5420001, "quantity": 1.5}]}.
+    Products are looked up by name or SKU in the catalog, or among the registered
+    products if the catalog has no index. A quantity must be a finite number above 0
+    and at most max_quantity.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+        raise BadRequest('a cart is an object with an "items" list')
+    cart = ShoppingCart()
+    for line in data["items"]:
+        if not isinstance(line, dict):
+            raise BadRequest("a cart item is an object")
+        product = _find_product(line, catalog)
+        quantity = line.get("quantity", 1)
+        if (
+            isinstance(quantity, bool)
+            or not isinstance(quantity, (int, float))
+            or not math.isfinite(quantity)
+            or not 0 < quantity <= max_quantity
+        ):
+            raise BadRequest(f"invalid quantity for {product.name!r}: {quantity!r}")
+        cart.add_item_quantity(product, quantity)
+    return cart
+
+
+def _find_product(line: Dict[str, Any], catalog: Optional[ISupermarketCatalog]) -> Product:
+    product: Optional[Product] = None
+    if "sku" in line:
+        if isinstance(line["sku"], int):
+            product = find_product(catalog, sku=line["sku"])
+    elif isinstance(line.get("product"), str):
+        product = find_product(catalog, name=line["product"])
+    if product is None:
+        raise BadRequest(f"unknown product: {line.get('sku', line.get('product'))!r}")
+    return product
+
+
+def receipt_to_json(receipt: Receipt) -> Dict[str, Any]:
+    """The receipt as JSON-ready data; amounts are prices, also for Money receipts."""
+    return {
+        "items": [
+            {
+                "product": item.product.name,
+                "quantity": item.quantity,
+                "price": float(item.price),
+                "total": float(item.total_price),
+            }
+            for item in receipt.items
+        ],
+        "discounts": [
+            {
+                "product": discount.product.name,
+                "description": discount.description,
+                "amount": float(discount.discount_amount),
+            }
+            for discount in receipt.discounts
+        ],
+        "total": float(receipt.total_price()),
+    }
+
+
+class CheckoutServer:
+    """
+    A local HTTP/1.1 checkout service: POST /checkout with a JSON cart (see cart_from_json)
+    answers with the JSON receipt (see receipt_to_json).
+
+    Concurrent requests are collected by a MicroBatcher and priced together with one
+    Teller.checks_out_many call, which costs far less per cart than pricing each cart
+    on its own; a request waits at most max_wait seconds for its batch to fill.
+    Batches are priced on the batcher's worker thread, off the event loop, and a cart
+    that fails its batch only fails its own request.
+    Connections are kept alive until the client closes them or sends "Connection: close".
+    """
+
+    def __init__(
+        self,
+        teller: Teller,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_batch_size: int = 64,
+        max_wait: float = 0.002,
+        max_body_size: int = 1 << 20,
+        max_quantity: float = MAX_QUANTITY,
+    ):
+        self.teller = teller
+        self.host = host
+        self.port = port
+        self.max_body_size = max_body_size
+        self.max_quantity = max_quantity
+        self.batcher: MicroBatcher[ShoppingCart, Dict[str, Any]] = MicroBatcher(
+            self._price, max_batch_size, max_wait
+        )
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _price(self, carts: List[ShoppingCart]) -> List[Dict[str, Any]]:
+        return [receipt_to_json(receipt) for receipt in self.teller.checks_out_many(carts)]
+
+    async def start(self) -> None:
+        """Starts listening; with port 0, self.port is the port the system picked."""
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.batcher.close()
+
+    async def __aenter__(self) -> "CheckoutServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                keep_alive, status, body = request
+                if status == 200:
+                    status, body = await self._respond(body)
+                writer.write(_http_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[bool, int, bytes]]:
+        """Reads one request and returns (keep alive, status so far, body), or None at end of stream."""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, path, version = (request_line.decode("latin-1").split() + ["", "", ""])[:3]
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return False, 400, _error_body("invalid Content-Length")
+        if length > self.max_body_size:
+            return False, 413, _error_body("request body too large")
+        body = await reader.readexactly(length) if length else b""
+        if path != "/checkout":
+            return keep_alive, 404, _error_body(f"no such path: {path}")
+        if method != "POST":
+            return keep_alive, 405, _error_body("use POST")
+        return keep_alive, 200, body
+
+    async def _respond(self, body: bytes) -> Tuple[int, bytes]:
+        try:
+            cart = cart_from_json(json.loads(body), self.teller.catalog, self.max_quantity)
+        except (ValueError, BadRequest) as error:
+            return 400, _error_body(str(error))
+        try:
+            receipt = await self.batcher.submit(cart)
+        except Exception as error:
+            return 500, _error_body(f"checkout failed: {error}")
+        return 200, json.dumps(receipt).encode()
+
+
+def _error_body(message: str) -> bytes:
+    return json.dumps({"error": message}).encode()
+
+
+def _http_response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def main(argv: Sequence[str]) -> None:
+    from src.handlers.binary_catalog import MappedCatalog
+
+    parser = argparse.ArgumentParser(description="Serve checkouts of a compiled catalog over HTTP.")
+    parser.add_argument("catalog", type=Path, help="a catalog compiled with src.handlers.binary_catalog")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait", type=float, default=0.002, help="seconds a request waits for its batch")
+    parser.add_argument("--max-quantity", type=float, default=MAX_QUANTITY, help="largest quantity of a cart item")
+    options = parser.parse_args(argv)
+    catalog = MappedCatalog(options.catalog)
+    server = CheckoutServer(
+        Teller(catalog),
+        options.host,
+        options.port,
+        options.max_batch_size,
+        options.max_wait,
+        max_quantity=options.max_quantity,
+    )
+    print(f"serving {len(catalog)} products on http://{options.host}:{options.port}/checkout")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,127 @@
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from src.models import Bundle, Discount, Product
+from src.handlers.receipt import Receipt
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.pricing_plan import PricingPlan
+
+if TYPE_CHECKING:
+    from src.handlers.teller import Teller
+
+
+class CheckoutSession:
+    """
+    A checkout in progress that keeps its total up to date on every scan.
+    Each scan re-prices only the scanned product's line and discount and applies
+    the difference to the running total; finish() checks the cart out through the
+    teller, so the receipt is the same one the batch path would produce.
+    A scan of a product in bundles can change the discounts of the other products of
+    those bundles, so it re-matches the bundles of the cart products connected to it
+    through shared bundles, and re-prices those products' offers on the units left;
+    products in no bundle with it keep their discounts.
+    """
+
+    def __init__(self, teller: "Teller"):
+        self._teller = teller
+        self._cart = ShoppingCart()
+        self._unit_prices: Dict[Product, float] = {}
+        self._line_totals: Dict[Product, float] = {}
+        self._discounts: Dict[Product, Tuple[Discount, ...]] = {}
+        self._bundle_discounts: Dict[Bundle, Discount] = {}
+        self._positions: Dict[Product, int] = {}
+        self._total = 0.0
+        self._receipt: Optional[Receipt] = None
+
+    def add_item(self, product: Product) -> None:
+        """Scans a single unit of a product."""
+        self.add_item_quantity(product, 1.0)
+
+    def add_item_quantity(self, product: Product, quantity: float) -> None:
+        """Scans a quantity of a product and updates the running total."""
+        if self._receipt is not None:
+            raise RuntimeError("cannot add items to a finished checkout session")
+        self._cart.add_item_quantity(product, quantity)
+        quantity = self._cart.product_quantities()[product]
+        self._positions.setdefault(product, len(self._positions))
+
+        unit_price = self._unit_prices.get(product)
+        if unit_price is None:
+            unit_price = self._unit_prices[product] = self._teller.catalog.unit_price(product)
+        line_total = quantity * unit_price
+        self._total += line_total - self._line_totals.get(product, 0.0)
+        self._line_totals[product] = line_total
+
+        plan = self._teller.pricing_plan
+        if plan.bundles is not None and plan.bundles.index.touching(product):
+            self._reprice_bundles(plan, product)
+        else:
+            self._reprice_offers(plan, product, quantity)
+
+    def _reprice_offers(self, plan: PricingPlan, product: Product, quantity: float) -> None:
+        """Replaces a product's offer discounts with those for quantity units."""
+        for previous in self._discounts.pop(product, ()):
+            self._total -= previous.discount_amount
+        rule = plan.rules.get(product)
+        discounts = rule(quantity, self._unit_prices[product]) if rule is not None and quantity > 0 else ()
+        if discounts:
+            self._discounts[product] = discounts
+            for discount in discounts:
+                self._total += discount.discount_amount
+
+    def _reprice_bundles(self, plan: PricingPlan, product: Product) -> None:
+        """
+        Re-matches the bundles of the cart products connected to product through shared
+        bundles, whose matches a scan of product can change, and re-prices their offers.
+        """
+        index = plan.bundles.index
+        quantities = self._cart.product_quantities()
+        connected = {product}
+        pending = [product]
+        while pending:
+            for bundle in index.touching(pending.pop()):
+                previous = self._bundle_discounts.pop(bundle, None)
+                if previous is not None:
+                    self._total -= previous.discount_amount
+                for member in bundle.products:
+                    if member not in connected and member in quantities:
+                        connected.add(member)
+                        pending.append(member)
+
+        lines = {member: quantities[member] for member in sorted(connected, key=self._positions.__getitem__)}
+        remaining = dict(lines)
+        for match in plan.bundles.match(lines, self._unit_prices):
+            discount = self._bundle_discounts[match.bundle] = match.discount()
+            self._total += discount.discount_amount
+            for member, units in match.units.items():
+                remaining[member] -= units
+        for member, quantity in remaining.items():
+            self._reprice_offers(plan, member, quantity)
+
+    def total_price(self) -> float:
+        """
+        Returns the running total in constant time. It is maintained from per-scan
+        differences, so it can differ from the receipt total in the last float digits.
+        """
+        return self._total
+
+    def line_total(self, product: Product) -> float:
+        """Returns the undiscounted total of a product's line."""
+        return self._line_totals.get(product, 0.0)
+
+    def discount_for(self, product: Product) -> Optional[Discount]:
+        """Returns the first discount currently applied to a product, if any."""
+        discounts = self.discounts_for(product)
+        return discounts[0] if discounts else None
+
+    def discounts_for(self, product: Product) -> Tuple[Discount, ...]:
+        """
+        Returns every discount currently applied to a product: the bundle discounts
+        attributed to it (see BundleMatch.product), then one per offer used.
+        """
+        bundled = tuple(discount for discount in self._bundle_discounts.values() if discount.product is product)
+        return bundled + self._discounts.get(product, ())
+
+    def finish(self) -> Receipt:
+        """Closes the session and returns its receipt."""
+        if self._receipt is None:
+            self._receipt = self._teller.checks_out_articles_from(self._cart)
+        return self._receipt
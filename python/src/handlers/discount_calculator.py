@@ -1,70 +1,211 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from itertools import count
+import numpy as np
 from src.models import Discount, Product, SpecialOfferType, Offer
-from typing import Optional
+from src.money import QUANTITY_SCALE, Integral, line_total, percentage_of, to_cents
+from typing import Callable, Dict, Optional, Tuple, Union
+
+Amount = Union[float, np.ndarray]
 
 
 class IDiscountStrategy(ABC):
-    """Abstract base class for discount calculation strategies."""
+    """
+    Abstract base class for discount calculation strategies.
+    A whole_line strategy prices the line's whole quantity at once (a tiered percentage),
+    so it cannot share a line with other offers; OfferOptimizer weighs it against them.
+    """
+
+    whole_line: bool = False
 
-    @abstractmethod
     def calculate(
         self, product: Product, quantity: float, offer: Offer, unit_price: float
     ) -> Optional[Discount]:
+        """Calculates the discount for one product line, if the offer applies."""
+        discount_amount = self.discount_amount(quantity, unit_price, offer.argument)
+        return Discount(product, self.description(offer), -discount_amount) if discount_amount > 0 else None
+
+    @abstractmethod
+    def discount_amount(self, quantity: Amount, unit_price: Amount, argument: Amount) -> Amount:
+        """
+        Returns the discount amount; no discount applies unless it is > 0.
+        Accepts scalars or equally shaped NumPy columns.
+        """
+        pass
+
+    @abstractmethod
+    def discount_cents(self, quantity: Integral, unit_price: Integral, argument: Amount) -> Integral:
+        """
+        Returns the discount in integer cents for a fixed-point quantity (see src.money)
+        and a unit price in cents; no discount applies unless it is > 0.
+        Accepts scalars or equally shaped NumPy integer columns.
+        """
+        pass
+
+    @abstractmethod
+    def group(self, unit_price: float, argument: Optional[float]) -> Tuple[int, float]:
+        """
+        Returns how many units one application of the offer covers and the discount it gives,
+        so that discount_amount(n * size, ...) == n * discount for whole applications.
+        """
+        pass
+
+    @abstractmethod
+    def description(self, offer: Offer) -> str:
         pass
 
 
 class ThreeForTwoStrategy(IDiscountStrategy):
-    def calculate(
-        self, product: Product, quantity: float, offer: Offer, unit_price: float
-    ) -> Optional[Discount]:
+    def discount_amount(self, quantity: Amount, unit_price: Amount, argument: Amount) -> Amount:
         """Calculates a 'Three for Two' discount."""
-        num_free = int(quantity // 3)
-        discount_amount = num_free * unit_price
-        return Discount(product, "3 for 2", -discount_amount) if discount_amount > 0 else None
+        return (quantity // 3) * unit_price
+
+    def discount_cents(self, quantity: Integral, unit_price: Integral, argument: Amount) -> Integral:
+        return (quantity // (3 * QUANTITY_SCALE)) * unit_price
+
+    def group(self, unit_price: float, argument: Optional[float]) -> Tuple[int, float]:
+        return 3, unit_price
+
+    def description(self, offer: Offer) -> str:
+        return "3 for 2"
 
 
 class TenPercentDiscountStrategy(IDiscountStrategy):
-    def calculate(
-        self, product: Product, quantity: float, offer: Offer, unit_price: float
-    ) -> Optional[Discount]:
+    def discount_amount(self, quantity: Amount, unit_price: Amount, argument: Amount) -> Amount:
         """Calculates a 10% discount."""
-        discount_amount = quantity * unit_price * (offer.argument / 100.0)
-        return Discount(product, f"{offer.argument}% off", -discount_amount) if discount_amount > 0 else None
-    
+        return quantity * unit_price * (argument / 100.0)
+
+    def discount_cents(self, quantity: Integral, unit_price: Integral, argument: Amount) -> Integral:
+        """Takes the percentage of the line total in cents, rounding half a cent up."""
+        return percentage_of(line_total(quantity, unit_price), argument)
+
+    def group(self, unit_price: float, argument: Optional[float]) -> Tuple[int, float]:
+        return 1, unit_price * (argument / 100.0)
+
+    def description(self, offer: Offer) -> str:
+        return f"{offer.argument}% off"
+
 
 class TwoForAmountStrategy(IDiscountStrategy):
-    def calculate(
-        self, product: Product, quantity: float, offer: Offer, unit_price: float
-    ) -> Optional[Discount]:
+    def discount_amount(self, quantity: Amount, unit_price: Amount, argument: Amount) -> Amount:
         """Calculates a 'Two for Amount' discount."""
-        num_offers = int(quantity // 2)
-        discount_amount = num_offers * (2 * unit_price - offer.argument)
-        return Discount(product, f"2 for {offer.argument}", -discount_amount) if discount_amount > 0 else None
+        return (quantity // 2) * (2 * unit_price - argument)
+
+    def discount_cents(self, quantity: Integral, unit_price: Integral, argument: Amount) -> Integral:
+        return (quantity // (2 * QUANTITY_SCALE)) * (2 * unit_price - to_cents(argument))
+
+    def group(self, unit_price: float, argument: Optional[float]) -> Tuple[int, float]:
+        return 2, 2 * unit_price - argument
+
+    def description(self, offer: Offer) -> str:
+        return f"2 for {offer.argument}"
 
 
 class FiveForAmountStrategy(IDiscountStrategy):
-    def calculate(
-        self, product: Product, quantity: float, offer: Offer, unit_price: float
-    ) -> Optional[Discount]:
+    def discount_amount(self, quantity: Amount, unit_price: Amount, argument: Amount) -> Amount:
         """Calculates a 'Five for Amount' discount."""
-        num_offers = int(quantity // 5)
-        discount_amount = num_offers * (5 * unit_price - offer.argument)
-        return Discount(product, f"5 for {offer.argument}", -discount_amount) if discount_amount > 0 else None
+        return (quantity // 5) * (5 * unit_price - argument)
+
+    def discount_cents(self, quantity: Integral, unit_price: Integral, argument: Amount) -> Integral:
+        return (quantity // (5 * QUANTITY_SCALE)) * (5 * unit_price - to_cents(argument))
+
+    def group(self, unit_price: float, argument: Optional[float]) -> Tuple[int, float]:
+        return 5, 5 * unit_price - argument
+
+    def description(self, offer: Offer) -> str:
+        return f"5 for {offer.argument}"
+
+
+_STRATEGIES: Dict[SpecialOfferType, IDiscountStrategy] = {
+    SpecialOfferType.THREE_FOR_TWO: ThreeForTwoStrategy(),
+    SpecialOfferType.PERCENT_DISCOUNT: TenPercentDiscountStrategy(),
+    SpecialOfferType.TWO_FOR_AMOUNT: TwoForAmountStrategy(),
+    SpecialOfferType.FIVE_FOR_AMOUNT: FiveForAmountStrategy(),
+}
+
+
+OfferKind = Union[SpecialOfferType, IDiscountStrategy]
 
 
 class IDiscountStrategyFactory:
-    """Factory class for creating discount strategy instances."""
+    """Factory class for looking up the shared, stateless strategy instances."""
 
     @staticmethod
-    def get_strategy(offer_type: SpecialOfferType) -> IDiscountStrategy:
-        """Returns the appropriate strategy for the given offer type."""
-
-        if offer_type == SpecialOfferType.THREE_FOR_TWO:
-            return ThreeForTwoStrategy()
-        if offer_type == SpecialOfferType.PERCENT_DISCOUNT:
-            return TenPercentDiscountStrategy()
-        if offer_type == SpecialOfferType.TWO_FOR_AMOUNT:
-            return TwoForAmountStrategy()
-        if offer_type == SpecialOfferType.FIVE_FOR_AMOUNT:
-            return FiveForAmountStrategy()
-        raise ValueError(f"No strategy found for offer type: {offer_type}")
\ No newline at end of file
+    def get_strategy(offer_type: OfferKind) -> IDiscountStrategy:
+        """
+        Returns the appropriate strategy for the given offer type; an offer whose type
+        is itself a strategy, such as a compiled offer rule, uses that strategy.
+        """
+        if isinstance(offer_type, IDiscountStrategy):
+            return offer_type
+        strategy = _STRATEGIES.get(offer_type)
+        if strategy is None:
+            raise ValueError(f"No strategy found for offer type: {offer_type}")
+        return strategy
+
+
+DiscountRule = Callable[[float, float], Tuple[Discount, ...]]
+
+
+class DiscountMemo:
+    """
+    A bounded memo of discount results, shared by the pricing rules of many products.
+
+    Results are kept per rule and (quantity, unit price) line, and an entry is the tuple
+    of Discounts the rule returned, so a hit returns it again without allocating anything;
+    receipts share those Discounts, which nothing changes once they are built. A plan that
+    reuses a product's rule from its base keeps its entries, while a changed offer gets a
+    new rule and is never answered from an entry of the old one. Entries of rules no longer
+    used are evicted first-in, first-out beyond max_size, and invalidate_all() drops every
+    entry. The counters are statistics and are not synchronized between threads.
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[int, float, float], Tuple[Discount, ...]]" = OrderedDict()
+        self._rule_ids = count()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def memoize(self, rule: DiscountRule) -> DiscountRule:
+        """Wraps a product's (quantity, unit price) -> discounts rule."""
+        rule_id = next(self._rule_ids)
+        entries = self._entries
+
+        def memoized(quantity: float, unit_price: float) -> Tuple[Discount, ...]:
+            key = (rule_id, quantity, unit_price)
+            found = entries.get(key)
+            if found is None:
+                self.misses += 1
+                found = rule(quantity, unit_price)
+                self._store(key, found)
+            else:
+                self.hits += 1
+            return found
+
+        return memoized
+
+    def invalidate_all(self) -> None:
+        """Drops every memoized result."""
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of rule calls answered from the memo."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: Tuple[int, float, float], results: Tuple[Discount, ...]) -> None:
+        self._entries[key] = results
+        if len(self._entries) > self.max_size:
+            try:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            except KeyError:
+                pass
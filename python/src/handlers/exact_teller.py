@@ -0,0 +1,174 @@
+from operator import attrgetter
+from time import perf_counter
+from typing import Dict, List, Mapping, Optional
+import numpy as np
+from src.models import Discount, Product, ReceiptItem
+from src.money import CENTS, Money, line_total, to_cents, to_quantity
+from src.handlers.receipt import ExactReceipt
+from src.handlers.catalog import ISupermarketCatalog
+from src.handlers.shopping_cart import IShoppingCart
+from src.handlers.pricing_plan import PricingPlan
+from src.handlers.teller import BaseTeller
+from src.handlers.instrumentation import Instrumentation
+
+
+class ExactTeller(BaseTeller):
+    """
+    Checks out carts in exact integer arithmetic instead of floats.
+
+    Catalog prices are fixed to cents and quantities to thousandths (grams for KILO
+    products), in one NumPy pass per cart, and everything after that is integer arithmetic:
+    - a line total is quantity * unit price, rounded half up to the cent;
+    - a percentage discount is taken from the rounded line total, rounded half up;
+    - group offers and bundles discount whole cents and need no rounding.
+    The offers, bundles and their best combination are chosen as for the Teller.
+    Receipts are ExactReceipts holding Money, so their totals are exact.
+    With instrumentation, the catalog lookup, receipt build and offers stages are
+    observed as by the Teller.
+    """
+
+    SMALL_CART = 48
+    """Carts of fewer lines are priced line by line; NumPy's per-call overhead outweighs it there."""
+
+    def __init__(self, catalog: ISupermarketCatalog, instrumentation: Optional[Instrumentation] = None):
+        self.catalog = catalog
+        super().__init__(instrumentation)
+
+    def checks_out_articles_from(self, the_cart: IShoppingCart, at: Optional[float] = None) -> ExactReceipt:
+        """Processes a shopping cart and generates a receipt in exact cents, with the offers valid at time at."""
+        instrumentation = self.instrumentation
+        enabled = instrumentation.enabled
+        started = perf_counter() if enabled else 0.0
+        receipt = ExactReceipt()
+        product_quantities = the_cart.product_quantities()
+        line_count = len(product_quantities)
+        float_prices = self.catalog.unit_prices(product_quantities)
+        if enabled:
+            looked_up = self._observe_catalog_lookup(started, line_count)
+
+        small = line_count < self.SMALL_CART
+        if small:
+            price_list = [round(price * CENTS) for price in float_prices]
+            total_list = list(map(line_total, map(to_quantity, product_quantities.values()), price_list))
+            total_price = sum(total_list)
+        else:
+            float_quantities = np.fromiter(product_quantities.values(), dtype=np.float64, count=line_count)
+            cents = to_cents(np.array(float_prices, dtype=np.float64))
+            totals = line_total(to_quantity(float_quantities), cents)
+            price_list = cents.tolist()
+            total_list = totals.tolist()
+            total_price = int(totals.sum())
+        receipt.add_items(
+            map(
+                ReceiptItem,
+                product_quantities,
+                product_quantities.values(),
+                map(Money, price_list),
+                map(Money, total_list),
+            ),
+            total_price,
+        )
+        if enabled:
+            built = perf_counter()
+            instrumentation.observe("receipt_build", built - looked_up)
+
+        plan = self.plan_at(at)
+        quantities = product_quantities
+        if plan.bundles is not None:
+            unit_prices = dict(zip(product_quantities, price_list))
+            quantities = self._add_bundle_discounts(receipt, plan, product_quantities, unit_prices)
+        if small:
+            self._add_offer_discounts_by_line(receipt, plan, quantities, price_list)
+        else:
+            if quantities is not product_quantities:
+                float_quantities = np.fromiter(quantities.values(), dtype=np.float64, count=line_count)
+            self._add_offer_discounts(receipt, plan, list(product_quantities), float_quantities, cents)
+        if enabled:
+            instrumentation.observe("offers", perf_counter() - built)
+            instrumentation.receipts.inc()
+            instrumentation.receipt_lines.inc(line_count)
+        return receipt
+
+    @classmethod
+    def _add_offer_discounts_by_line(
+        cls, receipt: ExactReceipt, plan: PricingPlan, quantities: Mapping[Product, float], cents: List[int]
+    ) -> None:
+        """Applies the cent kernels line by line, on Python integers."""
+        compiled_offers = plan.compiled
+        for (product, quantity), unit_price in zip(quantities.items(), cents):
+            compiled = compiled_offers.get(product)
+            if compiled is None:
+                continue
+            if len(compiled) > 1:
+                cls._add_combined_discounts(receipt, plan, product, quantity, unit_price)
+                continue
+            offer = compiled[0]
+            amount = offer.strategy.discount_cents(to_quantity(quantity), unit_price, offer.offer.argument)
+            if amount > 0:
+                receipt.add_discount(Discount(product, offer.description, Money(-amount)))
+
+    @classmethod
+    def _add_offer_discounts(
+        cls,
+        receipt: ExactReceipt,
+        plan: PricingPlan,
+        products: List[Product],
+        float_quantities: np.ndarray,
+        cents: np.ndarray,
+    ) -> None:
+        """
+        Evaluates each strategy's cent kernel over the lines of the products it is the
+        only offer of; products with several offers are split by their optimizer.
+        """
+        columns = plan.offer_columns()
+        product_ids = np.fromiter(map(attrgetter("id"), products), dtype=np.int64, count=len(products))
+        codes, arguments = columns.lookup(product_ids)
+        quantities = to_quantity(float_quantities)
+        amounts = np.zeros(len(products), dtype=np.int64)
+        for code, strategy in enumerate(columns.strategies):
+            rows = np.flatnonzero(codes == code)
+            if len(rows):
+                amounts[rows] = strategy.discount_cents(quantities[rows], cents[rows], arguments[rows])
+
+        compiled_offers = plan.compiled
+        rows = np.flatnonzero((amounts > 0) | (codes == columns.COMBINED))
+        for row, amount in zip(rows.tolist(), amounts[rows].tolist()):
+            product = products[row]
+            compiled = compiled_offers[product]
+            if len(compiled) == 1:
+                receipt.add_discount(Discount(product, compiled[0].description, Money(-amount)))
+            else:
+                cls._add_combined_discounts(receipt, plan, product, float(float_quantities[row]), int(cents[row]))
+
+    @staticmethod
+    def _add_combined_discounts(
+        receipt: ExactReceipt, plan: PricingPlan, product: Product, quantity: float, unit_price: int
+    ) -> None:
+        """Splits a line between the product's offers as the optimizer chooses, and prices each part in cents."""
+        allocations = plan.optimizers[product].allocate(quantity, unit_price / CENTS)
+        for offer, units in zip(plan.compiled[product], allocations):
+            amount = offer.strategy.discount_cents(to_quantity(units), unit_price, offer.offer.argument)
+            if amount > 0:
+                receipt.add_discount(Discount(product, offer.description, Money(-amount)))
+
+    @staticmethod
+    def _add_bundle_discounts(
+        receipt: ExactReceipt,
+        plan: PricingPlan,
+        quantities: Mapping[Product, float],
+        unit_prices: Dict[Product, int],
+    ) -> Mapping[Product, float]:
+        """Adds the bundle discounts in cents and returns the quantities the bundles leave."""
+        float_prices = {product: price / CENTS for product, price in unit_prices.items()}
+        matches = plan.bundles.match(quantities, float_prices)
+        if not matches:
+            return quantities
+        remaining = dict(quantities)
+        for match in matches:
+            regular = 0
+            for product, units in match.units.items():
+                regular += units * unit_prices[product]
+                remaining[product] -= units
+            amount = regular - match.applications * to_cents(match.bundle.price)
+            receipt.add_discount(Discount(match.product, match.bundle.description, Money(-amount)))
+        return remaining
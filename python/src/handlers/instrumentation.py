@@ -0,0 +1,204 @@
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+Labels = Tuple[Tuple[str, str], ...]
+StageHook = Callable[[str, str, float], None]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = labels + (extra,) if extra is not None else labels
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    """A sample value without loss: counts as integers, anything else as the shortest exact float."""
+    if value.is_integer() and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Observations bucketed by upper bound, with their sum and count, per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(sorted(labels.items())))
+        return int(series[-1]) if series is not None else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    bucket = _format_labels(labels, ("le", f"{bound:g}"))
+                    lines.append(f"{self.name}_bucket{bucket} {_format_value(cumulative)}")
+                count = _format_value(series[-1])
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and exports them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Histogram]] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def _get_or_create(self, name: str, factory: Callable[[], Union[Counter, Histogram]]):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics.setdefault(name, factory())
+        return metric
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Union[str, Path]) -> None:
+        """Writes the metrics to a file atomically, e.g. for the node exporter's textfile collector."""
+        path = Path(path)
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(self.render_prometheus())
+        temporary.replace(path)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serves the metrics over HTTP from a daemon thread; call shutdown() on the result to stop."""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class Instrumentation:
+    """
+    Stage timings, counters and hooks for the checkout pipeline.
+    Instrumented code checks `enabled` before reading the clock, so a disabled
+    instance costs one attribute lookup per stage.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.stage_seconds = self.registry.histogram(
+            "checkout_stage_seconds", "Time spent per checkout stage, by stage and detail."
+        )
+        self.catalog_products = self.registry.counter(
+            "checkout_catalog_products_total", "Products whose price was looked up, by catalog."
+        )
+        self.receipts = self.registry.counter("checkout_receipts_total", "Receipts produced.")
+        self.receipt_lines = self.registry.counter("checkout_receipt_lines_total", "Receipt lines produced.")
+        self._hooks: List[StageHook] = []
+
+    def add_hook(self, hook: StageHook) -> None:
+        """Registers a callable receiving (stage, detail, seconds) for every timed stage."""
+        self._hooks.append(hook)
+
+    def observe(self, stage: str, seconds: float, detail: str = "") -> None:
+        self.stage_seconds.observe(seconds, stage=stage, detail=detail)
+        for hook in self._hooks:
+            hook(stage, detail, seconds)
+
+    @contextmanager
+    def time(self, stage: str, detail: str = "") -> Iterator[None]:
+        """Times a block as a stage; use `enabled` to skip it on hot paths."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, perf_counter() - start, detail)
+
+    def wrap(self, stage: str, detail: str, func: Callable) -> Callable:
+        """Returns func timed as a stage on every call."""
+        observe = self.observe
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(stage, perf_counter() - start, detail)
+
+        return timed
+
+
+NULL_INSTRUMENTATION = Instrumentation(enabled=False)
@@ -0,0 +1,130 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.handlers.discount_calculator import IDiscountStrategy
+
+OfferTerms = Tuple[IDiscountStrategy, Optional[float]]
+
+
+class _Table:
+    """Best discount and the applications per offer that reach it, for 0..n whole units."""
+
+    __slots__ = ("best", "applications")
+
+    def __init__(self, offers: int):
+        self.best: List[float] = [0.0]
+        self.applications: List[Tuple[int, ...]] = [(0,) * offers]
+
+
+class OfferOptimizer:
+    """
+    Chooses how many units of a product each of its offers covers, so that the
+    combined discount is the largest; every unit is covered by at most one offer.
+
+    An offer applies to groups of units (three for a "3 for 2", one for a percentage),
+    so the best discount for n whole units is an unbounded knapsack solved by dynamic
+    programming over n: best[n] = max(best[n - 1], best[n - size] + discount) per offer.
+    The tables only depend on the unit price, so they are memoized per price and
+    extended on demand; a quantity already seen is answered by a lookup.
+    Large quantities are periodic: some best allocation leaves fewer than s units
+    uncovered and uses fewer than s groups of other offers, where s is the size of the
+    offer with the most discount per unit, so beyond (s - 1) * largest size + s units
+    each further s units add one group of that offer. Quantities past that point are
+    reduced by whole periods, which also caps the length of every table.
+    The fraction of a weighed quantity goes to the best single-unit offer, if any.
+    A whole_line offer (a tiered percentage) does not split into groups: it is left out
+    of the tables, and covers the whole quantity instead when that gives more discount.
+    """
+
+    def __init__(self, terms: Sequence[OfferTerms], max_tables: int = 64):
+        self.terms: List[OfferTerms] = list(terms)
+        self.max_tables = max_tables
+        self._tables: Dict[float, _Table] = {}
+        self._lock = threading.Lock()
+
+    def allocate(self, quantity: float, unit_price: float) -> List[float]:
+        """Returns the units of quantity covered by each offer, in the order of the terms."""
+        whole = int(quantity)
+        groups = [
+            (1, 0.0) if strategy.whole_line else strategy.group(unit_price, argument)
+            for strategy, argument in self.terms
+        ]
+        applications = self._applications(whole, unit_price, groups)
+        units = [float(count * size) for count, (size, _) in zip(applications, groups)]
+
+        fraction = quantity - whole
+        if fraction > 0:
+            single_units = [
+                (discount, index) for index, (size, discount) in enumerate(groups) if size == 1 and discount > 0
+            ]
+            if single_units:
+                _, best = max(single_units, key=lambda single: (single[0], -single[1]))
+                units[best] += fraction
+        if any(strategy.whole_line for strategy, _ in self.terms):
+            return self._whole_line(quantity, unit_price, units)
+        return units
+
+    def _whole_line(self, quantity: float, unit_price: float, units: List[float]) -> List[float]:
+        """Returns units, or the whole quantity for the whole_line offer that beats them."""
+        best_units = units
+        best = sum(
+            strategy.discount_amount(covered, unit_price, argument)
+            for (strategy, argument), covered in zip(self.terms, units)
+            if covered
+        )
+        for index, (strategy, argument) in enumerate(self.terms):
+            if strategy.whole_line:
+                discount = strategy.discount_amount(quantity, unit_price, argument)
+                if discount > best:
+                    best = discount
+                    best_units = [0.0] * len(self.terms)
+                    best_units[index] = quantity
+        return best_units
+
+    def _applications(self, whole: int, unit_price: float, groups: List[Tuple[int, float]]) -> Tuple[int, ...]:
+        candidates = [(index, size, discount) for index, (size, discount) in enumerate(groups) if discount > 0]
+        if not candidates:
+            return (0,) * len(groups)
+        densest, period, _ = max(candidates, key=lambda candidate: (candidate[2] / candidate[1], -candidate[0]))
+        periodic_from = (period - 1) * max(size for _, size, _ in candidates) + period
+        periods = -(-(whole - periodic_from) // period) if whole > periodic_from else 0
+        applications = self._lookup(whole - periods * period, unit_price, len(groups), candidates)
+        if not periods:
+            return applications
+        counts = list(applications)
+        counts[densest] += periods
+        return tuple(counts)
+
+    def _lookup(
+        self, whole: int, unit_price: float, offers: int, candidates: List[Tuple[int, int, float]]
+    ) -> Tuple[int, ...]:
+        table = self._tables.get(unit_price)
+        if table is not None and whole < len(table.best):
+            return table.applications[whole]
+        with self._lock:
+            table = self._tables.get(unit_price)
+            if table is None:
+                if len(self._tables) >= self.max_tables:
+                    self._tables.clear()
+                table = self._tables[unit_price] = _Table(offers)
+            self._extend(table, whole, candidates)
+            return table.applications[whole]
+
+    @staticmethod
+    def _extend(table: _Table, whole: int, candidates: List[Tuple[int, int, float]]) -> None:
+        best = table.best
+        applications = table.applications
+        for units in range(len(best), whole + 1):
+            value = best[units - 1]
+            chosen: Optional[Tuple[int, int]] = None
+            for index, size, discount in candidates:
+                if size <= units and best[units - size] + discount > value:
+                    value = best[units - size] + discount
+                    chosen = (index, units - size)
+            if chosen is None:
+                applications.append(applications[units - 1])
+            else:
+                index, rest = chosen
+                counts = list(applications[rest])
+                counts[index] += 1
+                applications.append(tuple(counts))
+            best.append(value)
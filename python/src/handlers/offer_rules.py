@@ -0,0 +1,229 @@
+import csv
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from src.models import Offer, Product
+from src.money import BASIS_POINTS, CENTS, QUANTITY_SCALE, line_total, percentage_of, round_half_up, to_cents
+from src.handlers.catalog import ISupermarketCatalog, find_product
+from src.handlers.discount_calculator import IDiscountStrategy
+from src.handlers.offer_snapshot import OfferUpdate
+from src.enums import SpecialOfferType
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_PERCENT = re.compile(rf"{_NUMBER}% off")
+_N_FOR_AMOUNT = re.compile(rf"(\d+) for {_NUMBER}")
+_BUY_GET = re.compile(rf"buy (\d+) get (\d+) (free|half price|{_NUMBER}% off)")
+_TIER = re.compile(rf"{_NUMBER}% off from {_NUMBER}")
+RULE_CACHE_SIZE = 1024
+_OFFER_TYPE_ALIASES = {"TEN_PERCENT_DISCOUNT": SpecialOfferType.PERCENT_DISCOUNT}
+
+_TEMPLATE = """
+class {name}(OfferRule):
+    def discount_amount(self, quantity, unit_price, argument):
+        return {amount}
+
+    def discount_cents(self, quantity, unit_price, argument):
+        return {cents}
+"""
+
+
+class OfferRule(IDiscountStrategy):
+    """
+    A discount strategy compiled from a declarative rule (see compile_rule).
+    The rule's numbers are written into Python source as constants, and the source is
+    compiled once into a subclass of OfferRule, so a rule costs what a hand-written
+    strategy costs; the generated methods are plain arithmetic and take scalars and
+    NumPy columns alike. Offers using a rule have no argument, it is ignored.
+    """
+
+    source: str = ""
+
+    def __init__(
+        self, text: str, size: int, group_units: float, group_amount: float = 0.0, whole_line: bool = False
+    ):
+        self.text = text
+        self.size = size
+        self.group_units = group_units
+        self.group_amount = group_amount
+        self.whole_line = whole_line
+
+    def group(self, unit_price: float, argument: Optional[float]) -> Tuple[int, float]:
+        return self.size, self.group_units * unit_price - self.group_amount
+
+    def description(self, offer: Offer) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.text!r})"
+
+
+def compile_rule(text: str) -> OfferRule:
+    """
+    Compiles an offer rule; the same rule text gives the same OfferRule instance while it
+    is among the last RULE_CACHE_SIZE distinct rules compiled.
+    Rules are case-insensitive and read, for any whole numbers N and M:
+
+        "N for 4.99"                   N units for an amount
+        "buy N get M free"             every N + M units, M are free
+        "buy N get M half price"       ... M are half price; also "buy N get M 30% off"
+        "15% off"                      a percentage off the line
+        "5% off from 10, 10% off from 20"
+                                       the percentage of the highest tier the line's
+                                       quantity reaches, off the whole line
+
+    Raises ValueError for text that is not a valid rule.
+    """
+    return _compile(re.sub(r" ?, ?", ", ", " ".join(text.lower().split())))
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def _compile(text: str) -> OfferRule:
+    name, amount, cents, arguments = _parse(text)
+    source = _TEMPLATE.format(name=name, amount=amount, cents=cents)
+    namespace: Dict[str, Any] = {
+        "OfferRule": OfferRule,
+        "BASIS_POINTS": BASIS_POINTS,
+        "line_total": line_total,
+        "percentage_of": percentage_of,
+        "round_half_up": round_half_up,
+    }
+    exec(compile(source, f"<offer rule {text!r}>", "exec"), namespace)
+    rule_class = namespace[name]
+    rule_class.source = source
+    return rule_class(text, *arguments)
+
+
+def _parse(text: str) -> Tuple[str, str, str, Tuple[Any, ...]]:
+    """Returns the class name, the float and cents expressions and the OfferRule arguments of a rule."""
+    match = _N_FOR_AMOUNT.fullmatch(text)
+    if match:
+        size, price = _whole(match.group(1), text), float(match.group(2))
+        return (
+            "NForAmountRule",
+            f"(quantity // {size}) * ({size} * unit_price - {price!r})",
+            f"(quantity // {size * QUANTITY_SCALE}) * ({size} * unit_price - {to_cents(price)})",
+            (size, float(size), price),
+        )
+    match = _BUY_GET.fullmatch(text)
+    if match:
+        bought, free = _whole(match.group(1), text), _whole(match.group(2), text)
+        size = bought + free
+        if match.group(3) == "free":
+            percent = 100.0
+        elif match.group(3) == "half price":
+            percent = 50.0
+        else:
+            percent = _percent(match.group(4), text)
+        if percent == 100.0:
+            cents = f"(quantity // {size * QUANTITY_SCALE}) * ({free} * unit_price)"
+        else:
+            cents = f"(quantity // {size * QUANTITY_SCALE}) * percentage_of({free} * unit_price, {percent!r})"
+        units = free * percent / 100.0
+        return "BuyGetRule", f"(quantity // {size}) * ({units!r} * unit_price)", cents, (size, units)
+    match = _PERCENT.fullmatch(text)
+    if match:
+        percent = _percent(match.group(1), text)
+        return (
+            "PercentRule",
+            f"quantity * unit_price * {percent / 100.0!r}",
+            f"percentage_of(line_total(quantity, unit_price), {percent!r})",
+            (1, percent / 100.0),
+        )
+    tiers = [_TIER.fullmatch(tier) for tier in text.split(", ")]
+    if all(tiers):
+        return _tiered([(_percent(tier.group(1), text), float(tier.group(2))) for tier in tiers], text)
+    raise ValueError(f'not an offer rule: {text!r}; e.g. "3 for 4.99", "buy 2 get 1 half price", "10% off"')
+
+
+def _tiered(tiers: List[Tuple[float, float]], text: str) -> Tuple[str, str, str, Tuple[Any, ...]]:
+    """
+    Sums a step per tier, the difference to the previous tier's percentage where the
+    quantity reaches the tier, which selects the highest tier reached without branching.
+    A tier applies to the whole line, so the rule is a whole_line strategy.
+    """
+    thresholds = [threshold for _, threshold in tiers]
+    if thresholds != sorted(set(thresholds)) or thresholds[0] <= 0:
+        raise ValueError(f"tier quantities must be positive and increasing: {text!r}")
+    rate_steps: List[str] = []
+    basis_point_steps: List[str] = []
+    previous_rate, previous_basis_points = 0.0, 0
+    for percent, threshold in tiers:
+        rate, basis_points = percent / 100.0, round(percent * CENTS)
+        rate_steps.append(f"{rate - previous_rate!r} * (quantity >= {threshold!r})")
+        fixed_threshold = round(threshold * QUANTITY_SCALE)
+        basis_point_steps.append(f"{basis_points - previous_basis_points} * (quantity >= {fixed_threshold})")
+        previous_rate, previous_basis_points = rate, basis_points
+    size = math.ceil(thresholds[-1])
+    return (
+        "TieredRule",
+        f"quantity * unit_price * ({' + '.join(rate_steps)})",
+        f"round_half_up(line_total(quantity, unit_price) * ({' + '.join(basis_point_steps)}), BASIS_POINTS)",
+        (size, size * previous_rate, 0.0, True),
+    )
+
+
+def _whole(number: str, text: str) -> int:
+    if int(number) < 1:
+        raise ValueError(f"unit counts must be at least 1: {text!r}")
+    return int(number)
+
+
+def _percent(number: str, text: str) -> float:
+    percent = float(number)
+    if not 0 < percent <= 100:
+        raise ValueError(f"percentages must be above 0 and at most 100: {text!r}")
+    return percent
+
+
+def load_offers(
+    csv_path: Union[str, Path], update: OfferUpdate, catalog: Optional[ISupermarketCatalog] = None
+) -> int:
+    """
+    Adds the offers of an offers CSV to an update and returns how many were added.
+    Each row names its product in a product (name) or sku column, and has either a rule
+    column (see compile_rule) or an offer_type column, naming a SpecialOfferType, with an
+    optional argument; optional start and end columns (POSIX timestamps) schedule it.
+    The name,offer,argument layout of the texttest offers.csv files is read too: name and
+    offer stand for product and offer_type, and TEN_PERCENT_DISCOUNT for PERCENT_DISCOUNT.
+    Products are looked up as by find_product. Raises ValueError, with the line number,
+    for an invalid row; load into an update_offers() block so that nothing is published then.
+    """
+    added = 0
+    with open(csv_path, "r", newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                offer_type, argument = _offer_terms(row)
+                product = _row_product(row, catalog)
+                update.add_special_offer(offer_type, product, argument, _number(row, "start"), _number(row, "end"))
+            except (KeyError, ValueError) as error:
+                raise ValueError(f"{csv_path}, line {reader.line_num}: {error}") from error
+            added += 1
+    return added
+
+
+def _offer_terms(row: Dict[str, str]) -> Tuple[Union[SpecialOfferType, OfferRule], Optional[float]]:
+    if row.get("rule"):
+        return compile_rule(row["rule"]), None
+    offer_type = row.get("offer_type") or row.get("offer")
+    if not offer_type:
+        raise ValueError("a row needs a rule or an offer_type")
+    offer_type = offer_type.strip().upper()
+    return _OFFER_TYPE_ALIASES.get(offer_type) or SpecialOfferType[offer_type], _number(row, "argument")
+
+
+def _row_product(row: Dict[str, str], catalog: Optional[ISupermarketCatalog]) -> Product:
+    if row.get("sku"):
+        product = find_product(catalog, sku=int(row["sku"]))
+    else:
+        product = find_product(catalog, name=row.get("product") or row.get("name") or None)
+    if product is None:
+        raise ValueError(f"unknown product: {row.get('sku') or row.get('product') or row.get('name')!r}")
+    return product
+
+
+def _number(row: Dict[str, str], column: str) -> Optional[float]:
+    value = row.get(column)
+    return float(value) if value else None
@@ -0,0 +1,63 @@
+from typing import Collection, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from src.models import Offer, Product
+
+
+class ActiveOffers(NamedTuple):
+    """The scheduled offers active from start (inclusive) until end (exclusive)."""
+
+    start: float
+    end: float
+    offers: List[Offer]
+
+    def covers(self, at: float) -> bool:
+        return self.start <= at < self.end
+
+
+class OfferSchedule:
+    """
+    Offers with a validity window, indexed by a sorted list of their boundaries.
+    The active set only changes at a boundary, so active(at) returns it together
+    with the boundaries around at, and callers can reuse it until the next one.
+    Resolving a time is a binary search plus one vectorized pass over the windows.
+    A schedule is immutable: with_offers returns a new one, and the index is built
+    on first use and published as a single reference, so concurrent readers are safe.
+    """
+
+    def __init__(self, offers: Iterable[Offer] = ()):
+        self.offers: Tuple[Offer, ...] = tuple(offers)
+        self._index: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.offers)
+
+    def with_offers(self, offers: Iterable[Offer]) -> "OfferSchedule":
+        """Returns a schedule with offers added."""
+        return OfferSchedule(self.offers + tuple(offers))
+
+    def without_products(self, products: Collection[Product]) -> "OfferSchedule":
+        """Returns a schedule without the offers on products."""
+        return OfferSchedule(offer for offer in self.offers if offer.product not in products)
+
+    def active(self, at: float) -> ActiveOffers:
+        """Returns the offers active at time at and the window in which they stay active."""
+        index = self._index
+        if index is None:
+            index = self._index = self._build()
+        starts, ends, boundaries = index
+        position = int(np.searchsorted(boundaries, at, side="right"))
+        start = float(boundaries[position - 1]) if position > 0 else -np.inf
+        end = float(boundaries[position]) if position < len(boundaries) else np.inf
+        rows = np.flatnonzero((starts <= at) & (at < ends))
+        return ActiveOffers(start, end, [self.offers[row] for row in rows.tolist()])
+
+    def _build(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        count = len(self.offers)
+        starts = np.fromiter(
+            (-np.inf if offer.start is None else offer.start for offer in self.offers), dtype=np.float64, count=count
+        )
+        ends = np.fromiter(
+            (np.inf if offer.end is None else offer.end for offer in self.offers), dtype=np.float64, count=count
+        )
+        boundaries = np.unique(np.concatenate([starts, ends]))
+        return starts, ends, boundaries[np.isfinite(boundaries)]
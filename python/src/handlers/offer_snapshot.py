@@ -0,0 +1,129 @@
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+from src.models import Bundle, Offer, Product
+from src.handlers.discount_calculator import OfferKind
+from src.handlers.offer_schedule import OfferSchedule
+
+
+class OfferSnapshot:
+    """
+    One immutable, versioned state of a teller's offers: the permanent offers per
+    product, the scheduled offers and the bundles. A teller publishes a new snapshot
+    for every change, so a reader that took a snapshot reference sees one consistent
+    set of offers however long it holds it, without locking.
+    """
+
+    __slots__ = ("version", "offers", "schedule", "bundles")
+
+    def __init__(
+        self,
+        version: int = 0,
+        offers: Optional[Mapping[Product, Tuple[Offer, ...]]] = None,
+        schedule: Optional[OfferSchedule] = None,
+        bundles: Tuple[Bundle, ...] = (),
+    ):
+        self.version: int = version
+        if not isinstance(offers, MappingProxyType):
+            offers = MappingProxyType(dict(offers) if offers is not None else {})
+        self.offers: Mapping[Product, Tuple[Offer, ...]] = offers
+        self.schedule: OfferSchedule = schedule if schedule is not None else OfferSchedule()
+        self.bundles: Tuple[Bundle, ...] = bundles
+
+
+class OfferUpdate:
+    """
+    Offer changes to publish together as the next snapshot of a base snapshot.
+    The base is copied on the first change (copy-on-write): the offers mapping is
+    copied shallowly and only the changed products get new offer tuples.
+    The published snapshot shares the update's mapping, so snapshot() seals the update:
+    later changes raise RuntimeError instead of altering a published version.
+    """
+
+    def __init__(self, base: OfferSnapshot):
+        self.base = base
+        self._offers: Optional[Dict[Product, Tuple[Offer, ...]]] = None
+        self._scheduled: List[Offer] = []
+        self._unscheduled: Set[Product] = set()
+        self._bundles: List[Bundle] = []
+        self._sealed = False
+
+    def add_special_offer(
+        self,
+        offer_type: OfferKind,
+        product: Product,
+        argument: Optional[float] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        replace: bool = False,
+    ) -> Offer:
+        """
+        Adds a special offer, scheduled if it has a start or an end. With replace, the
+        product's other offers are removed first. An offer with the same type, argument
+        and window as one the product already has is not added twice; that one is returned.
+        """
+        self._check_open()
+        if replace:
+            self.remove_offers(product)
+        offer = Offer(offer_type, product, argument, start, end)
+        for existing in self._offers_of(product):
+            if _same_terms(existing, offer):
+                return existing
+        if offer.scheduled:
+            self._scheduled.append(offer)
+        else:
+            if self._offers is None:
+                self._offers = dict(self.base.offers)
+            self._offers[product] = self._offers.get(product, ()) + (offer,)
+        return offer
+
+    def remove_offers(self, product: Product) -> None:
+        """Removes every offer on product, permanent and scheduled; bundles are kept."""
+        self._check_open()
+        offers = self._offers if self._offers is not None else self.base.offers
+        if product in offers:
+            if self._offers is None:
+                self._offers = dict(self.base.offers)
+            del self._offers[product]
+        self._scheduled = [offer for offer in self._scheduled if offer.product is not product]
+        if any(offer.product is product for offer in self.base.schedule.offers):
+            self._unscheduled.add(product)
+
+    def _offers_of(self, product: Product) -> Iterator[Offer]:
+        offers = self._offers if self._offers is not None else self.base.offers
+        yield from offers.get(product, ())
+        if product not in self._unscheduled:
+            yield from (offer for offer in self.base.schedule.offers if offer.product is product)
+        yield from (offer for offer in self._scheduled if offer.product is product)
+
+    def add_bundle_offer(self, bundle: Bundle) -> None:
+        self._check_open()
+        self._bundles.append(bundle)
+
+    def snapshot(self) -> OfferSnapshot:
+        """The base with the changes applied, as a new version; the base itself if nothing changed."""
+        base = self.base
+        self._sealed = True
+        if self._offers is None and not self._scheduled and not self._unscheduled and not self._bundles:
+            return base
+        schedule = base.schedule
+        if self._unscheduled:
+            schedule = schedule.without_products(self._unscheduled)
+        return OfferSnapshot(
+            base.version + 1,
+            MappingProxyType(self._offers) if self._offers is not None else base.offers,
+            schedule.with_offers(self._scheduled) if self._scheduled else schedule,
+            base.bundles + tuple(self._bundles),
+        )
+
+    def _check_open(self) -> None:
+        if self._sealed:
+            raise RuntimeError("this offer update is already published; start a new one")
+
+
+def _same_terms(offer: Offer, other: Offer) -> bool:
+    return (
+        offer.offer_type == other.offer_type
+        and offer.argument == other.argument
+        and offer.start == other.start
+        and offer.end == other.end
+    )
@@ -0,0 +1,186 @@
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.models import Bundle, Discount, Offer, Product
+from src.handlers.discount_calculator import DiscountMemo, IDiscountStrategy, IDiscountStrategyFactory
+from src.handlers.offer_optimizer import OfferOptimizer
+from src.handlers.bundle_matcher import BundleMatcher
+from src.handlers.instrumentation import Instrumentation
+
+PricingRule = Callable[[float, float], Tuple[Discount, ...]]
+
+
+class CompiledOffer:
+    """An offer bound to its strategy, with its description prebuilt."""
+
+    __slots__ = ("offer", "strategy", "description", "rule")
+
+    def __init__(self, offer: Offer):
+        self.offer: Offer = offer
+        self.strategy: IDiscountStrategy = IDiscountStrategyFactory.get_strategy(offer.offer_type)
+        self.description: str = self.strategy.description(offer)
+        self.rule: PricingRule = self._compile()
+
+    def discount(self, quantity: float, unit_price: float) -> Optional[Discount]:
+        """Returns the offer's discount on quantity units, if it applies."""
+        amount = self.strategy.discount_amount(quantity, unit_price, self.offer.argument)
+        return Discount(self.offer.product, self.description, -amount) if amount > 0 else None
+
+    def _compile(self) -> PricingRule:
+        """Builds the (quantity, unit price) -> discounts callable for this offer."""
+        discount_amount = self.strategy.discount_amount
+        product = self.offer.product
+        argument = self.offer.argument
+        description = self.description
+
+        def rule(quantity: float, unit_price: float) -> Tuple[Discount, ...]:
+            amount = discount_amount(quantity, unit_price, argument)
+            return (Discount(product, description, -amount),) if amount > 0 else ()
+
+        return rule
+
+
+def _combine(compiled: Sequence[CompiledOffer], optimizer: OfferOptimizer) -> PricingRule:
+    """Builds the rule of a product with several offers, applying their best combination."""
+
+    def rule(quantity: float, unit_price: float) -> Tuple[Discount, ...]:
+        discounts = []
+        for offer, units in zip(compiled, optimizer.allocate(quantity, unit_price)):
+            discount = offer.discount(units, unit_price) if units else None
+            if discount:
+                discounts.append(discount)
+        return tuple(discounts)
+
+    return rule
+
+
+class OfferColumns:
+    """
+    Offers laid out by dense product id, for evaluating a strategy over many lines at once.
+    codes[id] is the index of the product's strategy in strategies, NO_OFFER, or COMBINED
+    when the product has several offers; arguments[id] is its offer's argument.
+    """
+
+    NO_OFFER = -1
+    COMBINED = -2
+
+    def __init__(self, compiled: Dict[Product, List[CompiledOffer]]):
+        size = max((product.id for product in compiled), default=-1) + 1
+        self.strategies: List[IDiscountStrategy] = []
+        self.codes = np.full(size, self.NO_OFFER, dtype=np.int64)
+        self.arguments = np.zeros(size, dtype=np.float64)
+        positions: Dict[IDiscountStrategy, int] = {}
+        for product, offers in compiled.items():
+            if len(offers) > 1:
+                self.codes[product.id] = self.COMBINED
+                continue
+            strategy = offers[0].strategy
+            if strategy not in positions:
+                positions[strategy] = len(self.strategies)
+                self.strategies.append(strategy)
+            self.codes[product.id] = positions[strategy]
+            if offers[0].offer.argument is not None:
+                self.arguments[product.id] = offers[0].offer.argument
+
+    def lookup(self, product_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the strategy codes and arguments of the given product ids."""
+        known = product_ids < len(self.codes)
+        clipped = np.where(known, product_ids, 0)
+        if not len(self.codes):
+            return np.full(len(product_ids), self.NO_OFFER, dtype=np.int64), np.zeros(len(product_ids))
+        return np.where(known, self.codes[clipped], self.NO_OFFER), self.arguments[clipped]
+
+
+class PricingPlan:
+    """
+    The teller's offers compiled into one discount rule per product.
+    A product with one offer gets that offer's rule; a product with several gets
+    a rule that splits its quantity between them for the largest total discount.
+    Bundles are matched first, and only the units they leave go to the per-product rules.
+    A plan is immutable; the teller builds a new one whenever its offers change.
+    With instrumentation, every rule is timed as a "strategy" stage per strategy type.
+    Given a base plan, the compiled offers and rules of products whose offers are the same
+    Offer objects are reused from it, so a plan that differs from its base in a few products
+    compiles only those; a base with other bundles, instrumentation or memo is ignored.
+    With a DiscountMemo, the rules of products with several offers answer repeated
+    (quantity, unit price) lines from it; a single offer is cheaper to apply than to look up.
+    """
+
+    def __init__(
+        self,
+        offers: Mapping[Product, Sequence[Offer]],
+        version: int = 0,
+        instrumentation: Optional[Instrumentation] = None,
+        bundles: Sequence[Bundle] = (),
+        base: Optional["PricingPlan"] = None,
+        memo: Optional[DiscountMemo] = None,
+    ):
+        self.version: int = version
+        self.instrumented: bool = instrumentation is not None
+        self.memo: Optional[DiscountMemo] = memo
+        self.bundle_offers: Tuple[Bundle, ...] = tuple(bundles)
+        if base is not None and (
+            base.instrumented != self.instrumented or base.memo is not memo or base.bundle_offers != self.bundle_offers
+        ):
+            base = None
+        if base is not None:
+            self.bundles: Optional[BundleMatcher] = base.bundles
+        else:
+            self.bundles = BundleMatcher(bundles) if bundles else None
+        self._offer_columns: Optional[OfferColumns] = None
+        self.compiled: Dict[Product, List[CompiledOffer]] = {}
+        self.optimizers: Dict[Product, OfferOptimizer] = {}
+        self.rules: Dict[Product, PricingRule] = {}
+        for product, product_offers in offers.items():
+            if not product_offers:
+                continue
+            if base is not None and self._reuse(base, product, product_offers):
+                continue
+            compiled = self.compiled[product] = [CompiledOffer(offer) for offer in product_offers]
+            if len(compiled) == 1:
+                rule = compiled[0].rule
+            else:
+                optimizer = self.optimizers[product] = OfferOptimizer(
+                    [(offer.strategy, offer.offer.argument) for offer in compiled]
+                )
+                rule = _combine(compiled, optimizer)
+                if memo is not None:
+                    rule = memo.memoize(rule)
+            if instrumentation is not None:
+                rule = instrumentation.wrap("strategy", self._strategy_name(product), rule)
+            self.rules[product] = rule
+
+    @classmethod
+    def from_offers(cls, offers: Mapping[Product, Union[Offer, Sequence[Offer]]]) -> "PricingPlan":
+        """Compiles a plain mapping of offers, as handle_offers used to take, with one or several offers per product."""
+        return cls({product: [offer] if isinstance(offer, Offer) else offer for product, offer in offers.items()})
+
+    def _reuse(self, base: "PricingPlan", product: Product, offers: Sequence[Offer]) -> bool:
+        """Takes product's compiled offers and rule from base if it compiled the same offers."""
+        compiled = base.compiled.get(product)
+        if compiled is None or len(compiled) != len(offers):
+            return False
+        if any(existing.offer is not offer for existing, offer in zip(compiled, offers)):
+            return False
+        self.compiled[product] = compiled
+        if product in base.optimizers:
+            self.optimizers[product] = base.optimizers[product]
+        self.rules[product] = base.rules[product]
+        return True
+
+    def offer_columns(self) -> "OfferColumns":
+        """The plan's offers as columns indexed by product id, built on first use."""
+        if self._offer_columns is None:
+            self._offer_columns = OfferColumns(self.compiled)
+        return self._offer_columns
+
+    def _strategy_name(self, product: Product) -> str:
+        compiled = self.compiled[product]
+        if len(compiled) > 1:
+            return OfferOptimizer.__name__
+        return type(compiled[0].strategy).__name__
+
+    def __contains__(self, product: Product) -> bool:
+        return product in self.rules
+
+    def __len__(self) -> int:
+        return len(self.rules)
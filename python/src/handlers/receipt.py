@@ -1,32 +1,143 @@
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Sequence, TypeVar, overload
 from src.models import ReceiptItem, Discount, Product
+from src.money import Money
 
+T = TypeVar("T")
 
 
+class SequenceView(Sequence[T]):
+    """Read-only, non-copying view of a list; it reflects later appends to the list."""
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: List[T]):
+        self._items = items
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[T]: ...
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SequenceView):
+            return self._items == other._items
+        if isinstance(other, (list, tuple)):
+            return self._items == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SequenceView({self._items!r})"
+
 
 class Receipt:
     def __init__(self):
         self._items: List[ReceiptItem] = []
         self._discounts: List[Discount] = []
+        self._items_view: SequenceView[ReceiptItem] = SequenceView(self._items)
+        self._discounts_view: SequenceView[Discount] = SequenceView(self._discounts)
+        self._total = 0
 
     def total_price(self):
-        total = 0
-        for item in self.items:
-            total += item.total_price
-        for discount in self.discounts:
-            total += discount.discount_amount
-        return total
+        """Returns the running total, summed in the order items and discounts were added."""
+        return self._total
 
     def add_product(self, product: Product, quantity: int, price: float, total_price: float):
         self._items.append(ReceiptItem(product, quantity, price, total_price))
+        self._total += total_price
+
+    def add_items(self, items: Iterable[ReceiptItem], total_price=None):
+        """Adds items; total_price, if given, is their total already summed by the caller."""
+        if total_price is not None:
+            self._items.extend(items)
+            self._total += total_price
+            return
+        items = list(items)
+        self._items.extend(items)
+        total = self._total
+        for item in items:
+            total += item.total_price
+        self._total = total
 
     def add_discount(self, discount: Discount):
         self._discounts.append(discount)
+        self._total += discount.discount_amount
+
+    @property
+    def items(self) -> SequenceView[ReceiptItem]:
+        return self._items_view
 
     @property
-    def items(self):
-        return self._items[:]
+    def discounts(self) -> SequenceView[Discount]:
+        return self._discounts_view
+
+
+class BatchLines:
+    """The line columns of a batch of carts checked out together; see BatchReceipt."""
+
+    __slots__ = ("products", "quantities", "unit_prices", "totals")
+
+    def __init__(
+        self, products: List[Product], quantities: List[float], unit_prices: List[float], totals: List[float]
+    ):
+        self.products = products
+        self.quantities = quantities
+        self.unit_prices = unit_prices
+        self.totals = totals
+
+
+class BatchReceipt(Receipt):
+    """
+    A receipt of a batch checkout, holding the rows start:stop of the batch's lines.
+    Its total is summed from the columns, in line order as Receipt.add_product sums it,
+    and the ReceiptItems are only built when the items are first read, so receipts
+    that are only totalled never build them.
+    """
+
+    def __init__(self, lines: BatchLines, start: int, stop: int):
+        super().__init__()
+        self._lines: Optional[BatchLines] = lines
+        self._start = start
+        self._stop = stop
+        self._total = sum(lines.totals[start:stop])
+
+    def add_product(self, product: Product, quantity: int, price: float, total_price: float):
+        self._build_items()
+        super().add_product(product, quantity, price, total_price)
+
+    def add_items(self, items: Iterable[ReceiptItem], total_price=None):
+        self._build_items()
+        super().add_items(items, total_price)
 
     @property
-    def discounts(self):
-        return self._discounts[:]
+    def items(self) -> SequenceView[ReceiptItem]:
+        self._build_items()
+        return self._items_view
+
+    def _build_items(self) -> None:
+        lines = self._lines
+        if lines is None:
+            return
+        rows = slice(self._start, self._stop)
+        self._items[:0] = map(
+            ReceiptItem, lines.products[rows], lines.quantities[rows], lines.unit_prices[rows], lines.totals[rows]
+        )
+        self._lines = None
+
+
+class ExactReceipt(Receipt):
+    """A receipt whose prices, totals and discounts are Money; its total is an exact sum of cents."""
+
+    def total_price(self) -> Money:
+        return Money(self._total)
@@ -0,0 +1,272 @@
+import csv
+import json
+import os
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from src.models import PRODUCTS, Product, ProductUnit
+from src.handlers.receipt import Receipt
+
+SCHEMA: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "receipts": (("total", "<f8"),),
+    "items": (("receipt", "<i8"), ("product", "<i4"), ("quantity", "<f8"), ("price", "<f8"), ("total", "<f8")),
+    "discounts": (("receipt", "<i8"), ("product", "<i4"), ("description", "<i4"), ("amount", "<f8")),
+}
+PRODUCTS_FILE = "products.csv"
+DESCRIPTIONS_FILE = "descriptions.csv"
+MANIFEST_FILE = "manifest.json"
+DICTIONARIES = {"products": PRODUCTS_FILE, "descriptions": DESCRIPTIONS_FILE}
+
+
+def column_path(directory: Path, table: str, column: str) -> Path:
+    return directory / f"{table}.{column}.bin"
+
+
+def read_manifest(directory: Path) -> Optional[Dict[str, int]]:
+    """The committed row count of every table and dictionary, or None for an export without a manifest."""
+    path = directory / MANIFEST_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def _column_rows(directory: Path, table: str) -> int:
+    """The rows of a table's shortest column, for exports written before manifests."""
+    rows = []
+    for column, dtype in SCHEMA[table]:
+        path = column_path(directory, table, column)
+        rows.append(path.stat().st_size // np.dtype(dtype).itemsize if path.exists() else 0)
+    return min(rows)
+
+
+def _money_column(values: List) -> np.ndarray:
+    """Money amounts as float64; float() turns Money cents into a price too."""
+    return np.fromiter(map(float, values), dtype=np.float64, count=len(values))
+
+
+class ReceiptExporter:
+    """
+    Appends batches of receipts to a directory of column files for analytics.
+
+    Every column is a raw little-endian array in its own file (see SCHEMA), so it can be
+    read back with numpy.frombuffer or memory-mapped, or wrapped as an Arrow buffer,
+    without parsing. Products and discount descriptions are dictionary-encoded as
+    integer ids, kept in two small CSV files next to the columns. Receipts are numbered
+    in export order, and items and discounts refer to that number.
+
+    An append writes the dictionaries and the columns, then commits them by replacing
+    a manifest of the row counts (MANIFEST_FILE). Opening an export cuts every file
+    back to the manifest, so the rows of an append that was interrupted before its
+    commit are dropped and the next append continues from the committed rows.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._rows: Dict[str, int] = self._recover()
+        self._products: List[Product] = read_products(self.directory)
+        self._export_ids = np.full(0, -1, dtype=np.int32)
+        self._descriptions: Dict[str, int] = {
+            description: export_id for export_id, description in enumerate(read_descriptions(self.directory))
+        }
+        self._receipts = self._rows["receipts"]
+
+    def _recover(self) -> Dict[str, int]:
+        """Cuts the files back to the committed rows and returns the row counts."""
+        rows = read_manifest(self.directory)
+        if rows is None:
+            rows = {table: _column_rows(self.directory, table) for table in SCHEMA}
+            rows["products"] = len(read_products(self.directory))
+            rows["descriptions"] = len(read_descriptions(self.directory))
+        for table in SCHEMA:
+            for column, dtype in SCHEMA[table]:
+                path = column_path(self.directory, table, column)
+                size = rows[table] * np.dtype(dtype).itemsize
+                if path.exists() and path.stat().st_size > size:
+                    os.truncate(path, size)
+        for dictionary, file_name in DICTIONARIES.items():
+            _truncate_csv(self.directory / file_name, rows[dictionary])
+        return rows
+
+    def append(self, receipts: Iterable[Receipt]) -> int:
+        """Appends receipts to the columns and returns how many were written."""
+        totals: List = []
+        item_receipts: List[int] = []
+        items = []
+        discount_receipts: List[int] = []
+        discounts = []
+        number = self._receipts
+        for receipt in receipts:
+            totals.append(receipt.total_price())
+            receipt_items = receipt.items
+            item_receipts.extend([number] * len(receipt_items))
+            items.extend(receipt_items)
+            receipt_discounts = receipt.discounts
+            discount_receipts.extend([number] * len(receipt_discounts))
+            discounts.extend(receipt_discounts)
+            number += 1
+
+        new_products: List[Product] = []
+        new_descriptions: List[str] = []
+        item_products = self._encode_products(list(map(attrgetter("product"), items)), new_products)
+        discount_products = self._encode_products(list(map(attrgetter("product"), discounts)), new_products)
+        discount_descriptions = self._encode(
+            self._descriptions, map(attrgetter("description"), discounts), new_descriptions
+        )
+        self._write_dictionaries(new_products, new_descriptions)
+
+        self._write("receipts", total=_money_column(totals))
+        self._write(
+            "items",
+            receipt=np.array(item_receipts, dtype=np.int64),
+            product=item_products,
+            quantity=np.fromiter(map(attrgetter("quantity"), items), dtype=np.float64, count=len(items)),
+            price=_money_column(list(map(attrgetter("price"), items))),
+            total=_money_column(list(map(attrgetter("total_price"), items))),
+        )
+        self._write(
+            "discounts",
+            receipt=np.array(discount_receipts, dtype=np.int64),
+            product=discount_products,
+            description=discount_descriptions,
+            amount=_money_column(list(map(attrgetter("discount_amount"), discounts))),
+        )
+        written = number - self._receipts
+        rows = dict(self._rows)
+        rows.update(
+            receipts=number,
+            items=rows["items"] + len(items),
+            discounts=rows["discounts"] + len(discounts),
+            products=len(self._products),
+            descriptions=len(self._descriptions),
+        )
+        self._commit(rows)
+        self._receipts = number
+        return written
+
+    def _commit(self, rows: Dict[str, int]) -> None:
+        """Makes the written rows part of the export by atomically replacing the manifest."""
+        path = self.directory / MANIFEST_FILE
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(json.dumps(rows, sort_keys=True))
+        temporary.replace(path)
+        self._rows = rows
+
+    def _encode_products(self, products: List[Product], new_products: List[Product]) -> np.ndarray:
+        """
+        Maps products to export ids through an array indexed by Product.id, so only
+        products not exported before go through Python code.
+        """
+        product_ids = np.fromiter(map(attrgetter("id"), products), dtype=np.int64, count=len(products))
+        if len(product_ids) and product_ids.max() >= len(self._export_ids):
+            self._index_products(int(product_ids.max()) + 1)
+        encoded = self._export_ids[product_ids]
+        missing = product_ids[encoded < 0]
+        if len(missing):
+            unique, first = np.unique(missing, return_index=True)
+            for product_id in unique[np.argsort(first)].tolist():
+                self._export_ids[product_id] = len(self._products)
+                product = PRODUCTS.get(product_id)
+                self._products.append(product)
+                new_products.append(product)
+            encoded = self._export_ids[product_ids]
+        return encoded
+
+    def _index_products(self, size: int) -> None:
+        """Rebuilds the Product.id to export id array with room for at least size products."""
+        size = max([size, 2 * len(self._export_ids)] + [product.id + 1 for product in self._products])
+        self._export_ids = np.full(size, -1, dtype=np.int32)
+        for export_id, product in enumerate(self._products):
+            self._export_ids[product.id] = export_id
+
+    @staticmethod
+    def _encode(ids: Dict, values: Iterable, new_values: List) -> np.ndarray:
+        """Dictionary-encodes values, assigning the next ids to values not seen before."""
+        encoded = []
+        for value in values:
+            export_id = ids.get(value)
+            if export_id is None:
+                export_id = ids[value] = len(ids)
+                new_values.append(value)
+            encoded.append(export_id)
+        return np.array(encoded, dtype=np.int32)
+
+    def _write_dictionaries(self, products: List[Product], descriptions: List[str]) -> None:
+        if products:
+            with open(self.directory / PRODUCTS_FILE, "a", newline="") as f:
+                csv.writer(f).writerows(
+                    (product.name, product.unit.name, "" if product.sku is None else product.sku)
+                    for product in products
+                )
+        if descriptions:
+            with open(self.directory / DESCRIPTIONS_FILE, "a", newline="") as f:
+                csv.writer(f).writerows((description,) for description in descriptions)
+
+    def _write(self, table: str, **columns: np.ndarray) -> None:
+        for column, dtype in SCHEMA[table]:
+            with open(column_path(self.directory, table, column), "ab") as f:
+                f.write(columns[column].astype(dtype, copy=False).tobytes())
+
+
+class ReceiptColumns:
+    """
+    Reads an export back as memory-mapped NumPy columns, e.g. columns.items["total"].
+    A table's columns are cut to the rows its manifest commits (to their common length
+    for an export without one), so a batch whose append was interrupted is ignored
+    instead of misaligning the rows.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._rows = read_manifest(self.directory)
+        self.products: List[Product] = read_products(self.directory)
+        self.descriptions: List[str] = read_descriptions(self.directory)
+        self.receipts: Dict[str, np.ndarray] = self._table("receipts")
+        self.items: Dict[str, np.ndarray] = self._table("items")
+        self.discounts: Dict[str, np.ndarray] = self._table("discounts")
+
+    def __len__(self) -> int:
+        return len(self.receipts["total"])
+
+    def _table(self, table: str) -> Dict[str, np.ndarray]:
+        columns = {column: self._map(column_path(self.directory, table, column), dtype) for column, dtype in SCHEMA[table]}
+        rows = min(len(values) for values in columns.values())
+        if self._rows is not None:
+            rows = min(rows, self._rows[table])
+        return {column: values[:rows] for column, values in columns.items()}
+
+    @staticmethod
+    def _map(path: Path, dtype: str) -> np.ndarray:
+        if not path.exists() or path.stat().st_size == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+
+
+def _truncate_csv(path: Path, rows: int) -> None:
+    """Rewrites a dictionary CSV with only its first rows rows, if it has more."""
+    if not path.exists():
+        return
+    with open(path, "r", newline="") as f:
+        kept = [row for _, row in zip(range(rows + 1), csv.reader(f))]
+    if len(kept) > rows:
+        with open(path, "w", newline="") as f:
+            csv.writer(f).writerows(kept[:rows])
+
+
+def read_products(directory: Path) -> List[Product]:
+    """The exported products, indexed by their export id."""
+    path = directory / PRODUCTS_FILE
+    if not path.exists():
+        return []
+    with open(path, "r", newline="") as f:
+        return [Product(name, ProductUnit[unit], int(sku) if sku else None) for name, unit, sku in csv.reader(f)]
+
+
+def read_descriptions(directory: Path) -> List[str]:
+    """The exported discount descriptions, indexed by their export id."""
+    path = directory / DESCRIPTIONS_FILE
+    if not path.exists():
+        return []
+    with open(path, "r", newline="") as f:
+        return [description for (description,) in csv.reader(f)]
@@ -1,23 +1,104 @@
+import io
+from time import perf_counter
+from typing import IO, Iterable, Iterator, List, Optional, Union
 from src.models import ReceiptItem, Discount
 from src.handlers.receipt import Receipt
+from src.handlers.instrumentation import NULL_INSTRUMENTATION, Instrumentation
+
+Sink = Union[IO[str], IO[bytes]]
+
+
+class _BufferedSink:
+    """Collects lines and writes them to a text or binary stream in large chunks."""
+
+    def __init__(self, stream: Sink, buffer_size: int, encoding: str):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self.binary = self._is_binary(stream)
+        self._lines: List[str] = []
+        self._size = 0
+
+    @staticmethod
+    def _is_binary(stream: Sink) -> bool:
+        if isinstance(stream, io.TextIOBase):
+            return False
+        if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)):
+            return True
+        return "b" in getattr(stream, "mode", "")
+
+    def write(self, line: str) -> None:
+        self._lines.append(line)
+        self._size += len(line)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._lines:
+            return
+        chunk = "".join(self._lines)
+        self.stream.write(chunk.encode(self.encoding) if self.binary else chunk)
+        self._lines.clear()
+        self._size = 0
+
 
 class ReceiptPrinter:
     """Generates a printable receipt."""
 
-    def __init__(self, columns: int = 40):
+    def __init__(self, columns: int = 40, instrumentation: Optional[Instrumentation] = None):
         self.columns = columns
+        self.instrumentation: Instrumentation = (
+            instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
+        )
 
     def print_receipt(self, receipt: Receipt) -> str:
         """Generates a receipt string."""
-        result = ""
+        if not self.instrumentation.enabled:
+            return "".join(self.iter_lines(receipt))
+        started = perf_counter()
+        printed = "".join(self.iter_lines(receipt))
+        self.instrumentation.observe("render", perf_counter() - started, "print")
+        return printed
+
+    def iter_lines(self, receipt: Receipt) -> Iterator[str]:
+        """Yields the receipt line by line, each ending in a newline."""
         for item in receipt.items:
-            result += self.print_receipt_item(item)
+            yield self.print_receipt_item(item)
 
         for discount in receipt.discounts:
-            result += self.print_discount(discount)
+            yield self.print_discount(discount)
+
+        yield "\n"
+        yield self.present_total(receipt)
+
+    def write_receipt(
+        self, receipt: Receipt, stream: Sink, buffer_size: int = 64 * 1024, encoding: str = "utf-8"
+    ) -> None:
+        """Streams one receipt to a text or binary file-like object."""
+        self.write_receipts([receipt], stream, buffer_size=buffer_size, encoding=encoding)
 
-        result += "\n" + self.present_total(receipt)
-        return result
+    def write_receipts(
+        self,
+        receipts: Iterable[Receipt],
+        stream: Sink,
+        separator: str = "\n",
+        buffer_size: int = 64 * 1024,
+        encoding: str = "utf-8",
+    ) -> None:
+        """
+        Streams many receipts through one buffered writer.
+        Memory use is bounded by buffer_size, however large the receipts are.
+        """
+        started = perf_counter() if self.instrumentation.enabled else 0.0
+        sink = _BufferedSink(stream, buffer_size, encoding)
+        for index, receipt in enumerate(receipts):
+            if index:
+                sink.write(separator)
+            for line in self.iter_lines(receipt):
+                sink.write(line)
+        sink.flush()
+        if self.instrumentation.enabled:
+            self.instrumentation.observe("render", perf_counter() - started, "stream")
 
     def print_receipt_item(self, item: ReceiptItem) -> str:
         """Prints a receipt item."""
@@ -46,4 +127,4 @@ class ReceiptPrinter:
     def format_line(self, name: str, value: str) -> str:
         """Formats a line with whitespace."""
         whitespace = " " * (self.columns - len(name) - len(value))
-        return f"{name}{whitespace}{value}\n"
\ No newline at end of file
+        return f"{name}{whitespace}{value}\n"
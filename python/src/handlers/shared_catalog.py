@@ -0,0 +1,223 @@
+import os
+import struct
+import sys
+import threading
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+from src.models import Product
+from src.handlers.catalog import ISupermarketCatalog
+from src.handlers.binary_catalog import CatalogImage, CatalogRow, encode_catalog, read_catalog_csv
+
+CONTROL_MAGIC = b"SRSHM002"
+CONTROL = struct.Struct("<8sqq")
+GENERATION = struct.Struct("<q")
+GENERATION_OFFSET = 8
+
+
+def segment_name(name: str, generation: int) -> str:
+    """The name of the shared memory segment holding a generation of the catalog."""
+    return f"{name}-{generation}"
+
+
+def _attach(name: str, loader_tracker: Optional[int] = None) -> shared_memory.SharedMemory:
+    """
+    Attaches an existing segment without registering it with a resource tracker, which
+    would unlink it when the tracker's processes exit; the loader owns the segments.
+    Before Python 3.13 attaching always registers, so the registration is withdrawn again,
+    unless this process shares the tracker the loader registered the segment with (the
+    loader's process and its multiprocessing children do): there, registering changed
+    nothing and withdrawing would drop the loader's registration. The loader's tracker is
+    read from the control block when loader_tracker is None.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    segment = shared_memory.SharedMemory(name)
+    if loader_tracker is None and segment.size >= CONTROL.size:
+        magic, _, tracker = CONTROL.unpack_from(segment.buf)
+        loader_tracker = tracker if magic == CONTROL_MAGIC else None
+    if loader_tracker != _tracker_id():
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _tracker_id() -> int:
+    """Identifies this process's resource tracker by its pipe, which child processes inherit."""
+    return os.fstat(resource_tracker.getfd()).st_ino
+
+
+def _read_generation(control: shared_memory.SharedMemory) -> int:
+    return GENERATION.unpack_from(control.buf, GENERATION_OFFSET)[0]
+
+
+class SharedCatalogLoader:
+    """
+    Publishes a catalog into shared memory for the SharedCatalog readers of any process.
+
+    The control block, named name, holds the number of the current generation and
+    identifies the loader's resource tracker (see _attach); each generation is a segment
+    of its own, named segment_name(name, generation), holding the catalog in the binary
+    format of encode_catalog. publish() fills a new segment, then swaps the catalog by
+    writing the new generation number, so a reader sees either the old or the new catalog,
+    never a mix, and then unlinks the old segment; readers that still map it keep it until
+    they move on. There must be one loader per name.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.generation = 0
+        self._control = shared_memory.SharedMemory(name, create=True, size=CONTROL.size)
+        CONTROL.pack_into(self._control.buf, 0, CONTROL_MAGIC, 0, _tracker_id())
+        self._segment: Optional[shared_memory.SharedMemory] = None
+
+    def publish(self, rows: Iterable[CatalogRow]) -> int:
+        """Publishes catalog rows (name, unit, price, sku or None) as the next generation and returns it."""
+        image = encode_catalog(rows)
+        generation = self.generation + 1
+        segment = shared_memory.SharedMemory(segment_name(self.name, generation), create=True, size=len(image))
+        segment.buf[:len(image)] = image
+        GENERATION.pack_into(self._control.buf, GENERATION_OFFSET, generation)
+        previous, self._segment, self.generation = self._segment, segment, generation
+        if previous is not None:
+            previous.close()
+            previous.unlink()
+        return generation
+
+    def publish_products(self, prices: Iterable[Tuple[Product, float]]) -> int:
+        """Publishes (product, price) pairs as the next generation and returns it."""
+        return self.publish((product.name, product.unit, price, product.sku) for product, price in prices)
+
+    def publish_csv(self, csv_path: Union[str, Path]) -> int:
+        """Publishes a catalog CSV (see read_catalog_csv) as the next generation and returns it."""
+        return self.publish(read_catalog_csv(csv_path))
+
+    def close(self) -> None:
+        """Unlinks the control block and the current generation; attached readers keep their mappings."""
+        for segment in (self._segment, self._control):
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+        self._segment = None
+
+    def __enter__(self) -> "SharedCatalogLoader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SharedCatalog(ISupermarketCatalog):
+    """
+    Read-only catalog attached to the shared memory of a SharedCatalogLoader.
+
+    Attaching maps the loader's segments without copying, so any number of worker
+    processes share one copy of the prices and the SKU and name indexes, and startup
+    does not depend on the catalog size. Every lookup first compares the published
+    generation with the attached one and attaches the new generation if it changed;
+    a generation number that is read while it is written, or that is already replaced,
+    names no segment, and is read again. A replaced generation stays mapped for as long
+    as a lookup on another thread still uses it, however many swaps happen meanwhile,
+    and is unmapped at the first swap or close() after it is no longer referenced.
+    """
+
+    indexed = True
+
+    def __init__(self, name: str):
+        self.name = name
+        self.generation = 0
+        self._control = _attach(name)
+        if CONTROL.unpack_from(self._control.buf)[0] != CONTROL_MAGIC:
+            self._control.close()
+            raise ValueError(f"{name} is not a shared catalog")
+        self._loader_tracker: int = CONTROL.unpack_from(self._control.buf)[2]
+        self._lock = threading.Lock()
+        self._current: Optional[Tuple[shared_memory.SharedMemory, CatalogImage]] = None
+        self._retired: List[Tuple[shared_memory.SharedMemory, "weakref.ref[CatalogImage]"]] = []
+        if _read_generation(self._control) == 0:
+            self.close()
+            raise ValueError(f"nothing has been published to {name} yet")
+        self._refresh()
+
+    def add_product(self, product: Product, price: float) -> None:
+        """Always raises TypeError: the catalog is read-only, the loader publishes changes."""
+        raise TypeError("SharedCatalog is read-only; publish a new generation with the loader instead")
+
+    def unit_price(self, product: Product) -> float:
+        return self._image().unit_price(product)
+
+    def unit_prices(self, products: Iterable[Product]) -> List[float]:
+        return self._image().unit_prices(products)
+
+    def product_by_sku(self, sku: int) -> Optional[Product]:
+        return self._image().product_by_sku(sku)
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        return self._image().product_by_name(name)
+
+    def products_with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        return self._image().products_with_prefix(prefix, limit)
+
+    def __len__(self) -> int:
+        return len(self._image())
+
+    @property
+    def mapped_generations(self) -> int:
+        """How many generations this catalog keeps mapped: the current one and those still in use."""
+        return sum(image() is not None for _, image in self._retired) + (self._current is not None)
+
+    def close(self) -> None:
+        """
+        Unmaps the attached generations and the control block. A generation another
+        thread still uses is unmapped when that thread drops it.
+        """
+        with self._lock:
+            self._retire(self._current)
+            self._current = None
+            self._sweep()
+            self._retired = []
+        self._control.close()
+
+    def _image(self) -> CatalogImage:
+        if _read_generation(self._control) != self.generation:
+            self._refresh()
+        return self._current[1]
+
+    def _refresh(self) -> None:
+        """Attaches the published generation, unless another thread already did."""
+        with self._lock:
+            while True:
+                generation = _read_generation(self._control)
+                if generation == self.generation:
+                    return
+                try:
+                    segment = _attach(segment_name(self.name, generation), self._loader_tracker)
+                    break
+                except FileNotFoundError:
+                    if _read_generation(self._control) == generation:
+                        raise
+            previous = self._current
+            self._current = (segment, CatalogImage(segment.buf, segment.name, segment))
+            self.generation = generation
+            self._retire(previous)
+            del previous
+            self._sweep()
+
+    def _retire(self, attached: Optional[Tuple[shared_memory.SharedMemory, CatalogImage]]) -> None:
+        """Keeps a replaced generation mapped, holding only a weak reference to its image."""
+        if attached is not None:
+            segment, image = attached
+            self._retired.append((segment, weakref.ref(image)))
+
+    def _sweep(self) -> None:
+        """
+        Unmaps the retired generations whose image nobody references any more. The others
+        stay retired; their image keeps the segment, which is closed when the image is collected.
+        """
+        in_use = []
+        for segment, image in self._retired:
+            if image() is None:
+                segment.close()
+            else:
+                in_use.append((segment, image))
+        self._retired = in_use
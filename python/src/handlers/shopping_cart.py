@@ -1,20 +1,91 @@
-from typing import Dict
-from src.models import Product, Offer
+import struct
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from src.models import Offer, Product, ProductUnit
 from src.handlers.receipt import Receipt
-from src.handlers.discount_calculator import IDiscountStrategyFactory
+from src.handlers.pricing_plan import PricingPlan
 from src.handlers.catalog import ISupermarketCatalog
 
 
-class ShoppingCart:
-    """Handles the management of products added to the cart."""
+def apply_bundles(
+    receipt: Receipt, plan: PricingPlan, quantities: Mapping[Product, float], unit_prices: Mapping[Product, float]
+) -> Mapping[Product, float]:
+    """Adds the discounts of the bundles matched in quantities and returns the quantities they leave."""
+    matches = plan.bundles.match(quantities, unit_prices)
+    if not matches:
+        return quantities
+    remaining = dict(quantities)
+    for match in matches:
+        receipt.add_discount(match.discount())
+        for product, units in match.units.items():
+            remaining[product] -= units
+    return remaining
 
-    def __init__(self):
-        self._product_quantities: Dict[Product, float] = {}
+
+class IShoppingCart(ABC):
+    """Abstract base class for shopping carts the teller can check out."""
+
+    __slots__ = ()
+
+    @abstractmethod
+    def add_item_quantity(self, product: Product, quantity: float) -> None:
+        pass
+
+    @abstractmethod
+    def product_quantities(self) -> Mapping[Product, float]:
+        """Returns the quantity per product, in the order products were first added."""
+        pass
+
+    def lines(self) -> Tuple[List[Product], List[float]]:
+        """Returns the products and their quantities as parallel lists, in cart order."""
+        quantities = self.product_quantities()
+        return list(quantities), list(quantities.values())
 
     def add_item(self, product: Product) -> None:
         """Adds a single unit of a product to the cart."""
         self.add_item_quantity(product, 1.0)
 
+    def handle_offers(
+        self,
+        receipt: Receipt,
+        plan: Union[PricingPlan, Mapping[Product, Union[Offer, Sequence[Offer]]]],
+        catalog: Optional[ISupermarketCatalog],
+        unit_prices: Optional[Mapping[Product, float]] = None,
+        quantities: Optional[Mapping[Product, float]] = None,
+    ) -> None:
+        """
+        Applies the plan's bundles, then its discount rules to the units left in the cart.
+        Prices already looked up for the receipt can be passed as unit_prices
+        to avoid asking the catalog again; the catalog is then not needed.
+        Likewise, the product_quantities() the caller already read can be passed as quantities.
+        A plain mapping of offers per product is still accepted and compiled into a plan first.
+        """
+        if not isinstance(plan, PricingPlan):
+            plan = PricingPlan.from_offers(plan)
+        if quantities is None:
+            quantities = self.product_quantities()
+        if plan.bundles is not None:
+            if unit_prices is None:
+                unit_prices = dict(zip(quantities, catalog.unit_prices(quantities)))
+            quantities = apply_bundles(receipt, plan, quantities, unit_prices)
+        rules = plan.rules
+        for product, quantity in quantities.items():
+            rule = rules.get(product)
+            if rule is not None:
+                unit_price = unit_prices[product] if unit_prices is not None else catalog.unit_price(product)
+                for discount in rule(quantity, unit_price):
+                    receipt.add_discount(discount)
+
+
+class ShoppingCart(IShoppingCart):
+    """Handles the management of products added to the cart."""
+
+    def __init__(self):
+        self._product_quantities: Dict[Product, float] = {}
+
     def add_item_quantity(self, product: Product, quantity: float) -> None:
         """Adds a specified quantity of a product to the cart."""
         if product in self._product_quantities:
@@ -22,15 +93,125 @@ class ShoppingCart:
         else:
             self._product_quantities[product] = quantity
 
-    def handle_offers(
-        self, receipt: Receipt, offers: Dict[Product, Offer], catalog: ISupermarketCatalog
-    ) -> None:
-        """Applies applicable offers to the products in the cart."""
-        for product, quantity in self._product_quantities.items():
-            if product in offers:
-                offer = offers[product]
-                unit_price = catalog.unit_price(product)
-                strategy = IDiscountStrategyFactory.get_strategy(offer.offer_type)
-                discount = strategy.calculate(product, quantity, offer, unit_price)
-                if discount:
-                    receipt.add_discount(discount)
\ No newline at end of file
+    def product_quantities(self) -> Mapping[Product, float]:
+        return self._product_quantities
+
+
+class ArrayShoppingCart(IShoppingCart):
+    """
+    Compact cart stored as a column of quantities parallel to the list of its products,
+    which also keeps their ids registered.
+    Voided lines keep their slot with a zero quantity, so voiding stays O(1) and a
+    product scanned again keeps its original position. A product's slot is found by
+    bisecting a sorted column of the cart's ids, so the cart holds no per-line objects.
+    """
+
+    __slots__ = ("_products", "_quantities", "_sorted_ids", "_sorted_slots")
+
+    _HEADER = struct.Struct("<4sI")
+    _NAME = struct.Struct("<BH")
+    _MAGIC = b"SRC2"
+
+    def __init__(self):
+        self._products: List[Product] = []
+        self._quantities: array = array("d")
+        self._sorted_ids: array = array("i")
+        self._sorted_slots: array = array("i")
+
+    def add_item_quantity(self, product: Product, quantity: float) -> None:
+        """Adds a specified quantity of a product to the cart."""
+        self._add(product, quantity)
+
+    def _slot(self, product_id: int) -> Optional[int]:
+        position = bisect_left(self._sorted_ids, product_id)
+        if position < len(self._sorted_ids) and self._sorted_ids[position] == product_id:
+            return self._sorted_slots[position]
+        return None
+
+    def _add(self, product: Product, quantity: float) -> None:
+        product_id = product.id
+        position = bisect_left(self._sorted_ids, product_id)
+        if position < len(self._sorted_ids) and self._sorted_ids[position] == product_id:
+            self._quantities[self._sorted_slots[position]] += quantity
+            return
+        self._sorted_ids.insert(position, product_id)
+        self._sorted_slots.insert(position, len(self._products))
+        self._products.append(product)
+        self._quantities.append(quantity)
+
+    def void_item(self, product: Product, quantity: Optional[float] = None) -> None:
+        """Removes a quantity of a product, or the whole line when quantity is None."""
+        slot = self._slot(product.id)
+        if slot is None or self._quantities[slot] == 0:
+            raise KeyError(f"{product.name!r} is not in the cart")
+        if quantity is None or quantity >= self._quantities[slot]:
+            self._quantities[slot] = 0.0
+        else:
+            self._quantities[slot] -= quantity
+
+    def quantity_of(self, product: Product) -> float:
+        """Returns the quantity of a product in the cart."""
+        slot = self._slot(product.id)
+        return self._quantities[slot] if slot is not None else 0.0
+
+    def product_quantities(self) -> Mapping[Product, float]:
+        return dict(zip(*self.lines()))
+
+    def lines(self) -> Tuple[List[Product], List[float]]:
+        """Reads the products and quantities straight from the columns, skipping voided lines."""
+        products, quantities = self._products, self._quantities
+        if 0.0 in quantities:
+            live = [slot for slot, quantity in enumerate(quantities) if quantity != 0]
+            return [products[slot] for slot in live], [quantities[slot] for slot in live]
+        return list(products), quantities.tolist()
+
+    def merge(self, other: IShoppingCart) -> None:
+        """Adds every line of another cart to this one."""
+        if isinstance(other, ArrayShoppingCart):
+            for product, quantity in zip(other._products, other._quantities):
+                if quantity != 0:
+                    self._add(product, quantity)
+        else:
+            for product, quantity in other.product_quantities().items():
+                self.add_item_quantity(product, quantity)
+
+    def __len__(self) -> int:
+        return len(self._quantities) - self._quantities.count(0.0)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the live lines as a header, a float64 quantity column and, per line,
+        the product's unit and UTF-8 name. Products are written by name rather than by
+        this process's PRODUCTS ids, so any process can read the cart back.
+        """
+        products, line_quantities = self.lines()
+        quantities = array("d", line_quantities)
+        if sys.byteorder == "big":
+            quantities.byteswap()
+        names = bytearray()
+        for product in products:
+            name = product.name.encode("utf-8")
+            names += self._NAME.pack(product.unit.value, len(name))
+            names += name
+        return self._HEADER.pack(self._MAGIC, len(products)) + quantities.tobytes() + bytes(names)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ArrayShoppingCart":
+        """Restores a cart written by to_bytes; its products are interned by name in this process."""
+        magic, count = cls._HEADER.unpack_from(data)
+        if magic != cls._MAGIC:
+            raise ValueError("not a serialized ArrayShoppingCart")
+        offset = cls._HEADER.size
+        quantities = array("d")
+        quantities.frombytes(data[offset:offset + 8 * count])
+        if sys.byteorder == "big":
+            quantities.byteswap()
+        offset += 8 * count
+        cart = cls()
+        for quantity in quantities:
+            unit, length = cls._NAME.unpack_from(data, offset)
+            offset += cls._NAME.size
+            name = bytes(data[offset:offset + length]).decode("utf-8")
+            offset += length
+            cart.add_item_quantity(Product(name, ProductUnit(unit)), quantity)
+        return cart
@@ -0,0 +1,138 @@
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.models import Product, ProductUnit
+from src.handlers.catalog import ISupermarketCatalog
+
+
+class SqliteConnectionPool:
+    """A fixed-size pool of SQLite connections, opened lazily and shared between threads."""
+
+    def __init__(self, database: str, size: int = 4, uri: bool = False):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self.database = database
+        self.size = size
+        self.uri = uri
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._opened: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.database, uri=self.uri, check_same_thread=False, cached_statements=256
+        )
+        self._opened.append(connection)
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a connection, blocking while all of them are in use."""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                connection = self._open() if len(self._opened) < self.size else None
+            if connection is None:
+                connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        """Closes every connection the pool has opened."""
+        with self._lock:
+            for connection in self._opened:
+                connection.close()
+            self._opened.clear()
+            self._idle = queue.LifoQueue(maxsize=self.size)
+
+
+class SqliteCatalog(ISupermarketCatalog):
+    """
+    Persistent catalog stored in SQLite, keyed by product name.
+    Bulk lookups are sent as IN (...) queries padded to a few fixed batch sizes,
+    so sqlite3's statement cache keeps every query shape prepared.
+    """
+
+    BATCH_SIZES: Tuple[int, ...] = (1, 8, 64, 500)
+    indexed = True
+
+    def __init__(self, database: str, pool_size: int = 4, uri: bool = False):
+        self.pool = SqliteConnectionPool(database, pool_size, uri)
+        with self.pool.connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS products ("
+                "name TEXT PRIMARY KEY, unit INTEGER NOT NULL, price REAL NOT NULL, sku INTEGER UNIQUE)"
+            )
+            connection.commit()
+
+    @classmethod
+    def in_memory(cls, pool_size: int = 4) -> "SqliteCatalog":
+        """Creates a catalog in a private in-memory database shared by the pool's connections."""
+        return cls(f"file:catalog-{uuid.uuid4().hex}?mode=memory&cache=shared", pool_size, uri=True)
+
+    def add_product(self, product: Product, price: float) -> None:
+        self.add_products([(product, price)])
+
+    def add_products(self, products: Iterable[Tuple[Product, float]]) -> None:
+        """Inserts or updates many products in a single transaction."""
+        rows = ((product.name, product.unit.value, price, product.sku) for product, price in products)
+        with self.pool.connection() as connection:
+            connection.executemany(
+                "INSERT INTO products (name, unit, price, sku) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET unit = excluded.unit, price = excluded.price, "
+                "sku = coalesce(excluded.sku, sku)",
+                rows,
+            )
+            connection.commit()
+
+    def unit_price(self, product: Product) -> float:
+        with self.pool.connection() as connection:
+            row = connection.execute("SELECT price FROM products WHERE name = ?", (product.name,)).fetchone()
+        return row[0] if row is not None else 0.0
+
+    def unit_prices(self, products: Iterable[Product]) -> List[float]:
+        products = list(products)
+        names = list(dict.fromkeys(product.name for product in products))
+        prices: Dict[str, float] = {}
+        largest = self.BATCH_SIZES[-1]
+        with self.pool.connection() as connection:
+            for start in range(0, len(names), largest):
+                batch = names[start:start + largest]
+                size = next(size for size in self.BATCH_SIZES if size >= len(batch))
+                parameters = batch + [batch[0]] * (size - len(batch))
+                placeholders = ", ".join("?" * size)
+                prices.update(
+                    connection.execute(
+                        f"SELECT name, price FROM products WHERE name IN ({placeholders})", parameters
+                    )
+                )
+        return [prices.get(product.name, 0.0) for product in products]
+
+    def product_by_sku(self, sku: int) -> Optional[Product]:
+        rows = self._products("WHERE sku = ?", (sku,))
+        return rows[0] if rows else None
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        rows = self._products("WHERE name = ?", (name,))
+        return rows[0] if rows else None
+
+    def products_with_prefix(self, prefix: str, limit: int = 20) -> List[Product]:
+        """Range-scans the primary key index; case-sensitive like the other catalogs."""
+        if not prefix:
+            return self._products("ORDER BY name LIMIT ?", (limit,))
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return self._products("WHERE name >= ? AND name < ? ORDER BY name LIMIT ?", (prefix, upper, limit))
+
+    def _products(self, condition: str, parameters: Tuple) -> List[Product]:
+        with self.pool.connection() as connection:
+            rows = connection.execute(f"SELECT name, unit, sku FROM products {condition}", parameters).fetchall()
+        return [Product(name, ProductUnit(unit), sku) for name, unit, sku in rows]
+
+    def close(self) -> None:
+        self.pool.close()
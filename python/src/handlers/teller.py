@@ -1,31 +1,301 @@
-from typing import Dict, Optional
-from src.models import Offer, Product
-from src.handlers.receipt import Receipt
+import threading
+from contextlib import contextmanager
+from operator import attrgetter
+from time import perf_counter, time
+from typing import Iterator, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from src.models import Bundle, Discount, Offer, Product
+from src.handlers.receipt import BatchLines, BatchReceipt, Receipt
 from src.handlers.catalog import ISupermarketCatalog
-from src.handlers.shopping_cart import ShoppingCart
-from src.enums import SpecialOfferType
+from src.handlers.shopping_cart import IShoppingCart, apply_bundles
+from src.handlers.checkout_session import CheckoutSession
+from src.handlers.discount_calculator import DiscountMemo, OfferKind
+from src.handlers.pricing_plan import PricingPlan
+from src.handlers.offer_schedule import ActiveOffers, OfferSchedule
+from src.handlers.offer_snapshot import OfferSnapshot, OfferUpdate
+from src.handlers.instrumentation import NULL_INSTRUMENTATION, Instrumentation
 
 
-class Teller:
-    """Handles the checkout process."""
+class BaseTeller:
+    """
+    Holds the special offers and their compiled pricing plan, shared by the tellers.
 
-    def __init__(self, catalog: ISupermarketCatalog):
-        self.catalog = catalog
-        self.offers: Dict[Product, Offer] = {}
+    The offers are published as immutable OfferSnapshots. Writers copy the current
+    snapshot, change the copy and swap it in under a writer lock; checkouts read the
+    snapshot reference without any lock and price the whole cart from it, so lanes on
+    many threads never see a half-applied change and never wait for each other.
+    Compiled plans are cached per snapshot version and also published by reference.
+
+    Offers with a validity window are kept in the snapshot's OfferSchedule; the plan
+    for a checkout time adds the scheduled offers active then, and is reused until
+    the next start or end of a scheduled offer.
+
+    With a DiscountMemo, the plans' rules answer repeated lines from it; see DiscountMemo.
+    """
+
+    def __init__(self, instrumentation: Optional[Instrumentation] = None, discount_memo: Optional[DiscountMemo] = None):
+        self.instrumentation: Instrumentation = (
+            instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
+        )
+        self.discount_memo = discount_memo
+        self._snapshot = OfferSnapshot()
+        self._write_lock = threading.RLock()
+        self._open_update: Optional[OfferUpdate] = None
+        self._pricing_plan: PricingPlan = self._compile_plan(self._snapshot)
+        self._scheduled: Optional[Tuple[ActiveOffers, PricingPlan]] = None
+
+    @property
+    def offers_snapshot(self) -> OfferSnapshot:
+        """The current offers; the snapshot never changes, later changes publish a new one."""
+        return self._snapshot
+
+    @property
+    def offers(self) -> Mapping[Product, Tuple[Offer, ...]]:
+        """The current permanent offers per product, read-only."""
+        return self._snapshot.offers
+
+    @property
+    def schedule(self) -> OfferSchedule:
+        """The current scheduled offers."""
+        return self._snapshot.schedule
+
+    @property
+    def bundles(self) -> Tuple[Bundle, ...]:
+        """The current bundle offers."""
+        return self._snapshot.bundles
+
+    @contextmanager
+    def update_offers(self) -> Iterator[OfferUpdate]:
+        """
+        Collects offer changes and publishes them as one new snapshot when the block ends;
+        if the block raises, nothing is published. Updates from several threads are
+        serialized, checkouts keep running on the previous snapshot meanwhile.
+        A block opened inside another on the same thread (including the teller's own
+        add_special_offer and friends) joins the open update, which the outer block publishes.
+        """
+        with self._write_lock:
+            if self._open_update is not None:
+                yield self._open_update
+                return
+            update = self._open_update = OfferUpdate(self._snapshot)
+            try:
+                yield update
+            finally:
+                self._open_update = None
+            self._snapshot = update.snapshot()
 
     def add_special_offer(
-        self, offer_type: SpecialOfferType, product: Product, argument: Optional[float] = None
+        self,
+        offer_type: OfferKind,
+        product: Product,
+        argument: Optional[float] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        replace: bool = False,
     ) -> None:
-        """Adds a special offer to the teller."""
-        self.offers[product] = Offer(offer_type, product, argument)
+        """
+        Adds a special offer to the teller; a product's offers are combined for the best discount.
+        With start or end (POSIX timestamps), the offer only applies to checkouts in that window.
+        Adding an offer the product already has changes nothing; with replace, the offer
+        replaces all of the product's offers, as a second call did before offers combined.
+        Each call publishes a snapshot; add many offers in one update_offers() block.
+        """
+        with self.update_offers() as update:
+            update.add_special_offer(offer_type, product, argument, start, end, replace)
+
+    def remove_offers(self, product: Product) -> None:
+        """Removes every permanent and scheduled offer on a product."""
+        with self.update_offers() as update:
+            update.remove_offers(product)
+
+    def add_bundle_offer(self, bundle: Bundle) -> None:
+        """Adds a bundle offer; bundles are applied before the per-product offers."""
+        with self.update_offers() as update:
+            update.add_bundle_offer(bundle)
+
+    @property
+    def pricing_plan(self) -> PricingPlan:
+        """The compiled offers valid now, rebuilt only after the offers have changed."""
+        return self.plan_at()
+
+    def plan_at(self, at: Optional[float] = None) -> PricingPlan:
+        """
+        The compiled offers valid at time at (default: now). Without scheduled offers the
+        time is not even read; with them, a plan is compiled once per window between
+        schedule boundaries. Concurrent callers may compile the same plan twice, but
+        each gets a plan of the one snapshot it read.
+        """
+        snapshot = self._snapshot
+        plan = self._pricing_plan
+        if plan.version != snapshot.version or plan.instrumented != self.instrumentation.enabled:
+            plan = self._pricing_plan = self._compile_plan(snapshot, base=plan)
+        if not snapshot.schedule:
+            return plan
+        if at is None:
+            at = time()
+        scheduled = self._scheduled
+        if (
+            scheduled is None
+            or scheduled[1].version != plan.version
+            or scheduled[1].instrumented != plan.instrumented
+            or not scheduled[0].covers(at)
+        ):
+            active = snapshot.schedule.active(at)
+            offers = dict(snapshot.offers)
+            for offer in active.offers:
+                offers[offer.product] = offers.get(offer.product, ()) + (offer,)
+            base = scheduled[1] if scheduled is not None and scheduled[1].version == plan.version else plan
+            scheduled = self._scheduled = (active, self._compile_plan(snapshot, offers, base))
+        return scheduled[1]
 
-    def checks_out_articles_from(self, the_cart: ShoppingCart) -> Receipt:
-        """Processes a shopping cart and generates a receipt."""
+    def _compile_plan(
+        self,
+        snapshot: OfferSnapshot,
+        offers: Optional[Mapping[Product, Sequence[Offer]]] = None,
+        base: Optional[PricingPlan] = None,
+    ) -> PricingPlan:
+        instrumentation = self.instrumentation if self.instrumentation.enabled else None
+        return PricingPlan(
+            snapshot.offers if offers is None else offers,
+            snapshot.version,
+            instrumentation,
+            snapshot.bundles,
+            base,
+            self.discount_memo,
+        )
+
+    def _observe_catalog_lookup(self, started: float, products: int) -> float:
+        """Records a bulk catalog lookup that began at started and returns the time it ended."""
+        looked_up = perf_counter()
+        catalog_name = type(self.catalog).__name__
+        self.instrumentation.observe("catalog_lookup", looked_up - started, catalog_name)
+        self.instrumentation.catalog_products.inc(products, catalog=catalog_name)
+        return looked_up
+
+
+class Teller(BaseTeller):
+    """Handles the checkout process."""
+
+    def __init__(
+        self,
+        catalog: ISupermarketCatalog,
+        instrumentation: Optional[Instrumentation] = None,
+        discount_memo: Optional[DiscountMemo] = None,
+    ):
+        self.catalog = catalog
+        super().__init__(instrumentation, discount_memo)
+
+    def open_session(self) -> CheckoutSession:
+        """Starts a checkout whose running total is updated on every scan."""
+        return CheckoutSession(self)
+
+    def checks_out_articles_from(self, the_cart: IShoppingCart, at: Optional[float] = None) -> Receipt:
+        """Processes a shopping cart and generates a receipt, with the offers valid at time at (default: now)."""
+        instrumentation = self.instrumentation
+        enabled = instrumentation.enabled
+        started = perf_counter() if enabled else 0.0
         receipt: Receipt = Receipt()
-        for product, quantity in the_cart._product_quantities.items():
-            unit_price = self.catalog.unit_price(product)
+        product_quantities = the_cart.product_quantities()
+        unit_prices = dict(zip(product_quantities, self.catalog.unit_prices(product_quantities)))
+        if enabled:
+            looked_up = self._observe_catalog_lookup(started, len(product_quantities))
+
+        for product, quantity in product_quantities.items():
+            unit_price = unit_prices[product]
             total_price = quantity * unit_price
             receipt.add_product(product, quantity, unit_price, total_price)
+        if enabled:
+            built = perf_counter()
+            instrumentation.observe("receipt_build", built - looked_up)
+
+        the_cart.handle_offers(receipt, self.plan_at(at), self.catalog, unit_prices, product_quantities)
+        if enabled:
+            instrumentation.observe("offers", perf_counter() - built)
+            instrumentation.receipts.inc()
+            instrumentation.receipt_lines.inc(len(product_quantities))
+        return receipt
+
+    def checks_out_many(self, carts: Sequence[IShoppingCart], at: Optional[float] = None) -> List[Receipt]:
+        """
+        Processes many shopping carts in one columnar pass, with the offers valid at time at.
+        Every cart line becomes a row of (product, quantity, unit price); line totals and
+        the discounts of single-offer products are evaluated per column with NumPy, and
+        the receipts are BatchReceipts over those columns, which build their items only
+        when read. The receipts equal calling checks_out_articles_from per cart.
+        """
+        line_counts: List[int] = []
+        line_products: List[Product] = []
+        line_quantities: List[float] = []
+        for cart in carts:
+            cart_products, cart_quantities = cart.lines()
+            line_counts.append(len(cart_products))
+            line_products.extend(cart_products)
+            line_quantities.extend(cart_quantities)
+
+        enabled = self.instrumentation.enabled
+        started = perf_counter() if enabled else 0.0
+        price_list = self.catalog.unit_prices(line_products)
+        if enabled:
+            looked_up = self._observe_catalog_lookup(started, len(line_products))
+        quantities = np.array(line_quantities, dtype=np.float64)
+        unit_prices = np.array(price_list, dtype=np.float64)
+        totals = quantities * unit_prices
+        plan = self.plan_at(at)
+        batch_lines = BatchLines(line_products, line_quantities, price_list, totals.tolist())
+        offsets = np.cumsum(line_counts).tolist()
+        receipts: List[Receipt] = [
+            BatchReceipt(batch_lines, start, stop) for start, stop in zip([0] + offsets[:-1], offsets)
+        ]
+
+        if plan.bundles is not None:
+            line_quantities = self._apply_bundles_many(plan, receipts, offsets, line_products, line_quantities, price_list)
+            quantities = np.array(line_quantities, dtype=np.float64)
+        columns = plan.offer_columns()
+        product_ids = np.fromiter(map(attrgetter("id"), line_products), dtype=np.int64, count=len(line_products))
+        codes, arguments = columns.lookup(product_ids)
+        discount_amounts = np.zeros(len(line_products), dtype=np.float64)
+        for code, strategy in enumerate(columns.strategies):
+            rows = np.flatnonzero(codes == code)
+            if len(rows):
+                discount_amounts[rows] = strategy.discount_amount(quantities[rows], unit_prices[rows], arguments[rows])
+
+        combined_rows = codes == columns.COMBINED
+        discounted_rows = np.flatnonzero((discount_amounts > 0) | combined_rows)
+        receipt_indexes = np.searchsorted(offsets, discounted_rows, side="right").tolist()
+        compiled_offers = plan.compiled
+        for row, receipt_index, amount, combined in zip(
+            discounted_rows.tolist(),
+            receipt_indexes,
+            discount_amounts[discounted_rows].tolist(),
+            combined_rows[discounted_rows].tolist(),
+        ):
+            product = line_products[row]
+            if combined:
+                for discount in plan.rules[product](line_quantities[row], price_list[row]):
+                    receipts[receipt_index].add_discount(discount)
+            else:
+                receipts[receipt_index].add_discount(Discount(product, compiled_offers[product][0].description, -amount))
+        if enabled:
+            self.instrumentation.observe("receipt_build", perf_counter() - looked_up, "batch")
+            self.instrumentation.receipts.inc(len(receipts))
+            self.instrumentation.receipt_lines.inc(len(line_products))
+        return receipts
 
-        the_cart.handle_offers(receipt, self.offers, self.catalog)
-        return receipt
\ No newline at end of file
+    @staticmethod
+    def _apply_bundles_many(
+        plan: PricingPlan,
+        receipts: List[Receipt],
+        offsets: List[int],
+        line_products: List[Product],
+        line_quantities: List[float],
+        line_prices: List[float],
+    ) -> List[float]:
+        """Applies the bundles cart by cart and returns the line quantities they leave for the other offers."""
+        remaining: List[float] = []
+        start = 0
+        for receipt, stop in zip(receipts, offsets):
+            quantities = dict(zip(line_products[start:stop], line_quantities[start:stop]))
+            unit_prices = dict(zip(line_products[start:stop], line_prices[start:stop]))
+            remaining.extend(apply_bundles(receipt, plan, quantities, unit_prices).values())
+            start = stop
+        return remaining
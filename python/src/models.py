@@ -1,25 +1,203 @@
-from typing import Optional
+import heapq
+import threading
+import weakref
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
 from src.enums import ProductUnit, SpecialOfferType
 
+if TYPE_CHECKING:
+    from src.handlers.discount_calculator import OfferKind
+
 class Product:
-    def __init__(self, name: str, unit: ProductUnit):
-        self.name: str = name
-        self.unit: ProductUnit = unit
+    """
+    A product, interned by name in the PRODUCTS registry.
+    Constructing a product whose name is already registered returns the registered
+    instance, so equal products are the same object and the same dict key. Every
+    product gets a dense integer id usable as an array index. The registry does not
+    keep products alive; see ProductRegistry.
+    """
+
+    __slots__ = ("name", "unit", "sku", "id", "__weakref__")
+
+    name: str
+    unit: ProductUnit
+    sku: Optional[int]
+    id: int
+
+    def __new__(cls, name: str, unit: ProductUnit, sku: Optional[int] = None) -> "Product":
+        return PRODUCTS.intern(name, unit, sku)
+
+    def __reduce__(self):
+        return Product, (self.name, self.unit, self.sku)
+
+    def __repr__(self) -> str:
+        return f"Product({self.name!r}, {self.unit}, sku={self.sku}, id={self.id})"
+
+
+class ProductRegistry:
+    """
+    Interns products by name and SKU and numbers them densely from 0.
+    The registry only holds weak references: once nothing references a product, its
+    name and SKU are free to be registered again, with any unit, and its id is reused
+    by the next new product. Whatever indexes data by Product.id must therefore keep
+    its products referenced, as carts, pricing plans and receipt exporters do.
+    """
+
+    def __init__(self):
+        self._products: List[Optional["weakref.ref[Product]"]] = []
+        self._free_ids: List[int] = []
+        self._by_name: "weakref.WeakValueDictionary[str, Product]" = weakref.WeakValueDictionary()
+        self._by_sku: "weakref.WeakValueDictionary[int, Product]" = weakref.WeakValueDictionary()
+        # Reentrant, since a product can be collected, and released, while the lock is held.
+        self._lock = threading.RLock()
+
+    def intern(self, name: str, unit: ProductUnit, sku: Optional[int] = None) -> Product:
+        """Returns the product registered under name, registering it first if needed."""
+        product = self._by_name.get(name)
+        if product is not None and product.unit == unit and (sku is None or product.sku == sku):
+            return product
+        with self._lock:
+            product = self._by_name.get(name)
+            if product is None:
+                return self._register(name, unit, sku)
+            if product.unit != unit:
+                raise ValueError(f"product {name!r} is already registered with unit {product.unit}")
+            if sku is not None and product.sku is None:
+                self._assign_sku(product, sku)
+            elif sku is not None and product.sku != sku:
+                raise ValueError(f"product {name!r} is already registered with SKU {product.sku}")
+            return product
+
+    def _register(self, name: str, unit: ProductUnit, sku: Optional[int]) -> Product:
+        product = object.__new__(Product)
+        product.name = name
+        product.unit = unit
+        product.sku = None
+        if sku is not None:
+            self._assign_sku(product, sku)
+        product.id = heapq.heappop(self._free_ids) if self._free_ids else len(self._products)
+        reference = weakref.ref(product, partial(self._release, product.id))
+        if product.id == len(self._products):
+            self._products.append(reference)
+        else:
+            self._products[product.id] = reference
+        self._by_name[name] = product
+        return product
+
+    def _release(self, product_id: int, reference: "weakref.ref[Product]") -> None:
+        """Frees the id of a collected product; the weak dictionaries drop their own entries."""
+        with self._lock:
+            if self._products[product_id] is reference:
+                self._products[product_id] = None
+                heapq.heappush(self._free_ids, product_id)
+
+    def _assign_sku(self, product: Product, sku: int) -> None:
+        owner = self._by_sku.get(sku)
+        if owner is not None and owner is not product:
+            raise ValueError(f"SKU {sku} is already registered for product {owner.name!r}")
+        product.sku = sku
+        self._by_sku[sku] = product
+
+    def get(self, product_id: int) -> Product:
+        """Returns the product with the given dense id; raises KeyError if there is none."""
+        reference = self._products[product_id] if 0 <= product_id < len(self._products) else None
+        product = reference() if reference is not None else None
+        if product is None:
+            raise KeyError(f"no product has id {product_id}")
+        return product
+
+    def find(self, name: str) -> Optional[Product]:
+        """Returns the product registered under name, if any."""
+        return self._by_name.get(name)
+
+    def find_sku(self, sku: int) -> Optional[Product]:
+        """Returns the product registered under sku, if any."""
+        return self._by_sku.get(sku)
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __iter__(self) -> Iterator[Product]:
+        """The registered products in id order."""
+        products = (reference() for reference in list(self._products) if reference is not None)
+        return iter([product for product in products if product is not None])
+
+
+PRODUCTS = ProductRegistry()
 
 
 class ProductQuantity:
+    __slots__ = ("product", "quantity")
+
     def __init__(self, product: Product, quantity: int):
         self.product: Product = product
         self.quantity: int = quantity
 
 class Offer:
-    def __init__(self, offer_type: SpecialOfferType, product: Product, argument: Optional[float] = None):
-        self.offer_type: SpecialOfferType = offer_type
+    """
+    A special offer on a product. An offer with a start or an end is only valid from
+    start (inclusive) until end (exclusive), both POSIX timestamps as from time.time().
+    The offer type is a SpecialOfferType or a compiled offer rule (see src.handlers.offer_rules).
+    """
+
+    __slots__ = ("offer_type", "product", "argument", "start", "end")
+
+    def __init__(
+        self,
+        offer_type: "OfferKind",
+        product: Product,
+        argument: Optional[float] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ):
+        if start is not None and end is not None and end <= start:
+            raise ValueError("an offer must end after it starts")
+        self.offer_type: "OfferKind" = offer_type
         self.product: Product = product
         self.argument: Optional[float] = argument
+        self.start: Optional[float] = start
+        self.end: Optional[float] = end
+
+    @property
+    def scheduled(self) -> bool:
+        """Whether the offer has a validity window."""
+        return self.start is not None or self.end is not None
+
+
+class Bundle:
+    """
+    A set price for products bought together. Without size, the bundle is the listed
+    products (list a product twice to require two units); with size, it is any size
+    units from the listed products, e.g. "any 3 cheeses for 10".
+    """
+
+    __slots__ = ("products", "price", "size", "quantities", "description")
+
+    def __init__(
+        self, products: Sequence[Product], price: float, size: Optional[int] = None, description: Optional[str] = None
+    ):
+        if not products or (size is not None and size < 1):
+            raise ValueError("a bundle needs products and a positive size")
+        self.products: Tuple[Product, ...] = tuple(dict.fromkeys(products))
+        self.price: float = price
+        self.size: Optional[int] = size
+        self.quantities: Dict[Product, int] = {}
+        if size is None:
+            for product in products:
+                self.quantities[product] = self.quantities.get(product, 0) + 1
+        self.description: str = description if description is not None else self._describe()
+
+    def _describe(self) -> str:
+        if self.size is not None:
+            return f"any {self.size} for {self.price}"
+        return " + ".join(
+            product.name if count == 1 else f"{count} x {product.name}" for product, count in self.quantities.items()
+        ) + f" for {self.price}"
 
 
 class Discount:
+    __slots__ = ("product", "description", "discount_amount")
+
     def __init__(self, product: Product, description: str, discount_amount: float):
         self.product: Product = product
         self.description: str = description
@@ -27,8 +205,10 @@ class Discount:
 
 
 class ReceiptItem:
+    __slots__ = ("product", "quantity", "price", "total_price")
+
     def __init__(self, product: Product, quantity: int, price: float, total_price: float):
         self.product: Product = product
         self.quantity: int = quantity
         self.price: float = price
-        self.total_price: float = total_price
\ No newline at end of file
+        self.total_price: float = total_price
@@ -0,0 +1,91 @@
+from typing import Union
+import numpy as np
+
+CENTS = 100
+QUANTITY_SCALE = 1000
+BASIS_POINTS = 10_000
+
+Integral = Union[int, np.ndarray]
+
+_ALIGNMENTS = ("<", ">", "^")
+
+
+class Money(int):
+    """
+    An exact amount of money in integer minor units (cents).
+    Money is an int, so sums and products run at integer speed and return plain
+    integer cents; wrap a result in Money again to print it as a price.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_float(cls, amount: float) -> "Money":
+        """The nearest cent to a float price such as a catalog's 1.99."""
+        return cls(to_cents(amount))
+
+    @classmethod
+    def parse(cls, text: str) -> "Money":
+        """Parses a decimal string with at most two decimals, e.g. "-12.5", exactly."""
+        sign = -1 if text.startswith("-") else 1
+        whole, _, fraction = text.lstrip("+-").partition(".")
+        if len(fraction) > 2 or not (whole or fraction):
+            raise ValueError(f"not a price with at most two decimals: {text!r}")
+        return cls(sign * (int(whole or "0") * CENTS + int(fraction.ljust(2, "0"))))
+
+    def __format__(self, format_spec: str) -> str:
+        """
+        Formats as a price; a fixed-point spec such as ".2f" keeps exactly two decimals.
+        Like a number, it is right-aligned in a width unless the spec aligns it.
+        """
+        if format_spec.endswith("f"):
+            format_spec = format_spec[:-1].partition(".")[0]
+        if format_spec and format_spec[:1] not in _ALIGNMENTS and format_spec[1:2] not in _ALIGNMENTS:
+            format_spec = ">" + format_spec
+        return format(str(self), format_spec)
+
+    def __str__(self) -> str:
+        sign = "-" if self < 0 else ""
+        whole, cents = divmod(abs(int(self)), CENTS)
+        return f"{sign}{whole}.{cents:02d}"
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+    def __float__(self) -> float:
+        return int(self) / CENTS
+
+
+def _fixed(value: Union[float, np.ndarray], scale: int) -> Integral:
+    """Rounds value * scale to the nearest integer (half to even), for scalars and columns."""
+    if isinstance(value, np.ndarray):
+        return np.rint(value * scale).astype(np.int64)
+    return round(value * scale)
+
+
+def to_cents(amount: Union[float, np.ndarray]) -> Integral:
+    """Converts a float price, meant to have at most two decimals, to integer cents."""
+    return _fixed(amount, CENTS)
+
+
+def to_quantity(quantity: Union[float, np.ndarray]) -> Integral:
+    """Converts a quantity to fixed-point thousandths: grams for KILO products, milli-units for EACH."""
+    return _fixed(quantity, QUANTITY_SCALE)
+
+
+def round_half_up(numerator: Integral, denominator: int) -> Integral:
+    """Divides non-negative integers, rounding halves up; accepts NumPy integer columns."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def line_total(quantity: Integral, unit_price: Integral) -> Integral:
+    """The cents of a fixed-point quantity at a unit price in cents, rounded half up to the cent."""
+    return round_half_up(quantity * unit_price, QUANTITY_SCALE)
+
+
+def percentage_of(amount: Integral, percent: Union[float, np.ndarray]) -> Integral:
+    """
+    A percentage of an amount in cents, rounded half up to the cent. The percentage is
+    first fixed to basis points (hundredths of a percent), so 12.5% and 33.33% are exact.
+    """
+    return round_half_up(amount * _fixed(percent, CENTS), BASIS_POINTS)
@@ -0,0 +1,81 @@
+import gc
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+import pytest
+
+
+class BenchmarkRecorder:
+    """Times benchmarks and compares them with, or saves them to, a baseline JSON file."""
+
+    def __init__(self, baseline_path: Path, threshold: float, save: bool):
+        self.baseline_path = baseline_path
+        self.threshold = threshold
+        self.save = save
+        self.baseline: Dict[str, float] = {}
+        if baseline_path.exists():
+            self.baseline = json.loads(baseline_path.read_text())
+        self.results: Dict[str, float] = {}
+
+    def measure(self, name: str, func: Callable[[], object], rounds: int = 5, min_time: float = 0.05) -> float:
+        """
+        Records the best time per call of func and fails on a regression.
+        Fast functions are looped so each of the rounds lasts at least min_time;
+        like timeit, the garbage collector is paused while timing.
+        """
+        start = time.perf_counter()
+        func()
+        loops = max(1, int(min_time / max(time.perf_counter() - start, 1e-9)))
+        timings: List[float] = []
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for _ in range(loops):
+                    func()
+                timings.append((time.perf_counter() - start) / loops)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        best = min(timings)
+        self.results[name] = best
+
+        expected = self.baseline.get(name)
+        if not self.save and expected is not None and best > expected * (1 + self.threshold):
+            pytest.fail(
+                f"{name} took {best:.6f}s, more than {self.threshold:.0%} slower than the baseline {expected:.6f}s"
+            )
+        return best
+
+    def write(self) -> None:
+        """Merges the results into the baseline file."""
+        merged = {**self.baseline, **self.results}
+        self.baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        self.baseline_path.write_text(json.dumps(merged, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder(request) -> BenchmarkRecorder:
+    """Fixture for the session-wide benchmark recorder."""
+    config = request.config
+    baseline_path = Path(config.getoption("--benchmark-baseline"))
+    if not baseline_path.is_absolute():
+        baseline_path = config.rootpath / baseline_path
+    recorder = BenchmarkRecorder(
+        baseline_path, config.getoption("--benchmark-threshold"), config.getoption("--benchmark-save")
+    )
+    yield recorder
+    if recorder.save and recorder.results:
+        recorder.write()
+
+
+@pytest.fixture
+def bench(request, benchmark_recorder: BenchmarkRecorder) -> Callable[..., float]:
+    """Fixture that times a callable under the current test's name."""
+
+    def measure(func: Callable[[], object], rounds: int = 5) -> float:
+        return benchmark_recorder.measure(request.node.name, func, rounds)
+
+    return measure
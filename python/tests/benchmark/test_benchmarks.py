@@ -0,0 +1,204 @@
+import io
+import random
+import time
+import uuid
+from functools import lru_cache
+from typing import Callable, List, Tuple
+import numpy as np
+import pytest
+from src.models import Bundle, Product, ProductUnit, SpecialOfferType
+from src.handlers.catalog import InMemoryCatalog
+from src.handlers.bundle_matcher import BundleMatcher
+from src.handlers.discount_calculator import DiscountMemo, IDiscountStrategyFactory
+from src.handlers.exact_teller import ExactTeller
+from src.handlers.receipt_export import ReceiptExporter
+from src.handlers.receipt_printer import ReceiptPrinter
+from src.handlers.shared_catalog import SharedCatalog, SharedCatalogLoader
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+pytestmark = pytest.mark.benchmark
+
+OFFER_ARGUMENTS = {
+    SpecialOfferType.THREE_FOR_TWO: None,
+    SpecialOfferType.PERCENT_DISCOUNT: 10.0,
+    SpecialOfferType.TWO_FOR_AMOUNT: 0.99,
+    SpecialOfferType.FIVE_FOR_AMOUNT: 7.49,
+}
+
+
+@lru_cache(maxsize=None)
+def build_catalog(size: int) -> Tuple[InMemoryCatalog, List[Product]]:
+    """Builds, once per size, a catalog of size products with reproducible prices."""
+    rng = random.Random(size)
+    catalog = InMemoryCatalog()
+    products = [Product(f"benchmark product {i}", ProductUnit.EACH) for i in range(size)]
+    for product in products:
+        catalog.add_product(product, round(rng.uniform(0.1, 20.0), 2))
+    return catalog, products
+
+
+def build_teller(size: int) -> Teller:
+    """A teller with an offer on every third product of the catalog."""
+    catalog, products = build_catalog(size)
+    teller = Teller(catalog)
+    offer_types = list(OFFER_ARGUMENTS)
+    with teller.update_offers() as update:
+        for index, product in enumerate(products[::3]):
+            offer_type = offer_types[index % len(offer_types)]
+            update.add_special_offer(offer_type, product, OFFER_ARGUMENTS[offer_type])
+    return teller
+
+
+def build_cart(products: List[Product], lines: int) -> ShoppingCart:
+    rng = random.Random(lines)
+    cart = ShoppingCart()
+    for product in rng.sample(products, lines) if lines <= len(products) else rng.choices(products, k=lines):
+        cart.add_item_quantity(product, rng.randint(1, 12))
+    return cart
+
+
+class TestCheckoutBenchmarks:
+    """Checkout throughput for carts of growing size."""
+
+    @pytest.mark.parametrize("lines", [10, 100, 1_000, 10_000, 100_000])
+    def test_checks_out_articles_from(self, bench: Callable[..., float], lines: int):
+        teller = build_teller(100_000)
+        cart = build_cart(build_catalog(100_000)[1], lines)
+
+        bench(lambda: teller.checks_out_articles_from(cart))
+
+    @pytest.mark.parametrize("lines", [10, 1_000, 10_000])
+    def test_exact_checks_out_articles_from(self, bench: Callable[..., float], lines: int):
+        teller = build_teller(100_000)
+        exact_teller = ExactTeller(teller.catalog)
+        with exact_teller.update_offers() as update:
+            for product, offers in teller.offers.items():
+                for offer in offers:
+                    update.add_special_offer(offer.offer_type, product, offer.argument)
+        cart = build_cart(build_catalog(100_000)[1], lines)
+
+        bench(lambda: exact_teller.checks_out_articles_from(cart))
+
+    def test_checks_out_with_scheduled_offers(self, bench: Callable[..., float]):
+        teller = build_teller(100_000)
+        products = build_catalog(100_000)[1]
+        now = time.time()
+        with teller.update_offers() as update:
+            for index, product in enumerate(products[1:30_000:3]):
+                start = now + (index % 100 - 50) * 3600.0
+                update.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, product, 5.0, start=start, end=start + 86400.0)
+        cart = build_cart(products, 100)
+
+        bench(lambda: teller.checks_out_articles_from(cart))
+
+    @pytest.mark.parametrize("memo", [False, True])
+    def test_checks_out_with_discount_memo(self, bench: Callable[..., float], memo: bool):
+        catalog, products = build_catalog(100_000)
+        teller = Teller(catalog, discount_memo=DiscountMemo() if memo else None)
+        offer_types = list(OFFER_ARGUMENTS)
+        with teller.update_offers() as update:
+            for index, product in enumerate(products[::3]):
+                for offer_type in (offer_types[index % 4], offer_types[(index + 1) % 4]):
+                    update.add_special_offer(offer_type, product, OFFER_ARGUMENTS[offer_type])
+        cart = build_cart(products, 1_000)
+
+        bench(lambda: teller.checks_out_articles_from(cart))
+
+    @pytest.mark.parametrize("carts", [100, 1_000])
+    def test_checks_out_many(self, bench: Callable[..., float], carts: int):
+        teller = build_teller(100_000)
+        products = build_catalog(100_000)[1]
+        batch = [build_cart(products[index * 30:], 30) for index in range(carts)]
+
+        bench(lambda: teller.checks_out_many(batch))
+
+
+class TestBundleBenchmarks:
+    """Bundle matching of a 200-line basket against 10k active bundles."""
+
+    def test_match(self, bench: Callable[..., float]):
+        catalog, products = build_catalog(100_000)
+        rng = random.Random(10_000)
+        bundles = [
+            Bundle(rng.sample(products[:20_000], 2), 1.0) if index % 2 else Bundle(rng.sample(products[:20_000], 5), 3.0, 3)
+            for index in range(10_000)
+        ]
+        matcher = BundleMatcher(bundles)
+        quantities = build_cart(products[:20_000], 200).product_quantities()
+        unit_prices = dict(zip(quantities, catalog.unit_prices(quantities)))
+
+        bench(lambda: matcher.match(quantities, unit_prices))
+
+
+class TestCatalogBenchmarks:
+    """Price lookups of a 1000-line basket against catalogs of growing size."""
+
+    @pytest.mark.parametrize("size", [1_000, 10_000, 100_000, 2_000_000])
+    def test_unit_prices(self, bench: Callable[..., float], size: int):
+        catalog, products = build_catalog(size)
+        basket = random.Random(0).sample(products, 1_000)
+
+        bench(lambda: catalog.unit_prices(basket))
+
+    def test_shared_unit_prices(self, bench: Callable[..., float]):
+        catalog, products = build_catalog(100_000)
+        basket = random.Random(0).sample(products, 1_000)
+        with SharedCatalogLoader(f"srcat-bench-{uuid.uuid4().hex[:8]}") as loader:
+            loader.publish_products(catalog.products.items())
+            shared = SharedCatalog(loader.name)
+            try:
+                bench(lambda: shared.unit_prices(basket))
+            finally:
+                shared.close()
+
+
+class TestDiscountStrategyBenchmarks:
+    """Each discount strategy over 10k product lines, one by one and as columns."""
+
+    @pytest.mark.parametrize("offer_type", list(OFFER_ARGUMENTS), ids=lambda offer_type: offer_type.name)
+    def test_discount_amount(self, bench: Callable[..., float], offer_type: SpecialOfferType):
+        strategy = IDiscountStrategyFactory.get_strategy(offer_type)
+        argument = OFFER_ARGUMENTS[offer_type]
+        rng = random.Random(1)
+        lines = [(rng.randint(1, 20), round(rng.uniform(0.1, 20.0), 2)) for _ in range(10_000)]
+
+        bench(lambda: [strategy.discount_amount(quantity, price, argument) for quantity, price in lines])
+
+    @pytest.mark.parametrize("offer_type", list(OFFER_ARGUMENTS), ids=lambda offer_type: offer_type.name)
+    def test_discount_amount_columns(self, bench: Callable[..., float], offer_type: SpecialOfferType):
+        strategy = IDiscountStrategyFactory.get_strategy(offer_type)
+        rng = np.random.default_rng(1)
+        quantities = rng.integers(1, 20, 1_000_000).astype(np.float64)
+        unit_prices = rng.uniform(0.1, 20.0, 1_000_000).round(2)
+        arguments = np.full(1_000_000, OFFER_ARGUMENTS[offer_type] or np.nan)
+
+        bench(lambda: strategy.discount_amount(quantities, unit_prices, arguments))
+
+
+class TestReceiptPrinterBenchmarks:
+    """Receipt rendering throughput."""
+
+    @pytest.mark.parametrize("lines", [100, 10_000])
+    def test_print_receipt(self, bench: Callable[..., float], lines: int):
+        teller = build_teller(100_000)
+        receipt = teller.checks_out_articles_from(build_cart(build_catalog(100_000)[1], lines))
+        printer = ReceiptPrinter()
+
+        bench(lambda: printer.print_receipt(receipt))
+
+    def test_write_receipts(self, bench: Callable[..., float]):
+        teller = build_teller(100_000)
+        products = build_catalog(100_000)[1]
+        receipts = teller.checks_out_many([build_cart(products[index * 20:], 20) for index in range(1_000)])
+        printer = ReceiptPrinter()
+
+        bench(lambda: printer.write_receipts(receipts, io.StringIO()))
+
+    def test_export_receipts(self, bench: Callable[..., float], tmp_path):
+        teller = build_teller(100_000)
+        products = build_catalog(100_000)[1]
+        receipts = teller.checks_out_many([build_cart(products[index * 20:], 20) for index in range(1_000)])
+        exporter = ReceiptExporter(tmp_path)
+
+        bench(lambda: exporter.append(receipts))
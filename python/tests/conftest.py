@@ -5,6 +5,39 @@ from src.handlers.shopping_cart import ShoppingCart
 from src.handlers.catalog import CatalogFactory, ISupermarketCatalog
 
 
+def pytest_addoption(parser):
+    """Options for the benchmark suite in tests/benchmark."""
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark", action="store_true", help="run the benchmark suite")
+    group.addoption(
+        "--benchmark-baseline",
+        default="tests/benchmark/baseline.json",
+        help="baseline JSON the results are compared with",
+    )
+    group.addoption(
+        "--benchmark-save", action="store_true", help="write the results to the baseline instead of comparing"
+    )
+    group.addoption(
+        "--benchmark-threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown against the baseline, as a fraction (default 0.2)",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: performance benchmark, only run with --benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture
 def catalog() -> ISupermarketCatalog:
     """Fixture for an in-memory catalog."""
@@ -44,4 +77,4 @@ def products(catalog: ISupermarketCatalog) -> dict:
 @pytest.fixture
 def cart() -> ShoppingCart:
     """Fixture for a shopping cart."""
-    return ShoppingCart()
\ No newline at end of file
+    return ShoppingCart()
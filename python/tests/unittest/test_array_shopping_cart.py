@@ -0,0 +1,99 @@
+import pytest
+from typing import Dict
+from src.models import Product, SpecialOfferType
+from src.handlers.shopping_cart import ArrayShoppingCart, ShoppingCart
+from src.handlers.teller import Teller
+
+
+@pytest.fixture
+def array_cart() -> ArrayShoppingCart:
+    """Fixture for an array-backed shopping cart."""
+    return ArrayShoppingCart()
+
+
+class TestArrayShoppingCart:
+    """Tests for the array-backed shopping cart."""
+
+    def test_checkout_matches_dict_cart(
+        self, teller: Teller, products: Dict[str, Product], cart: ShoppingCart, array_cart: ArrayShoppingCart
+    ):
+        """Both cart implementations produce the same receipt."""
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], None)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["apples"], 20.0)
+        for name, quantity in (("toothbrush", 3.0), ("apples", 1.5), ("rice", 1.0), ("toothbrush", 1.0)):
+            cart.add_item_quantity(products[name], quantity)
+            array_cart.add_item_quantity(products[name], quantity)
+
+        expected = teller.checks_out_articles_from(cart)
+        receipt = teller.checks_out_articles_from(array_cart)
+        batch = teller.checks_out_many([array_cart, cart])
+
+        for actual in (receipt, batch[0], batch[1]):
+            assert [(i.product, i.quantity, i.total_price) for i in actual.items] == [
+                (i.product, i.quantity, i.total_price) for i in expected.items
+            ]
+            assert [(d.product, d.discount_amount) for d in actual.discounts] == [
+                (d.product, d.discount_amount) for d in expected.discounts
+            ]
+            assert actual.total_price() == expected.total_price()
+
+    def test_void_item(self, products: Dict[str, Product], array_cart: ArrayShoppingCart):
+        """Voiding removes part of a line or the whole line."""
+        rice, apples = products["rice"], products["apples"]
+        array_cart.add_item_quantity(rice, 3)
+        array_cart.add_item(apples)
+
+        array_cart.void_item(rice, 1)
+        assert array_cart.quantity_of(rice) == 2
+        array_cart.void_item(rice)
+        assert list(array_cart.product_quantities()) == [apples]
+        assert len(array_cart) == 1
+        with pytest.raises(KeyError):
+            array_cart.void_item(rice)
+
+        array_cart.add_item(rice)
+        assert list(array_cart.product_quantities()) == [rice, apples]
+
+    def test_merge_carts(self, products: Dict[str, Product], cart: ShoppingCart, array_cart: ArrayShoppingCart):
+        """Merging adds the quantities of other carts of either kind."""
+        other = ArrayShoppingCart()
+        array_cart.add_item_quantity(products["rice"], 1)
+        other.add_item_quantity(products["rice"], 2)
+        other.add_item_quantity(products["apples"], 0.5)
+        cart.add_item_quantity(products["toothbrush"], 4)
+
+        array_cart.merge(other)
+        array_cart.merge(cart)
+
+        assert array_cart.product_quantities() == {
+            products["rice"]: 3,
+            products["apples"]: 0.5,
+            products["toothbrush"]: 4,
+        }
+
+    def test_serialization_round_trip(self, products: Dict[str, Product], array_cart: ArrayShoppingCart):
+        """A serialized cart restores its live lines in order, naming its products instead of using local ids."""
+        array_cart.add_item_quantity(products["apples"], 1.25)
+        array_cart.add_item_quantity(products["rice"], 2)
+        array_cart.add_item(products["toothpaste"])
+        array_cart.void_item(products["rice"])
+
+        data = array_cart.to_bytes()
+        restored = ArrayShoppingCart.from_bytes(data)
+
+        assert len(data) == 8 + 2 * (8 + 3) + len("apples") + len("toothpaste")
+        assert b"apples" in data and b"toothpaste" in data
+        assert restored.product_quantities() == array_cart.product_quantities()
+        assert list(restored.product_quantities()) == [products["apples"], products["toothpaste"]]
+        with pytest.raises(ValueError):
+            ArrayShoppingCart.from_bytes(b"nope" + data[4:])
+
+    def test_lines_skip_voided_slots(self, products: Dict[str, Product], array_cart: ArrayShoppingCart):
+        """The cart's lines come straight from its columns, without the voided ones."""
+        for name in ("tomatoes", "rice", "apples", "toothbrush"):
+            array_cart.add_item_quantity(products[name], 2)
+        array_cart.void_item(products["rice"])
+
+        assert array_cart.lines() == ([products["tomatoes"], products["apples"], products["toothbrush"]], [2, 2, 2])
+        assert array_cart.quantity_of(products["toothbrush"]) == 2
+        assert array_cart.quantity_of(products["toothpaste"]) == 0
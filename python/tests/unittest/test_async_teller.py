@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from src.enums import SpecialOfferType
+from src.handlers.async_catalog import FakeAsyncCatalog, ThreadedCatalog
+from src.handlers.async_teller import AsyncTeller
+from src.handlers.instrumentation import Instrumentation
+from src.handlers.shopping_cart import ShoppingCart
+
+
+@pytest.fixture
+def async_catalog(catalog, products) -> FakeAsyncCatalog:
+    """Fixture for a fake remote catalog holding the common products."""
+    remote = FakeAsyncCatalog(latency=0.01)
+    for product, price in catalog.products.items():
+        remote.add_product(product, price)
+    return remote
+
+
+def fill_cart(products) -> ShoppingCart:
+    cart = ShoppingCart()
+    for product in products.values():
+        cart.add_item_quantity(product, 3.0)
+    return cart
+
+
+class TestAsyncTeller:
+    """Tests for checking out against an async catalog."""
+
+    def test_receipt_matches_blocking_teller(self, teller, products, async_catalog):
+        """The async teller prices carts and applies offers exactly like the blocking one."""
+        async_teller = AsyncTeller(async_catalog)
+        for offers in (teller, async_teller):
+            offers.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+            offers.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["apples"], 20.0)
+
+        expected = teller.checks_out_articles_from(fill_cart(products))
+        receipt = asyncio.run(async_teller.checks_out_articles_from(fill_cart(products)))
+
+        assert receipt.total_price() == expected.total_price()
+        assert [(d.product, d.discount_amount) for d in receipt.discounts] == [
+            (d.product, d.discount_amount) for d in expected.discounts
+        ]
+
+    def test_checkout_stages_are_timed(self, products, async_catalog):
+        """The async teller observes the same checkout stages as the blocking one."""
+        instrumentation = Instrumentation()
+        observed = []
+        instrumentation.add_hook(lambda stage, detail, seconds: observed.append((stage, detail)))
+        async_teller = AsyncTeller(async_catalog, instrumentation=instrumentation)
+
+        asyncio.run(async_teller.checks_out_articles_from(fill_cart(products)))
+
+        assert [stage for stage, _ in observed] == ["catalog_lookup", "receipt_build", "offers"]
+        assert instrumentation.receipts.value() == 1
+
+    def test_fetches_prices_concurrently_within_the_limit(self, products, async_catalog):
+        """Lookups overlap, but never more than max_concurrency at once."""
+        async_teller = AsyncTeller(async_catalog, max_concurrency=2)
+
+        asyncio.run(async_teller.checks_out_many([fill_cart(products) for _ in range(4)]))
+
+        assert async_catalog.calls == 20
+        assert async_catalog.max_in_flight == 2
+
+    def test_batches_lookups(self, products, async_catalog):
+        """With a batch size, one catalog call prices several products."""
+        async_teller = AsyncTeller(async_catalog, batch_size=2)
+
+        receipt = asyncio.run(async_teller.checks_out_articles_from(fill_cart(products)))
+
+        assert async_catalog.calls == 3
+        assert [item.price for item in receipt.items] == [0.99, 1.99, 2.49, 1.79, 0.69]
+
+    def test_slow_lookup_times_out(self, products, async_catalog):
+        """A lookup slower than the timeout fails the checkout and cancels the others."""
+        slow = products["rice"]
+        async_catalog.latency = lambda product: 1.0 if product is slow else 0.0
+        async_teller = AsyncTeller(async_catalog, timeout=0.05)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(async_teller.checks_out_articles_from(fill_cart(products)))
+        assert async_catalog.in_flight == 0
+
+    def test_threaded_catalog_serves_a_blocking_catalog(self, catalog, products):
+        """A blocking catalog can back the async teller through an executor."""
+        async_teller = AsyncTeller(ThreadedCatalog(catalog), batch_size=8)
+
+        receipt = asyncio.run(async_teller.checks_out_articles_from(fill_cart(products)))
+
+        assert receipt.total_price() == pytest.approx(3.0 * (0.99 + 1.99 + 2.49 + 1.79 + 0.69))
+
+    def test_rejects_invalid_limits(self, async_catalog):
+        """The concurrency limit and the batch size must be positive."""
+        with pytest.raises(ValueError):
+            AsyncTeller(async_catalog, max_concurrency=0)
@@ -0,0 +1,76 @@
+from typing import Dict, List
+from src.models import Product, ProductUnit, SpecialOfferType
+from src.handlers.receipt import Receipt
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+def receipt_rows(receipt: Receipt) -> tuple:
+    """Flattens a receipt into comparable tuples."""
+    items = [(i.product, i.quantity, i.price, i.total_price) for i in receipt.items]
+    discounts = [(d.product, d.description, d.discount_amount) for d in receipt.discounts]
+    return items, discounts, receipt.total_price()
+
+
+class TestBatchCheckout:
+    """Tests for validating the columnar batch checkout against the scalar path."""
+
+    def make_carts(self, products: Dict[str, Product]) -> List[ShoppingCart]:
+        quantities = [
+            {"toothbrush": 3, "apples": 2.5, "toothpaste": 11},
+            {"tomatoes": 5, "rice": 1},
+            {},
+            {"toothbrush": 2, "tomatoes": 1, "toothpaste": 4, "apples": 0.75},
+            {"rice": 7, "toothbrush": 9, "toothpaste": 5, "tomatoes": 4},
+        ]
+        carts = []
+        for lines in quantities:
+            cart = ShoppingCart()
+            for name, quantity in lines.items():
+                cart.add_item_quantity(products[name], quantity)
+            carts.append(cart)
+        return carts
+
+    def test_batch_matches_scalar_path(self, teller: Teller, products: Dict[str, Product]):
+        """Every offer type priced in batch must give exactly the scalar receipts."""
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], None)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["apples"], 20.0)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0)
+        teller.add_special_offer(SpecialOfferType.FIVE_FOR_AMOUNT, products["toothpaste"], 7.49)
+        teller.add_special_offer(SpecialOfferType.TWO_FOR_AMOUNT, products["tomatoes"], 0.99)
+        carts = self.make_carts(products)
+
+        batch = teller.checks_out_many(carts)
+
+        assert len(batch) == len(carts)
+        for cart, receipt in zip(carts, batch):
+            assert receipt_rows(receipt) == receipt_rows(teller.checks_out_articles_from(cart))
+
+    def test_batch_without_offers(self, teller: Teller, products: Dict[str, Product]):
+        """Carts without offers, including unknown products, produce no discounts."""
+        carts = self.make_carts(products)
+        unknown = Product("unknown", ProductUnit.EACH)
+        carts[2].add_item_quantity(unknown, 2)
+
+        batch = teller.checks_out_many(carts)
+
+        for cart, receipt in zip(carts, batch):
+            assert receipt.discounts == []
+            assert receipt_rows(receipt) == receipt_rows(teller.checks_out_articles_from(cart))
+
+    def test_batch_receipts_build_items_when_read(self, teller: Teller, products: Dict[str, Product]):
+        """A batch receipt is totalled without its items, and builds them in line order when read."""
+        carts = self.make_carts(products)
+        receipt = teller.checks_out_many(carts)[0]
+        expected = teller.checks_out_articles_from(carts[0])
+
+        assert receipt.total_price() == expected.total_price()
+        assert receipt._items == []
+
+        receipt.add_product(products["rice"], 1, 2.49, 2.49)
+        expected.add_product(products["rice"], 1, 2.49, 2.49)
+        assert receipt_rows(receipt) == receipt_rows(expected)
+
+    def test_batch_of_no_carts(self, teller: Teller):
+        """An empty batch returns no receipts."""
+        assert teller.checks_out_many([]) == []
@@ -0,0 +1,109 @@
+import pytest
+from src.models import Product, ProductUnit
+from src.handlers.binary_catalog import MappedCatalog, compile_catalog
+
+CSV = """name,unit,price,sku
+mapped rice,EACH,2.49,5420003
+mapped apples,KILO,1.99,5420001
+mapped cherry tomatoes,EACH,0.69,5420002
+mapped cheddar,EACH,3.5,
+"""
+
+
+@pytest.fixture
+def mapped_catalog(tmp_path):
+    """Fixture for a catalog compiled from CSV and memory-mapped."""
+    source = tmp_path / "catalog.csv"
+    source.write_text(CSV)
+    compile_catalog(source, tmp_path / "catalog.bin")
+    catalog = MappedCatalog(tmp_path / "catalog.bin")
+    yield catalog
+    catalog.close()
+
+
+class TestMappedCatalog:
+    """Tests for the compiled, memory-mapped catalog."""
+
+    def test_prices_by_sku_and_name(self, mapped_catalog):
+        """Products with a SKU are found by SKU, the others by name."""
+        assert len(mapped_catalog) == 4
+        assert mapped_catalog.unit_price(Product("mapped apples", ProductUnit.KILO, sku=5420001)) == 1.99
+        assert mapped_catalog.unit_price(Product("mapped cheddar", ProductUnit.EACH)) == 3.5
+        assert mapped_catalog.unit_price(Product("mapped unknown", ProductUnit.EACH)) == 0.0
+
+    def test_bulk_prices_match_single_lookups(self, mapped_catalog):
+        """unit_prices returns the same prices as unit_price, in order."""
+        products = [
+            Product("mapped rice", ProductUnit.EACH, sku=5420003),
+            Product("mapped cheddar", ProductUnit.EACH),
+            Product("mapped absent", ProductUnit.EACH, sku=9),
+            Product("mapped cherry tomatoes", ProductUnit.EACH, sku=5420002),
+        ]
+
+        assert mapped_catalog.unit_prices(products) == [mapped_catalog.unit_price(p) for p in products]
+        assert mapped_catalog.unit_prices(products) == [2.49, 3.5, 0.0, 0.69]
+
+    def test_index_lookups(self, mapped_catalog):
+        """Lookups return interned products, with prefixes in name order."""
+        assert mapped_catalog.product_by_sku(5420001) is Product("mapped apples", ProductUnit.KILO)
+        assert mapped_catalog.product_by_name("mapped cheddar").sku is None
+        assert mapped_catalog.product_by_name("mapped") is None
+        assert [p.name for p in mapped_catalog.products_with_prefix("mapped ch")] == [
+            "mapped cheddar", "mapped cherry tomatoes",
+        ]
+
+    def test_added_products_overlay_the_file(self, mapped_catalog):
+        """Added products are priced and found in this process, before the file's products."""
+        rice = Product("mapped rice", ProductUnit.EACH, sku=5420003)
+        new = Product("mapped chives", ProductUnit.EACH, sku=5420009)
+        size = mapped_catalog.path.stat().st_size
+
+        mapped_catalog.add_product(rice, 2.29)
+        mapped_catalog.add_product(new, 0.89)
+
+        assert mapped_catalog.unit_prices([rice, new, Product("mapped cheddar", ProductUnit.EACH)]) == [2.29, 0.89, 3.5]
+        assert mapped_catalog.unit_price(new) == 0.89
+        assert mapped_catalog.product_by_sku(5420009) is new
+        assert [p.name for p in mapped_catalog.products_with_prefix("mapped ch")] == [
+            "mapped cheddar", "mapped cherry tomatoes", "mapped chives",
+        ]
+        assert len(mapped_catalog) == 5
+        assert mapped_catalog.path.stat().st_size == size
+
+    def test_unknown_sku_falls_back_to_name(self, tmp_path):
+        """A product whose SKU is not in the file is priced by its name."""
+        source = tmp_path / "catalog.csv"
+        source.write_text("name,unit,price,sku\nmapped relabelled,EACH,1.25,\nmapped labelled,EACH,2.5,5420100\n")
+        compile_catalog(source, tmp_path / "catalog.bin")
+        relabelled = Product("mapped relabelled", ProductUnit.EACH, sku=5420199)
+        labelled = Product("mapped labelled", ProductUnit.EACH, sku=5420100)
+        catalog = MappedCatalog(tmp_path / "catalog.bin")
+        try:
+            assert catalog.unit_price(relabelled) == 1.25
+            assert catalog.unit_prices([relabelled, labelled]) == [1.25, 2.5]
+        finally:
+            catalog.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        """Opening a file that was not compiled by compile_catalog fails."""
+        path = tmp_path / "not-a-catalog.bin"
+        path.write_bytes(b"\0" * 64)
+
+        with pytest.raises(ValueError):
+            MappedCatalog(path)
+
+    def test_rejects_duplicate_skus(self, tmp_path):
+        """Two products sharing a SKU cannot be compiled."""
+        source = tmp_path / "catalog.csv"
+        source.write_text("name,unit,price,sku\nmapped a,EACH,1,7\nmapped b,EACH,2,7\n")
+
+        with pytest.raises(ValueError):
+            compile_catalog(source, tmp_path / "catalog.bin")
+
+    def test_rejects_duplicate_names(self, tmp_path):
+        """Two products sharing a name cannot be compiled, whatever their SKUs."""
+        source = tmp_path / "catalog.csv"
+        source.write_text("name,unit,price,sku\nmapped a,EACH,1,7\nmapped a,KILO,2,8\n")
+
+        with pytest.raises(ValueError, match="mapped a"):
+            compile_catalog(source, tmp_path / "catalog.bin")
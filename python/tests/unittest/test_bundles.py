@@ -0,0 +1,147 @@
+import pytest
+from typing import Dict
+from src.models import Bundle, Product, ProductUnit, SpecialOfferType
+from src.handlers.bundle_matcher import BundleIndex, BundleMatcher
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+def fill_cart(quantities: Dict[Product, float]) -> ShoppingCart:
+    cart = ShoppingCart()
+    for product, quantity in quantities.items():
+        cart.add_item_quantity(product, quantity)
+    return cart
+
+
+class TestBundleMatcher:
+    """Tests for matching cart quantities to bundles."""
+
+    def test_index_only_returns_bundles_touching_the_cart(self, products: Dict[str, Product]):
+        """Fixed bundles are found through their first product, group bundles through any member."""
+        fixed = Bundle([products["toothbrush"], products["toothpaste"]], 2.5)
+        group = Bundle([products["rice"], products["apples"]], 3.0, size=2)
+        index = BundleIndex([fixed, group])
+
+        assert index.candidates([products["toothbrush"]]) == [fixed]
+        assert index.candidates([products["toothpaste"]]) == []
+        assert index.candidates([products["apples"], products["rice"]]) == [group]
+        assert len(index) == 2
+
+    def test_exact_search_beats_greedy(self):
+        """Branch and bound finds the combination a greedy choice misses."""
+        a, b, c, d = (Product(f"bundle item {name}", ProductUnit.EACH) for name in "abcd")
+        quantities = {a: 1, b: 1, c: 1, d: 1}
+        prices = dict.fromkeys(quantities, 1.0)
+        bundles = [Bundle([a, b], 0.9), Bundle([a, c], 1.2), Bundle([b, d], 1.2)]
+
+        exact = BundleMatcher(bundles).match(quantities, prices)
+        greedy = BundleMatcher(bundles, exact_limit=0).match(quantities, prices)
+
+        assert sum(match.discount_amount for match in exact) == pytest.approx(1.6)
+        assert [match.bundle for match in exact] == bundles[1:]
+        assert sum(match.discount_amount for match in greedy) == pytest.approx(1.1)
+
+    def test_group_takes_most_expensive_units(self, products: Dict[str, Product]):
+        """Any-N bundles are filled with the most expensive units of the group."""
+        rice, toothpaste, tomatoes = products["rice"], products["toothpaste"], products["tomatoes"]
+        bundle = Bundle([rice, toothpaste, tomatoes], 4.0, size=3)
+
+        (match,) = BundleMatcher([bundle]).match(
+            {rice: 2, toothpaste: 2, tomatoes: 1}, {rice: 2.49, toothpaste: 1.79, tomatoes: 0.69}
+        )
+
+        assert match.units == {rice: 2, toothpaste: 1}
+        assert match.discount_amount == pytest.approx(2 * 2.49 + 1.79 - 4.0)
+
+    def test_discount_is_attributed_to_a_cart_product(self, products: Dict[str, Product]):
+        """A group bundle's discount goes to the most expensive product it took, not its first listed one."""
+        rice, toothpaste, tomatoes = products["rice"], products["toothpaste"], products["tomatoes"]
+        bundle = Bundle([rice, toothpaste, tomatoes], 2.0, size=2)
+
+        (match,) = BundleMatcher([bundle]).match({tomatoes: 1, toothpaste: 1}, {toothpaste: 1.79, tomatoes: 0.69})
+
+        assert match.discount().product is toothpaste
+
+    def test_unprofitable_bundle_is_ignored(self, products: Dict[str, Product]):
+        """A bundle dearer than its products is never applied."""
+        bundle = Bundle([products["toothbrush"], products["toothpaste"]], 5.0)
+
+        assert BundleMatcher([bundle]).match(
+            {products["toothbrush"]: 1, products["toothpaste"]: 1},
+            {products["toothbrush"]: 0.99, products["toothpaste"]: 1.79},
+        ) == []
+
+    def test_invalid_bundles(self, products: Dict[str, Product]):
+        """Bundles need products and a positive size."""
+        with pytest.raises(ValueError):
+            Bundle([], 1.0)
+        with pytest.raises(ValueError):
+            Bundle([products["rice"]], 1.0, size=0)
+
+
+class TestBundleOffers:
+    """Tests for bundle offers at the teller."""
+
+    def test_bundle_then_product_offers(self, teller: Teller, products: Dict[str, Product]):
+        """Bundles are applied first, and the units they leave get the product's offers."""
+        toothbrush, toothpaste = products["toothbrush"], products["toothpaste"]
+        teller.add_bundle_offer(Bundle([toothbrush, toothpaste], 2.5))
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, toothbrush)
+
+        receipt = teller.checks_out_articles_from(fill_cart({toothbrush: 4, toothpaste: 1}))
+
+        assert [(d.description, d.discount_amount) for d in receipt.discounts] == [
+            ("toothbrush + toothpaste for 2.5", pytest.approx(-0.28)),
+            ("3 for 2", -0.99),
+        ]
+
+    def test_batch_and_session_agree(self, teller: Teller, products: Dict[str, Product]):
+        """Batch checkout and checkout sessions apply the same bundles."""
+        rice, toothpaste, tomatoes = products["rice"], products["toothpaste"], products["tomatoes"]
+        teller.add_bundle_offer(Bundle([rice, toothpaste, tomatoes], 4.0, size=3))
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, rice, 10.0)
+        carts = [fill_cart({rice: 4, tomatoes: 2}), fill_cart({toothpaste: 1}), fill_cart({tomatoes: 3, rice: 1})]
+
+        expected = [teller.checks_out_articles_from(cart) for cart in carts]
+        batch = teller.checks_out_many(carts)
+        session = teller.open_session()
+        session.add_item_quantity(rice, 4)
+        session.add_item_quantity(tomatoes, 2)
+
+        for receipt, reference in zip(batch, expected):
+            assert [(d.description, d.discount_amount) for d in receipt.discounts] == [
+                (d.description, d.discount_amount) for d in reference.discounts
+            ]
+        assert session.total_price() == pytest.approx(expected[0].total_price())
+        assert session.finish().total_price() == expected[0].total_price()
+
+    def test_session_reprices_only_connected_bundles(self, teller: Teller, products: Dict[str, Product]):
+        """A scan re-matches the bundles sharing products with the scanned one, and leaves the others alone."""
+        toothbrush, toothpaste, rice, apples = (products[name] for name in ("toothbrush", "toothpaste", "rice", "apples"))
+        teller.add_bundle_offer(Bundle([toothbrush, toothpaste], 2.5))
+        teller.add_bundle_offer(Bundle([rice, apples], 3.5))
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, toothbrush)
+        scans = [(toothbrush, 1), (rice, 1), (toothpaste, 1), (apples, 1), (toothbrush, 3), (products["tomatoes"], 2)]
+        session = teller.open_session()
+        cart = ShoppingCart()
+        matcher = teller.pricing_plan.bundles
+        matched = []
+
+        def recording_match(quantities, unit_prices):
+            matched.append(set(quantities))
+            return BundleMatcher.match(matcher, quantities, unit_prices)
+
+        scanned = []
+        for product, quantity in scans:
+            matcher.match = recording_match
+            session.add_item_quantity(product, quantity)
+            del matcher.match
+            scanned.append(matched[:])
+            matched.clear()
+            cart.add_item_quantity(product, quantity)
+            assert session.total_price() == pytest.approx(teller.checks_out_articles_from(cart).total_price())
+
+        assert scanned == [
+            [{toothbrush}], [{rice}], [{toothbrush, toothpaste}], [{rice, apples}], [{toothbrush, toothpaste}], []
+        ]
+        assert [d.description for d in session.discounts_for(toothbrush)] == ["toothbrush + toothpaste for 2.5", "3 for 2"]
@@ -0,0 +1,149 @@
+import sys
+import threading
+import pytest
+from typing import Dict
+from src.models import Product
+from src.handlers.catalog import CachingCatalog, ISupermarketCatalog
+
+
+class CountingCatalog(ISupermarketCatalog):
+    """Catalog double that counts price lookups."""
+
+    def __init__(self):
+        self.prices: Dict[Product, float] = {}
+        self.lookups = 0
+
+    def add_product(self, product: Product, price: float) -> None:
+        self.prices[product] = price
+
+    def unit_price(self, product: Product) -> float:
+        self.lookups += 1
+        return self.prices[product]
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def backend(products: Dict[str, Product], catalog: ISupermarketCatalog) -> CountingCatalog:
+    counting = CountingCatalog()
+    for product in products.values():
+        counting.add_product(product, catalog.unit_price(product))
+    return counting
+
+
+class TestCachingCatalog:
+    """Tests for the caching catalog decorator."""
+
+    def test_repeated_lookups_hit_the_cache(self, backend: CountingCatalog, products: Dict[str, Product]):
+        """Only the first lookup of a product reaches the wrapped catalog."""
+        cache = CachingCatalog(backend)
+
+        assert cache.unit_price(products["rice"]) == 2.49
+        assert cache.unit_price(products["rice"]) == 2.49
+
+        assert backend.lookups == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hit_rate == 0.5
+
+    def test_least_recently_used_entry_is_evicted(self, backend: CountingCatalog, products: Dict[str, Product]):
+        """The cache never holds more than max_size entries."""
+        cache = CachingCatalog(backend, max_size=2)
+        cache.unit_price(products["rice"])
+        cache.unit_price(products["apples"])
+        cache.unit_price(products["rice"])
+        cache.unit_price(products["toothbrush"])
+
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        cache.unit_price(products["rice"])
+        assert backend.lookups == 3
+        cache.unit_price(products["apples"])
+        assert backend.lookups == 4
+
+    def test_entries_expire_after_ttl(self, backend: CountingCatalog, products: Dict[str, Product]):
+        """An entry older than the TTL is fetched again."""
+        clock = FakeClock()
+        cache = CachingCatalog(backend, ttl=5.0, clock=clock)
+        cache.unit_price(products["rice"])
+        clock.now = 4.9
+        cache.unit_price(products["rice"])
+        clock.now = 5.0
+        cache.unit_price(products["rice"])
+
+        assert backend.lookups == 2
+        assert cache.expirations == 1
+
+    def test_price_change_invalidates_entry(self, backend: CountingCatalog, products: Dict[str, Product]):
+        """Changing a price through the cache is visible immediately."""
+        cache = CachingCatalog(backend)
+        cache.unit_price(products["rice"])
+
+        cache.add_product(products["rice"], 1.99)
+
+        assert cache.unit_price(products["rice"]) == 1.99
+
+    def test_explicit_invalidation(self, backend: CountingCatalog, products: Dict[str, Product]):
+        """Invalidated entries are fetched again from the wrapped catalog."""
+        cache = CachingCatalog(backend)
+        cache.unit_price(products["rice"])
+        cache.unit_price(products["apples"])
+        backend.prices[products["rice"]] = 3.0
+
+        cache.invalidate(products["rice"])
+        assert cache.unit_price(products["rice"]) == 3.0
+
+        cache.invalidate_all()
+        assert len(cache) == 0
+
+    def test_invalid_size(self, backend: CountingCatalog):
+        """A cache needs room for at least one entry."""
+        with pytest.raises(ValueError):
+            CachingCatalog(backend, max_size=0)
+
+    def test_bulk_lookup_fetches_only_misses(self, backend: CountingCatalog, products: Dict[str, Product]):
+        """unit_prices answers cached products and looks up each missing one once."""
+        cache = CachingCatalog(backend)
+        rice, apples = products["rice"], products["apples"]
+        cache.unit_price(rice)
+
+        assert cache.unit_prices([rice, apples, apples]) == [2.49, 1.99, 1.99]
+        assert backend.lookups == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    @pytest.mark.parametrize("max_size, ttl", [(100, 0.0), (2, 60.0)])
+    def test_shared_between_threads(self, backend: CountingCatalog, products: Dict[str, Product], max_size, ttl):
+        """Threads expiring and evicting the same entries never trip over each other."""
+        cache = CachingCatalog(backend, max_size=max_size, ttl=ttl)
+        wanted = list(products.values())
+        expected = [backend.prices[product] for product in wanted]
+        errors = []
+
+        def lookups():
+            try:
+                for _ in range(1000):
+                    assert [cache.unit_price(product) for product in wanted] == expected
+                    assert cache.unit_prices(wanted) == expected
+            except Exception as error:
+                errors.append(error)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=lookups) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert errors == []
+        assert len(cache) <= max_size
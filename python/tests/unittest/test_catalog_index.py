@@ -0,0 +1,91 @@
+import pytest
+from src.models import Product, ProductUnit
+from src.handlers.catalog import (
+    CachingCatalog,
+    CatalogIndex,
+    InMemoryCatalog,
+    ISupermarketCatalog,
+    SupermarketCatalog,
+    find_product,
+)
+from src.handlers.sqlite_catalog import SqliteCatalog
+
+NAMES = ["cherry tomatoes", "cheddar", "chervil", "apples", "cherries", "rice"]
+
+
+def fill(catalog):
+    for sku, name in enumerate(NAMES, start=5_410_000):
+        catalog.add_product(Product(f"index {name}", ProductUnit.EACH, sku=sku), 1.0)
+    return catalog
+
+
+@pytest.fixture(params=["memory", "cached", "sqlite"])
+def indexed_catalog(request):
+    """Fixture for every catalog that supports the lookup index."""
+    if request.param == "sqlite":
+        catalog = fill(SqliteCatalog.in_memory())
+        yield catalog
+        catalog.close()
+    elif request.param == "cached":
+        yield CachingCatalog(fill(InMemoryCatalog()))
+    else:
+        yield fill(InMemoryCatalog())
+
+
+class TestCatalogIndex:
+    """Tests for looking up catalog products by SKU, name and name prefix."""
+
+    def test_lookup_by_sku(self, indexed_catalog):
+        """A scanned barcode resolves to its product."""
+        assert indexed_catalog.product_by_sku(5_410_005) is Product("index rice", ProductUnit.EACH)
+        assert indexed_catalog.product_by_sku(1) is None
+
+    def test_lookup_by_name(self, indexed_catalog):
+        """An exact name resolves to its product."""
+        assert indexed_catalog.product_by_name("index apples").sku == 5_410_003
+        assert indexed_catalog.product_by_name("index apple") is None
+
+    def test_lookup_by_prefix(self, indexed_catalog):
+        """Prefix lookups are ordered by name and limited."""
+        found = indexed_catalog.products_with_prefix("index che")
+
+        assert [product.name for product in found] == [
+            "index cheddar", "index cherries", "index cherry tomatoes", "index chervil",
+        ]
+        assert len(indexed_catalog.products_with_prefix("index che", limit=2)) == 2
+        assert indexed_catalog.products_with_prefix("index x") == []
+
+    def test_index_sorts_lazily(self):
+        """Names added out of order are found once a prefix query sorts them."""
+        index = CatalogIndex()
+        for name in ("b", "a", "ab"):
+            index.add(Product(f"lazy {name}", ProductUnit.EACH))
+        index.add(Product("lazy aa", ProductUnit.EACH))
+
+        assert [product.name for product in index.with_prefix("lazy a")] == ["lazy a", "lazy aa", "lazy ab"]
+        assert len(index) == 4
+
+    def test_unindexed_catalog_falls_back_to_registered_products(self):
+        """A catalog without an index finds nothing itself, so find_product asks the registry."""
+
+        class PriceListCatalog(ISupermarketCatalog):
+            def add_product(self, product: Product, price: float) -> None:
+                pass
+
+            def unit_price(self, product: Product) -> float:
+                return 1.0
+
+        catalog = PriceListCatalog()
+        rice = Product("index unlisted rice", ProductUnit.EACH, sku=5_410_099)
+
+        assert not catalog.indexed and not CachingCatalog(catalog).indexed
+        assert catalog.product_by_name(rice.name) is None
+        assert catalog.products_with_prefix("index") == []
+        assert find_product(catalog, name=rice.name) is rice
+        assert find_product(catalog, sku=5_410_099) is rice
+        assert find_product(fill(InMemoryCatalog()), name=rice.name) is None
+
+    def test_database_catalog_cannot_be_searched_in_tests(self):
+        """The database catalog is out of reach of unit tests."""
+        with pytest.raises(Exception):
+            SupermarketCatalog().product_by_name("rice")
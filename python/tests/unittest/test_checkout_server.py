@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import pytest
+from typing import Dict, List
+from src.models import Product, SpecialOfferType
+from src.handlers.checkout_client import CheckoutClient, CheckoutError, run_load_test
+from src.handlers.checkout_server import CheckoutServer, MicroBatcher, receipt_to_json
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+CART = {"items": [{"product": "toothbrush", "quantity": 3}, {"product": "apples", "quantity": 1.5}]}
+
+
+class TestMicroBatcher:
+    """Tests for collecting concurrent submissions into batches."""
+
+    def test_batches_are_bounded_in_size(self):
+        """Concurrent items are processed in batches of at most max_batch_size, in order."""
+        batches: List[List[int]] = []
+
+        def process(items: List[int]) -> List[int]:
+            batches.append(items)
+            return [item * 2 for item in items]
+
+        async def submit_all():
+            batcher = MicroBatcher(process, max_batch_size=4, max_wait=0.01)
+            return await asyncio.gather(*(batcher.submit(item) for item in range(10)))
+
+        assert asyncio.run(submit_all()) == [item * 2 for item in range(10)]
+        assert batches[:2] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+        assert batches[2] == [8, 9]
+
+    def test_partial_batch_waits_at_most_max_wait(self):
+        """A lone item is processed once max_wait has passed."""
+
+        async def submit_one():
+            batcher = MicroBatcher(lambda items: items, max_batch_size=100, max_wait=0.01)
+            return await asyncio.wait_for(batcher.submit("cart"), 1.0), batcher.batches
+
+        assert asyncio.run(submit_one()) == ("cart", 1)
+
+    def test_failure_reaches_every_submitter(self):
+        """If processing a batch raises, each submitter of the batch gets the error."""
+
+        def process(items):
+            raise RuntimeError("catalog down")
+
+        async def submit_all():
+            batcher = MicroBatcher(process, max_batch_size=2)
+            return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+        assert [str(result) for result in asyncio.run(submit_all())] == ["catalog down", "catalog down"]
+
+    def test_failing_item_only_fails_its_submitter(self):
+        """A batch that raises is retried item by item, off the event loop's thread."""
+        threads = set()
+
+        def process(items: List[int]) -> List[int]:
+            threads.add(threading.get_ident())
+            if any(item < 0 for item in items):
+                raise ValueError(f"cannot price {min(items)}")
+            return [item * 2 for item in items]
+
+        async def submit_all():
+            batcher = MicroBatcher(process, max_batch_size=3)
+            try:
+                return await asyncio.gather(*(batcher.submit(item) for item in (1, -1, 2)), return_exceptions=True)
+            finally:
+                batcher.close()
+
+        results = asyncio.run(submit_all())
+
+        assert results[0] == 2 and results[2] == 4
+        assert isinstance(results[1], ValueError)
+        assert threading.get_ident() not in threads
+
+
+class TestCheckoutServer:
+    """Tests for the HTTP checkout server and its client."""
+
+    @pytest.fixture
+    def offers_teller(self, teller: Teller, products: Dict[str, Product]) -> Teller:
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["apples"], 20.0)
+        return teller
+
+    def test_checkout_returns_the_teller_receipt(self, offers_teller: Teller, products: Dict[str, Product]):
+        """A JSON cart is answered with the receipt the teller prints for it."""
+        cart = ShoppingCart()
+        cart.add_item_quantity(products["toothbrush"], 3)
+        cart.add_item_quantity(products["apples"], 1.5)
+        expected = receipt_to_json(offers_teller.checks_out_articles_from(cart))
+
+        async def checkout():
+            async with CheckoutServer(offers_teller, port=0) as server:
+                async with CheckoutClient(port=server.port) as client:
+                    return await client.checkout(CART), await client.checkout(CART)
+
+        first, second = asyncio.run(checkout())
+        assert first == second == expected
+        assert [discount["description"] for discount in first["discounts"]] == ["3 for 2", "20.0% off"]
+
+    def test_concurrent_requests_are_batched(self, offers_teller: Teller):
+        """Requests arriving together are priced in a few batches."""
+
+        async def load():
+            async with CheckoutServer(offers_teller, port=0, max_batch_size=16, max_wait=0.005) as server:
+                report = await run_load_test([CART], requests=64, concurrency=16, port=server.port)
+                return report, server.batcher
+
+        report, batcher = asyncio.run(load())
+        assert report.errors == 0 and len(report.latencies) == 64
+        assert batcher.items == 64
+        assert batcher.batches < 64
+        assert report.throughput > 0
+
+    def test_bad_requests(self, offers_teller: Teller):
+        """Invalid carts, unknown products, paths and methods get error statuses, and the connection stays usable."""
+
+        async def requests():
+            async with CheckoutServer(offers_teller, port=0) as server:
+                async with CheckoutClient(port=server.port) as client:
+                    statuses = [
+                        (await client.request("POST", "/checkout", b"not json"))[0],
+                        (await client.request("POST", "/checkout", b'{"items": [{"product": "caviar"}]}'))[0],
+                        (await client.request("POST", "/checkout", b'{"items": [{"product": "rice", "quantity": -1}]}'))[0],
+                        (await client.request("POST", "/receipts"))[0],
+                        (await client.request("GET", "/checkout"))[0],
+                    ]
+                    with pytest.raises(CheckoutError):
+                        await client.checkout({"carts": []})
+                    statuses.append(len((await client.checkout(CART))["items"]))
+                    return statuses
+
+        assert asyncio.run(requests()) == [400, 400, 400, 404, 405, 2]
+
+    @pytest.mark.parametrize("quantity", [b"NaN", b"Infinity", b"1e300", b"11"])
+    def test_non_finite_and_huge_quantities_are_rejected(self, offers_teller: Teller, quantity: bytes):
+        """Quantities that are not finite or above max_quantity get a 400 before reaching the batcher."""
+
+        async def request():
+            async with CheckoutServer(offers_teller, port=0, max_quantity=10) as server:
+                async with CheckoutClient(port=server.port) as client:
+                    body = b'{"items": [{"product": "rice", "quantity": ' + quantity + b"}]}"
+                    status, response = await client.request("POST", "/checkout", body)
+                    return status, response, server.batcher.batches
+
+        status, response, batches = asyncio.run(request())
+
+        assert status == 400
+        assert "invalid quantity" in response["error"]
+        assert batches == 0
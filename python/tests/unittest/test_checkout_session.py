@@ -0,0 +1,62 @@
+import pytest
+from typing import Dict
+from src.models import Product, SpecialOfferType
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+class TestCheckoutSession:
+    """Tests for the live checkout session and its running total."""
+
+    def test_running_total_follows_each_scan(self, teller: Teller, products: Dict[str, Product]):
+        """The total includes discounts as soon as they apply."""
+        toothbrush = products["toothbrush"]
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, toothbrush, None)
+        session = teller.open_session()
+
+        session.add_item(toothbrush)
+        session.add_item(toothbrush)
+        assert session.total_price() == pytest.approx(1.98)
+        assert session.discount_for(toothbrush) is None
+
+        session.add_item(toothbrush)
+        assert session.total_price() == pytest.approx(1.98)
+        assert session.discount_for(toothbrush).description == "3 for 2"
+        assert session.line_total(toothbrush) == pytest.approx(2.97)
+
+        session.add_item(toothbrush)
+        assert session.total_price() == pytest.approx(2.97)
+
+    def test_finish_matches_batch_checkout(self, teller: Teller, products: Dict[str, Product]):
+        """The session receipt is the receipt of the same cart checked out at once."""
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["apples"], 20.0)
+        teller.add_special_offer(SpecialOfferType.FIVE_FOR_AMOUNT, products["toothpaste"], 7.49)
+        teller.add_special_offer(SpecialOfferType.TWO_FOR_AMOUNT, products["tomatoes"], 0.99)
+        scans = [("apples", 1.5), ("toothpaste", 2), ("tomatoes", 1), ("toothpaste", 3), ("apples", 0.5), ("rice", 1)]
+        session = teller.open_session()
+        cart = ShoppingCart()
+        for name, quantity in scans:
+            session.add_item_quantity(products[name], quantity)
+            cart.add_item_quantity(products[name], quantity)
+
+        receipt = session.finish()
+        expected = teller.checks_out_articles_from(cart)
+
+        assert [(i.product, i.quantity, i.total_price) for i in receipt.items] == [
+            (i.product, i.quantity, i.total_price) for i in expected.items
+        ]
+        assert [(d.product, d.description, d.discount_amount) for d in receipt.discounts] == [
+            (d.product, d.description, d.discount_amount) for d in expected.discounts
+        ]
+        assert receipt.total_price() == expected.total_price()
+        assert session.total_price() == pytest.approx(expected.total_price())
+
+    def test_finished_session_is_closed(self, teller: Teller, products: Dict[str, Product]):
+        """A finished session returns the same receipt and accepts no more scans."""
+        session = teller.open_session()
+        session.add_item(products["rice"])
+        receipt = session.finish()
+
+        assert session.finish() is receipt
+        with pytest.raises(RuntimeError):
+            session.add_item(products["rice"])
@@ -1,6 +1,8 @@
 import pytest
 from typing import Dict
 from src.models import Product, SpecialOfferType
+from src.handlers.catalog import ISupermarketCatalog
+from src.handlers.discount_calculator import DiscountMemo
 from src.handlers.shopping_cart import ShoppingCart
 from src.handlers.teller import Teller
 
@@ -151,3 +153,78 @@ class TestDiscounts:
 
         # Validate discounts
         assert len(receipt.discounts) == 2
+
+
+def described(receipt):
+    return [(discount.product.name, discount.description, discount.discount_amount) for discount in receipt.discounts]
+
+
+class TestDiscountMemo:
+    """Tests for memoizing discount results across carts."""
+
+    @pytest.fixture
+    def memo_teller(self, catalog: ISupermarketCatalog, products: Dict[str, Product]) -> Teller:
+        teller = Teller(catalog, discount_memo=DiscountMemo())
+        teller.add_special_offer(SpecialOfferType.FIVE_FOR_AMOUNT, products["toothpaste"], 7.49)
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["toothbrush"], 10.0)
+        return teller
+
+    @staticmethod
+    def fill_cart(products: Dict[str, Product]) -> ShoppingCart:
+        cart = ShoppingCart()
+        cart.add_item_quantity(products["toothpaste"], 6)
+        cart.add_item_quantity(products["toothbrush"], 4)
+        return cart
+
+    def test_repeated_lines_hit(self, memo_teller: Teller, teller: Teller, products: Dict[str, Product]):
+        """Repeated lines of products with several offers are answered from the memo, with the same discounts."""
+        teller.add_special_offer(SpecialOfferType.FIVE_FOR_AMOUNT, products["toothpaste"], 7.49)
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["toothbrush"], 10.0)
+        cart = self.fill_cart(products)
+        expected = described(teller.checks_out_articles_from(cart))
+
+        receipts = [memo_teller.checks_out_articles_from(cart) for _ in range(3)]
+
+        assert all(described(receipt) == expected for receipt in receipts)
+        memo = memo_teller.discount_memo
+        assert (memo.misses, memo.hits, len(memo)) == (1, 2, 1)
+        assert memo.hit_rate == pytest.approx(2 / 3)
+
+    def test_offer_change_is_never_answered_from_old_entries(self, memo_teller: Teller, products: Dict[str, Product]):
+        """New offer terms miss the memo; offers that stay keep their entries."""
+        cart = self.fill_cart(products)
+        memo_teller.checks_out_articles_from(cart)
+        memo_teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["toothpaste"], 50.0)
+
+        receipt = memo_teller.checks_out_articles_from(cart)
+
+        toothpaste = [d for d in described(receipt) if d[0] == "toothpaste"]
+        assert [description for _, description, _ in toothpaste] == ["50.0% off"]
+        assert toothpaste[0][2] == pytest.approx(-6 * 1.79 / 2)
+        assert (memo_teller.discount_memo.misses, memo_teller.discount_memo.hits) == (2, 1)
+
+    def test_memo_is_bounded(self, memo_teller: Teller, products: Dict[str, Product]):
+        """Beyond max_size the oldest entries are evicted, and invalidate_all empties the memo."""
+        memo = memo_teller.discount_memo = DiscountMemo(max_size=2)
+        memo_teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0)
+        memo_teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["rice"])
+        for quantity in range(1, 5):
+            cart = ShoppingCart()
+            cart.add_item_quantity(products["rice"], quantity)
+            memo_teller.checks_out_articles_from(cart)
+
+        assert (len(memo), memo.evictions) == (2, 2)
+        memo.invalidate_all()
+        assert len(memo) == 0
+
+    def test_hit_returns_the_cached_discounts(self, memo_teller: Teller, products: Dict[str, Product]):
+        """A hit returns the very Discounts of the first call, and a rebuilt plan keeps unchanged rules."""
+        rule = memo_teller.pricing_plan.rules[products["toothbrush"]]
+        first = rule(4, 0.99)
+
+        memo_teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0)
+
+        assert memo_teller.pricing_plan.rules[products["toothbrush"]] is rule
+        assert rule(4, 0.99) is first
@@ -0,0 +1,102 @@
+import pytest
+from typing import Dict
+from src.models import Bundle, Product, SpecialOfferType
+from src.money import Money, line_total, percentage_of, round_half_up, to_quantity
+from src.handlers.exact_teller import ExactTeller
+from src.handlers.receipt_printer import ReceiptPrinter
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+class TestMoney:
+    """Tests for the integer-cent money type and its rounding rules."""
+
+    def test_parse_and_format(self):
+        """Money parses and prints decimal prices exactly."""
+        assert Money.parse("1.99") == 199
+        assert Money.parse("-12.5") == -1250
+        assert Money.parse(".05") == 5
+        assert str(Money(-5)) == "-0.05"
+        assert f"{Money(123456):.2f}" == "1234.56"
+        assert f"{Money(199):8.2f}" == "    1.99"
+        assert f"{Money(199):<8}" == "1.99    "
+        assert repr(Money(199)) == "Money('1.99')"
+        assert float(Money(199)) == 1.99
+        with pytest.raises(ValueError):
+            Money.parse("1.999")
+
+    def test_from_float_takes_nearest_cent(self):
+        """Float prices that are not exactly representable still give their cent."""
+        assert Money.from_float(0.29) == 29
+        assert Money.from_float(1.1 + 2.2) == 330
+
+    def test_rounding_rules(self):
+        """Line totals and percentages round half a cent up."""
+        assert round_half_up(5, 10) == 1
+        assert round_half_up(4, 10) == 0
+        assert line_total(to_quantity(2.5), 199) == 498
+        assert percentage_of(498, 20.0) == 100
+        assert percentage_of(250, 12.5) == 31
+        assert percentage_of(100, 33.33) == 33
+
+
+class TestExactTeller:
+    """Tests for checking out in exact integer cents."""
+
+    @pytest.fixture
+    def tellers(self, catalog, products: Dict[str, Product]):
+        """A float teller and an exact teller with the same offers."""
+        float_teller, exact_teller = Teller(catalog), ExactTeller(catalog)
+        for teller in (float_teller, exact_teller):
+            teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+            teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["apples"], 20.0)
+            teller.add_special_offer(SpecialOfferType.FIVE_FOR_AMOUNT, products["toothpaste"], 7.49)
+            teller.add_special_offer(SpecialOfferType.TWO_FOR_AMOUNT, products["tomatoes"], 0.99)
+            teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["tomatoes"], 10.0)
+        return float_teller, exact_teller
+
+    @pytest.mark.parametrize("small_cart", [ExactTeller.SMALL_CART, 0], ids=["by line", "columns"])
+    def test_receipt_is_exact(self, tellers, products: Dict[str, Product], monkeypatch, small_cart: int):
+        """Every amount is Money, and the total is the exact sum of the lines and discounts, on either path."""
+        _, exact_teller = tellers
+        monkeypatch.setattr(exact_teller, "SMALL_CART", small_cart)
+        cart = ShoppingCart()
+        cart.add_item_quantity(products["apples"], 2.5)
+        cart.add_item_quantity(products["toothbrush"], 3)
+        cart.add_item_quantity(products["toothpaste"], 5)
+        cart.add_item_quantity(products["tomatoes"], 3)
+
+        receipt = exact_teller.checks_out_articles_from(cart)
+
+        assert [item.total_price for item in receipt.items] == [498, 297, 895, 207]
+        assert [(d.description, d.discount_amount) for d in receipt.discounts] == [
+            ("20.0% off", -100), ("3 for 2", -99), ("5 for 7.49", -146), ("2 for 0.99", -39), ("10.0% off", -7),
+        ]
+        assert receipt.total_price() == Money(498 + 297 + 895 + 207 - 100 - 99 - 146 - 39 - 7)
+        assert isinstance(receipt.total_price(), Money)
+
+    def test_matches_float_teller_to_the_cent(self, tellers, products: Dict[str, Product]):
+        """Where the float teller has no rounding drift, both tellers agree."""
+        float_teller, exact_teller = tellers
+        cart = ShoppingCart()
+        for product in products.values():
+            cart.add_item_quantity(product, 7)
+
+        expected = float_teller.checks_out_articles_from(cart)
+        receipt = exact_teller.checks_out_articles_from(cart)
+
+        assert receipt.total_price() == Money.from_float(expected.total_price())
+        assert ReceiptPrinter().print_receipt(receipt) == ReceiptPrinter().print_receipt(expected)
+
+    def test_bundles_in_cents(self, catalog, products: Dict[str, Product]):
+        """Bundle discounts are the exact difference to the bundle price."""
+        exact_teller = ExactTeller(catalog)
+        exact_teller.add_bundle_offer(Bundle([products["toothbrush"], products["toothpaste"]], 2.5))
+        cart = ShoppingCart()
+        cart.add_item_quantity(products["toothbrush"], 2)
+        cart.add_item_quantity(products["toothpaste"], 2)
+
+        receipt = exact_teller.checks_out_articles_from(cart)
+
+        assert [d.discount_amount for d in receipt.discounts] == [-56]
+        assert receipt.total_price() == Money(2 * 99 + 2 * 179 - 56)
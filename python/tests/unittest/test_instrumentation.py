@@ -0,0 +1,109 @@
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Tuple, Type
+import pytest
+from src.models import Product, SpecialOfferType
+from src.handlers.catalog import ISupermarketCatalog
+from src.handlers.instrumentation import NULL_INSTRUMENTATION, Instrumentation, MetricsRegistry
+from src.handlers.receipt_printer import ReceiptPrinter
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.exact_teller import ExactTeller
+from src.handlers.teller import BaseTeller, Teller
+
+
+def checkout(teller: Teller, products: Dict[str, Product]):
+    teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], None)
+    teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0)
+    cart = ShoppingCart()
+    cart.add_item_quantity(products["toothbrush"], 3)
+    cart.add_item_quantity(products["rice"], 1)
+    cart.add_item_quantity(products["apples"], 1)
+    return teller.checks_out_articles_from(cart)
+
+
+class TestInstrumentation:
+    """Tests for the checkout timing hooks and the metrics export."""
+
+    @pytest.mark.parametrize("teller_class", [Teller, ExactTeller])
+    def test_checkout_stages_are_timed(
+        self, catalog: ISupermarketCatalog, products: Dict[str, Product], teller_class: Type[BaseTeller]
+    ):
+        """Catalog lookups, receipt building and offers are observed, and each strategy's rule by the Teller."""
+        instrumentation = Instrumentation()
+        observed: List[Tuple[str, str]] = []
+        instrumentation.add_hook(lambda stage, detail, seconds: observed.append((stage, detail)))
+
+        checkout(teller_class(catalog, instrumentation), products)
+
+        assert ("catalog_lookup", "InMemoryCatalog") in observed
+        assert ("receipt_build", "") in observed
+        assert ("offers", "") in observed
+        if teller_class is Teller:
+            assert ("strategy", "ThreeForTwoStrategy") in observed
+            assert ("strategy", "TenPercentDiscountStrategy") in observed
+        assert instrumentation.catalog_products.value(catalog="InMemoryCatalog") == 3
+        assert instrumentation.receipts.value() == 1
+        assert instrumentation.receipt_lines.value() == 3
+
+    def test_printer_rendering_is_timed(self, catalog: ISupermarketCatalog, products: Dict[str, Product]):
+        """Printing a receipt is observed as the render stage."""
+        instrumentation = Instrumentation()
+        receipt = checkout(Teller(catalog), products)
+
+        ReceiptPrinter(instrumentation=instrumentation).print_receipt(receipt)
+
+        assert instrumentation.stage_seconds.count(stage="render", detail="print") == 1
+
+    def test_disabled_instrumentation_records_nothing(self, catalog: ISupermarketCatalog, products: Dict[str, Product]):
+        """The default teller does not time anything."""
+        teller = Teller(catalog)
+        checkout(teller, products)
+
+        assert teller.instrumentation is NULL_INSTRUMENTATION
+        assert not teller.pricing_plan.instrumented
+        assert NULL_INSTRUMENTATION.receipts.value() == 0
+        assert NULL_INSTRUMENTATION.stage_seconds.count(stage="catalog_lookup", detail="InMemoryCatalog") == 0
+
+    def test_prometheus_text_format(self):
+        """Counters and histograms render in the Prometheus exposition format."""
+        registry = MetricsRegistry()
+        registry.counter("lookups_total", "Lookups.").inc(2, catalog="db")
+        registry.counter("big_total", "Big.").inc(1234567)
+        histogram = registry.histogram("stage_seconds", "Stages.", buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        histogram.observe(5.0, stage="a")
+
+        assert registry.render_prometheus() == (
+            "# HELP big_total Big.\n"
+            "# TYPE big_total counter\n"
+            "big_total 1234567\n"
+            "# HELP lookups_total Lookups.\n"
+            "# TYPE lookups_total counter\n"
+            'lookups_total{catalog="db"} 2\n'
+            "# HELP stage_seconds Stages.\n"
+            "# TYPE stage_seconds histogram\n"
+            'stage_seconds_bucket{stage="a",le="0.1"} 1\n'
+            'stage_seconds_bucket{stage="a",le="1"} 2\n'
+            'stage_seconds_bucket{stage="a",le="+Inf"} 3\n'
+            f'stage_seconds_sum{{stage="a"}} {0.05 + 0.5 + 5.0!r}\n'
+            'stage_seconds_count{stage="a"} 3\n'
+        )
+
+    def test_export_to_file_and_endpoint(self, tmp_path: Path):
+        """Metrics can be written to a file and scraped over HTTP."""
+        registry = MetricsRegistry()
+        registry.counter("receipts_total", "Receipts.").inc()
+        path = tmp_path / "checkout.prom"
+
+        registry.write_prometheus(path)
+        server = registry.serve(port=0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                scraped = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert path.read_text() == registry.render_prometheus() == scraped
@@ -0,0 +1,84 @@
+import pickle
+import pytest
+from src.models import (
+    PRODUCTS, Discount, Offer, Product, ProductQuantity, ProductUnit, ProductRegistry, ReceiptItem,
+    SpecialOfferType,
+)
+
+
+class TestProductRegistry:
+    """Tests for interning products and their dense ids."""
+
+    def test_products_are_interned_by_name(self):
+        """Two products with the same name are the same object."""
+        first = Product("interned apples", ProductUnit.KILO)
+        second = Product("interned apples", ProductUnit.KILO)
+
+        assert first is second
+        assert {first: 1.99}[second] == 1.99
+        assert PRODUCTS.find("interned apples") is first
+        assert PRODUCTS.get(first.id) is first
+
+    def test_ids_are_dense(self):
+        """Each new product takes the next id."""
+        registry = ProductRegistry()
+        products = [registry.intern(f"dense {i}", ProductUnit.EACH) for i in range(3)]
+
+        assert [product.id for product in products] == [0, 1, 2]
+        assert len(registry) == 3
+        assert list(registry) == products
+
+    def test_lookup_by_sku(self):
+        """A SKU given later is attached to the already registered product."""
+        product = Product("sku soap", ProductUnit.EACH)
+
+        assert Product("sku soap", ProductUnit.EACH, sku=871234) is product
+        assert PRODUCTS.find_sku(871234) is product
+        with pytest.raises(ValueError):
+            Product("sku soap", ProductUnit.EACH, sku=999)
+        with pytest.raises(ValueError):
+            Product("other soap", ProductUnit.EACH, sku=871234)
+
+    def test_conflicting_unit_is_rejected(self):
+        """A name cannot be registered with two units while its product is in use."""
+        rice = Product("unit rice", ProductUnit.EACH)
+
+        with pytest.raises(ValueError):
+            Product("unit rice", ProductUnit.KILO)
+        assert rice.unit == ProductUnit.EACH
+
+    def test_unused_products_are_released(self):
+        """A product nobody references leaves the registry; its name and id can be used again."""
+        registry = ProductRegistry()
+        kept = registry.intern("released kept", ProductUnit.EACH)
+        dropped = registry.intern("released rice", ProductUnit.EACH, sku=871299)
+        dropped_id = dropped.id
+        del dropped
+
+        assert registry.find("released rice") is None and registry.find_sku(871299) is None
+        assert list(registry) == [kept] and len(registry) == 1
+        with pytest.raises(KeyError):
+            registry.get(dropped_id)
+
+        again = registry.intern("released rice", ProductUnit.KILO, sku=871299)
+        assert (again.unit, again.id) == (ProductUnit.KILO, dropped_id)
+        assert registry.get(dropped_id) is again
+
+    def test_pickling_keeps_identity(self):
+        """Unpickled products resolve to the registered instance."""
+        product = Product("pickled pears", ProductUnit.KILO)
+
+        assert pickle.loads(pickle.dumps(product)) is product
+
+    def test_models_have_no_instance_dict(self):
+        """All model classes are slotted."""
+        product = Product("slotted", ProductUnit.EACH)
+        models = [
+            product,
+            ProductQuantity(product, 1),
+            Offer(SpecialOfferType.THREE_FOR_TWO, product),
+            Discount(product, "3 for 2", -1.0),
+            ReceiptItem(product, 1, 1.0, 1.0),
+        ]
+        for model in models:
+            assert not hasattr(model, "__dict__")
@@ -0,0 +1,153 @@
+import itertools
+import pytest
+from typing import Dict
+from src.models import Product, SpecialOfferType
+from src.handlers.discount_calculator import IDiscountStrategyFactory
+from src.handlers.offer_optimizer import OfferOptimizer
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+def terms(*offers):
+    return [(IDiscountStrategyFactory.get_strategy(offer_type), argument) for offer_type, argument in offers]
+
+
+def brute_force(optimizer: OfferOptimizer, quantity: int, unit_price: float) -> float:
+    """The largest discount over every way of applying the offers to whole units."""
+    groups = [strategy.group(unit_price, argument) for strategy, argument in optimizer.terms]
+    best = 0.0
+    ranges = [range(quantity // size + 1) for size, _ in groups]
+    for counts in itertools.product(*ranges):
+        if sum(count * size for count, (size, _) in zip(counts, groups)) <= quantity:
+            best = max(best, sum(count * discount for count, (_, discount) in zip(counts, groups)))
+    return best
+
+
+class TestOfferOptimizer:
+    """Tests for choosing the best combination of a product's offers."""
+
+    def test_matches_brute_force(self):
+        """The dynamic program finds the largest discount for every quantity."""
+        optimizer = OfferOptimizer(terms(
+            (SpecialOfferType.THREE_FOR_TWO, None),
+            (SpecialOfferType.TWO_FOR_AMOUNT, 1.5),
+            (SpecialOfferType.FIVE_FOR_AMOUNT, 3.2),
+            (SpecialOfferType.PERCENT_DISCOUNT, 15.0),
+        ))
+        for quantity in range(0, 16):
+            units = optimizer.allocate(float(quantity), 0.99)
+            discount = sum(
+                strategy.discount_amount(allocated, 0.99, argument)
+                for (strategy, argument), allocated in zip(optimizer.terms, units)
+            )
+
+            assert sum(units) <= quantity
+            assert discount == pytest.approx(brute_force(optimizer, quantity, 0.99))
+
+    def test_fraction_goes_to_single_unit_offer(self):
+        """The fraction of a weighed quantity is covered by the best percentage."""
+        optimizer = OfferOptimizer(terms(
+            (SpecialOfferType.TWO_FOR_AMOUNT, 2.5),
+            (SpecialOfferType.PERCENT_DISCOUNT, 10.0),
+        ))
+
+        assert optimizer.allocate(4.5, 1.99) == [4.0, 0.5]
+
+    def test_unprofitable_offers_are_ignored(self):
+        """An offer that would raise the price covers no units."""
+        optimizer = OfferOptimizer(terms((SpecialOfferType.TWO_FOR_AMOUNT, 5.0)))
+
+        assert optimizer.allocate(6.0, 1.0) == [0.0]
+
+    def test_bulk_quantities(self):
+        """Quantities in the thousands are solved, and solved again from the table."""
+        optimizer = OfferOptimizer(terms(
+            (SpecialOfferType.THREE_FOR_TWO, None),
+            (SpecialOfferType.PERCENT_DISCOUNT, 30.0),
+        ))
+
+        units = optimizer.allocate(5000.0, 2.0)
+
+        assert units == [4998.0, 2.0]
+        assert optimizer.allocate(4999.0, 2.0) == [4998.0, 1.0]
+
+    def test_periodic_quantities_match_brute_force(self):
+        """Quantities reduced by whole periods still get the largest discount."""
+        optimizer = OfferOptimizer(terms(
+            (SpecialOfferType.THREE_FOR_TWO, None),
+            (SpecialOfferType.FIVE_FOR_AMOUNT, 3.0),
+            (SpecialOfferType.PERCENT_DISCOUNT, 10.0),
+        ))
+        for quantity in range(0, 41):
+            units = optimizer.allocate(float(quantity), 0.99)
+            discount = sum(
+                strategy.discount_amount(allocated, 0.99, argument)
+                for (strategy, argument), allocated in zip(optimizer.terms, units)
+            )
+
+            assert sum(units) <= quantity
+            assert discount == pytest.approx(brute_force(optimizer, quantity, 0.99))
+
+    def test_huge_quantities_keep_tables_short(self):
+        """A million units is answered from a table no longer than one period past its start."""
+        optimizer = OfferOptimizer(terms(
+            (SpecialOfferType.THREE_FOR_TWO, None),
+            (SpecialOfferType.TWO_FOR_AMOUNT, 3.5),
+            (SpecialOfferType.PERCENT_DISCOUNT, 30.0),
+        ))
+
+        assert optimizer.allocate(1_000_001.0, 2.0) == [999_999.0, 0.0, 2.0]
+        assert all(len(table.best) <= 2 * 3 + 3 + 1 for table in optimizer._tables.values())
+
+
+class TestMultipleOffers:
+    """Tests for products with several offers at the teller."""
+
+    def test_offers_are_combined(self, teller: Teller, cart: ShoppingCart, products: Dict[str, Product]):
+        """A second offer no longer replaces the first; the best mix is applied."""
+        toothbrush = products["toothbrush"]
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, toothbrush)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, toothbrush, 20.0)
+        cart.add_item_quantity(toothbrush, 4)
+
+        receipt = teller.checks_out_articles_from(cart)
+
+        assert [d.description for d in receipt.discounts] == ["3 for 2", "20.0% off"]
+        assert receipt.total_price() == pytest.approx(4 * 0.99 - 0.99 - 0.198)
+
+    def test_better_offer_wins(self, teller: Teller, cart: ShoppingCart, products: Dict[str, Product]):
+        """An offer that is worse on every unit is not applied."""
+        toothbrush = products["toothbrush"]
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, toothbrush)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, toothbrush, 50.0)
+        cart.add_item_quantity(toothbrush, 3)
+
+        receipt = teller.checks_out_articles_from(cart)
+
+        assert [d.description for d in receipt.discounts] == ["50.0% off"]
+
+    def test_batch_and_session_agree(self, teller: Teller, products: Dict[str, Product]):
+        """Batch checkout and checkout sessions apply the same combination."""
+        apples = products["apples"]
+        teller.add_special_offer(SpecialOfferType.TWO_FOR_AMOUNT, apples, 3.0)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, apples, 10.0)
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["rice"])
+        carts = []
+        for quantity in (1.5, 2.0, 5.25):
+            cart = ShoppingCart()
+            cart.add_item_quantity(apples, quantity)
+            cart.add_item_quantity(products["rice"], 3)
+            carts.append(cart)
+
+        expected = [teller.checks_out_articles_from(cart) for cart in carts]
+        batch = teller.checks_out_many(carts)
+        session = teller.open_session()
+        session.add_item_quantity(apples, 5.25)
+
+        for receipt, reference in zip(batch, expected):
+            assert [(d.description, d.discount_amount) for d in receipt.discounts] == [
+                (d.description, d.discount_amount) for d in reference.discounts
+            ]
+        assert [(d.description, d.discount_amount) for d in session.discounts_for(apples)] == [
+            (d.description, d.discount_amount) for d in expected[2].discounts if d.product == apples
+        ]
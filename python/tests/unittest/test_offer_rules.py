@@ -0,0 +1,173 @@
+import numpy as np
+import pytest
+from typing import Dict
+from src.models import Product, ProductUnit, SpecialOfferType
+from src.money import to_quantity
+from src.handlers.discount_calculator import IDiscountStrategyFactory
+from src.handlers.exact_teller import ExactTeller
+from src.handlers.offer_rules import OfferRule, compile_rule, load_offers
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+OFFERS_CSV = """product,rule,offer_type,argument,start,end
+toothbrush,buy 2 get 1 half price,,,,
+rice,,PERCENT_DISCOUNT,10.0,,
+apples,"5% off from 2, 10% off from 5",,,1000.0,2000.0
+"""
+
+
+def described(receipt):
+    return [(discount.product.name, discount.description, discount.discount_amount) for discount in receipt.discounts]
+
+
+class TestOfferRules:
+    """Tests for compiling declarative offer rules into discount strategies."""
+
+    @pytest.mark.parametrize(
+        "text, offer_type, argument",
+        [
+            ("2 for 0.99", SpecialOfferType.TWO_FOR_AMOUNT, 0.99),
+            ("5 for 7.49", SpecialOfferType.FIVE_FOR_AMOUNT, 7.49),
+            ("buy 2 get 1 free", SpecialOfferType.THREE_FOR_TWO, None),
+            ("10% off", SpecialOfferType.PERCENT_DISCOUNT, 10.0),
+        ],
+    )
+    def test_rules_match_the_builtin_strategies(self, text: str, offer_type: SpecialOfferType, argument):
+        """A rule for a built-in offer gives the built-in discounts, as floats and as cents, over columns."""
+        rule = compile_rule(text)
+        strategy = IDiscountStrategyFactory.get_strategy(offer_type)
+        quantities = np.arange(0, 12, 0.5)
+        unit_prices = np.full(len(quantities), 1.79)
+        cents = np.full(len(quantities), 179)
+        arguments = np.full(len(quantities), argument if argument is not None else np.nan)
+
+        assert np.array_equal(
+            rule.discount_amount(quantities, unit_prices, None), strategy.discount_amount(quantities, unit_prices, arguments)
+        )
+        assert np.array_equal(
+            rule.discount_cents(to_quantity(quantities), cents, None),
+            strategy.discount_cents(to_quantity(quantities), cents, arguments),
+        )
+        assert rule.group(1.79, None) == strategy.group(1.79, argument)
+
+    def test_rules_are_compiled_once(self):
+        """Rule text is normalized, and the same rule is the same strategy instance."""
+        rule = compile_rule("Buy 2  get 1 FREE")
+
+        assert rule is compile_rule("buy 2 get 1 free")
+        assert isinstance(rule, OfferRule) and rule.text == "buy 2 get 1 free"
+        assert "(quantity // 3)" in rule.source
+        assert compile_rule("5% off from 2,10% off from 5").text == "5% off from 2, 10% off from 5"
+
+    @pytest.mark.parametrize(
+        "text", ["3 for", "buy 0 get 1 free", "buy 2 get 1", "120% off", "10% off from 5, 5% off from 2", "free lunch"]
+    )
+    def test_invalid_rules(self, text: str):
+        """Text that is no valid rule is rejected when compiled."""
+        with pytest.raises(ValueError):
+            compile_rule(text)
+
+    def test_new_shapes_at_checkout(self, teller: Teller, products: Dict[str, Product]):
+        """Rules without a built-in strategy price carts the same one by one, in batches and in cents."""
+        with teller.update_offers() as update:
+            update.add_special_offer(compile_rule("buy 2 get 1 half price"), products["toothbrush"])
+            update.add_special_offer(compile_rule("3 for 5"), products["rice"])
+            update.add_special_offer(compile_rule("5% off from 2, 10% off from 5"), products["apples"])
+        cart = ShoppingCart()
+        cart.add_item_quantity(products["toothbrush"], 6)
+        cart.add_item_quantity(products["rice"], 7)
+        cart.add_item_quantity(products["apples"], 2.5)
+
+        receipt = teller.checks_out_articles_from(cart)
+
+        assert [description for _, description, _ in described(receipt)] == [
+            "buy 2 get 1 half price",
+            "3 for 5",
+            "5% off from 2, 10% off from 5",
+        ]
+        assert [amount for _, _, amount in described(receipt)] == pytest.approx([-0.99, -4.94, -2.5 * 1.99 * 0.05])
+        assert described(teller.checks_out_many([cart])[0]) == described(receipt)
+
+        exact_teller = ExactTeller(teller.catalog)
+        with exact_teller.update_offers() as update:
+            for product, offers in teller.offers.items():
+                for offer in offers:
+                    update.add_special_offer(offer.offer_type, product, offer.argument)
+        exact_amounts = [int(amount) for _, _, amount in described(exact_teller.checks_out_articles_from(cart))]
+        assert exact_amounts == [-100, -494, -25]
+
+    def test_rules_combine_with_other_offers(self, teller: Teller, products: Dict[str, Product]):
+        """A product's rule and built-in offers are split for the best discount."""
+        teller.add_special_offer(compile_rule("buy 2 get 1 free"), products["toothbrush"])
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["toothbrush"], 10.0)
+        cart = ShoppingCart()
+        cart.add_item_quantity(products["toothbrush"], 4)
+
+        receipt = teller.checks_out_articles_from(cart)
+
+        assert [description for _, description, _ in described(receipt)] == ["buy 2 get 1 free", "10.0% off"]
+        assert [amount for _, _, amount in described(receipt)] == pytest.approx([-0.99, -0.099])
+
+    @pytest.mark.parametrize(
+        "quantity, expected", [(5, [("3.0% off", -0.15)]), (15, [("5% off from 10, 10% off from 20", -0.75)])]
+    )
+    def test_tiers_combine_with_other_offers(self, catalog, quantity: int, expected):
+        """A tier applies to the whole line or not at all, whichever gives more with the other offers."""
+        product = Product("tiered soap", ProductUnit.EACH)
+        catalog.add_product(product, 1.0)
+        teller = Teller(catalog)
+        teller.add_special_offer(compile_rule("5% off from 10, 10% off from 20"), product)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, product, 3.0)
+        cart = ShoppingCart()
+        cart.add_item_quantity(product, quantity)
+
+        receipt = teller.checks_out_articles_from(cart)
+
+        assert [(description, amount) for _, description, amount in described(receipt)] == pytest.approx(expected)
+        assert described(teller.checks_out_many([cart])[0]) == described(receipt)
+
+        cart.add_item_quantity(product, 25 - quantity)
+        assert described(teller.checks_out_articles_from(cart)) == [
+            ("tiered soap", "5% off from 10, 10% off from 20", pytest.approx(-2.5))
+        ]
+
+
+class TestLoadOffers:
+    """Tests for loading offers from an offers CSV."""
+
+    def test_loads_rules_and_builtin_offers(self, tmp_path, teller: Teller, products: Dict[str, Product]):
+        """Rows with a rule or an offer type become offers, scheduled if they have a window."""
+        source = tmp_path / "offers.csv"
+        source.write_text(OFFERS_CSV)
+
+        with teller.update_offers() as update:
+            assert load_offers(source, update, teller.catalog) == 3
+
+        assert teller.offers[products["toothbrush"]][0].offer_type is compile_rule("buy 2 get 1 half price")
+        assert teller.offers[products["rice"]][0].offer_type == SpecialOfferType.PERCENT_DISCOUNT
+        assert products["apples"] not in teller.offers
+        assert [offer.product for offer in teller.schedule.active(1500.0).offers] == [products["apples"]]
+
+    def test_loads_the_name_offer_argument_layout(self, tmp_path, teller: Teller, products: Dict[str, Product]):
+        """The name,offer,argument layout of the texttest offers files loads too."""
+        source = tmp_path / "offers.csv"
+        source.write_text("name,offer,argument\ntoothbrush,THREE_FOR_TWO,0\nrice,TEN_PERCENT_DISCOUNT,10\n")
+
+        with teller.update_offers() as update:
+            assert load_offers(source, update, teller.catalog) == 2
+
+        assert teller.offers[products["toothbrush"]][0].offer_type == SpecialOfferType.THREE_FOR_TWO
+        assert teller.offers[products["rice"]][0].offer_type == SpecialOfferType.PERCENT_DISCOUNT
+        assert teller.offers[products["rice"]][0].argument == 10
+
+    def test_invalid_row_publishes_nothing(self, tmp_path, teller: Teller, products: Dict[str, Product]):
+        """An invalid row is reported with its line, and the update is not published."""
+        source = tmp_path / "offers.csv"
+        source.write_text(OFFERS_CSV + "caviar,10% off,,,,\n")
+        snapshot = teller.offers_snapshot
+
+        with pytest.raises(ValueError, match="line 5: unknown product: 'caviar'"):
+            with teller.update_offers() as update:
+                load_offers(source, update, teller.catalog)
+
+        assert teller.offers_snapshot is snapshot
@@ -0,0 +1,96 @@
+import random
+import pytest
+from typing import Dict
+from src.models import Offer, Product, SpecialOfferType
+from src.handlers.offer_schedule import OfferSchedule
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+class TestOfferSchedule:
+    """Tests for resolving scheduled offers at a time."""
+
+    def test_active_offers_and_window(self, products: Dict[str, Product]):
+        """Offers are active from start until end, and the window runs between the nearest boundaries."""
+        morning = Offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], start=100.0, end=200.0)
+        from_noon = Offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0, start=150.0)
+        schedule = OfferSchedule([morning]).with_offers([from_noon])
+
+        assert schedule.active(50.0) == (-float("inf"), 100.0, [])
+        assert schedule.active(100.0) == (100.0, 150.0, [morning])
+        assert schedule.active(170.0) == (150.0, 200.0, [morning, from_noon])
+        assert schedule.active(200.0) == (200.0, float("inf"), [from_noon])
+
+    def test_matches_a_scan_of_thousands_of_offers(self, products: Dict[str, Product]):
+        """The index returns the same offers as checking every window."""
+        rng = random.Random(20)
+        starts = [rng.uniform(0, 1_000) for _ in range(5_000)]
+        schedule = OfferSchedule(
+            Offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], start=start, end=start + 10) for start in starts
+        )
+
+        for at in (rng.uniform(-10, 1_020) for _ in range(20)):
+            active = schedule.active(at)
+            assert active.offers == [offer for offer in schedule.offers if offer.start <= at < offer.end]
+            assert all(offer.start <= active.start and active.end <= offer.end for offer in active.offers)
+
+    def test_offer_must_end_after_it_starts(self, products: Dict[str, Product]):
+        """An empty validity window is rejected."""
+        with pytest.raises(ValueError):
+            Offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], start=10.0, end=10.0)
+
+
+class TestScheduledOffers:
+    """Tests for checking out with scheduled offers."""
+
+    @pytest.fixture
+    def cart(self, products: Dict[str, Product]) -> ShoppingCart:
+        cart = ShoppingCart()
+        cart.add_item_quantity(products["toothbrush"], 3)
+        cart.add_item_quantity(products["rice"], 1)
+        return cart
+
+    def test_offer_applies_only_in_its_window(self, teller: Teller, products: Dict[str, Product], cart):
+        """Single and batch checkouts apply the offers valid at their time, next to permanent ones."""
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], start=100.0, end=200.0)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0)
+
+        def descriptions(receipt):
+            return [discount.description for discount in receipt.discounts]
+
+        assert descriptions(teller.checks_out_articles_from(cart, at=99.0)) == ["10.0% off"]
+        assert descriptions(teller.checks_out_articles_from(cart, at=100.0)) == ["3 for 2", "10.0% off"]
+        assert descriptions(teller.checks_out_articles_from(cart, at=200.0)) == ["10.0% off"]
+        assert [descriptions(receipt) for receipt in teller.checks_out_many([cart], at=150.0)] == [
+            ["3 for 2", "10.0% off"]
+        ]
+
+    def test_plan_is_reused_until_a_boundary(self, teller: Teller, products: Dict[str, Product], cart):
+        """Checkouts inside a window share one compiled plan; adding an offer or crossing a boundary rebuilds it."""
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], start=100.0, end=200.0)
+
+        plan = teller.plan_at(120.0)
+        assert teller.plan_at(199.0) is plan
+        assert teller.plan_at(200.0) is not plan
+        assert teller.plan_at(120.0) is not plan
+
+        plan = teller.plan_at(120.0)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0, end=300.0)
+        assert teller.plan_at(120.0) is not plan
+        assert set(teller.plan_at(120.0).rules) == {products["toothbrush"], products["rice"]}
+
+    def test_without_scheduled_offers_the_plan_ignores_time(self, teller: Teller, products: Dict[str, Product]):
+        """Tellers without scheduled offers keep their single plan."""
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+
+        assert teller.plan_at(0.0) is teller.plan_at(1e12) is teller.pricing_plan
+
+    def test_window_plans_reuse_unchanged_rules(self, teller: Teller, products: Dict[str, Product]):
+        """A boundary only recompiles the products whose offers changed."""
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0)
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], start=100.0, end=200.0)
+
+        before, during = teller.plan_at(50.0), teller.plan_at(150.0)
+
+        assert during.rules[products["rice"]] is before.rules[products["rice"]]
+        assert products["toothbrush"] in during.rules and products["toothbrush"] not in before.rules
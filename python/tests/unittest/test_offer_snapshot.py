@@ -0,0 +1,170 @@
+import sys
+import threading
+import time
+import pytest
+from typing import Dict, List
+from src.models import Bundle, Product, ProductUnit, SpecialOfferType
+from src.handlers.catalog import InMemoryCatalog
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+class TestOfferSnapshots:
+    """Tests for publishing offers as immutable snapshots."""
+
+    def test_published_snapshots_never_change(self, teller: Teller, products: Dict[str, Product]):
+        """A snapshot keeps its offers after later changes, which publish new versions."""
+        before = teller.offers_snapshot
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+        after = teller.offers_snapshot
+        teller.add_bundle_offer(Bundle([products["rice"], products["toothpaste"]], 3.5))
+
+        assert len(before.offers) == 0
+        assert [offer.offer_type for offer in after.offers[products["toothbrush"]]] == [SpecialOfferType.THREE_FOR_TWO]
+        assert after.bundles == ()
+        assert before.version < after.version < teller.offers_snapshot.version
+        assert teller.offers_snapshot.offers is after.offers
+        with pytest.raises(TypeError):
+            after.offers[products["rice"]] = ()
+
+    def test_update_publishes_once(self, teller: Teller, products: Dict[str, Product]):
+        """Changes made in one update become visible together, as one version."""
+        version = teller.offers_snapshot.version
+        with teller.update_offers() as update:
+            update.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+            update.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["toothbrush"], 10.0)
+            update.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0, start=0.0)
+            assert teller.offers_snapshot.version == version
+
+        assert teller.offers_snapshot.version == version + 1
+        assert len(teller.offers[products["toothbrush"]]) == 2
+        assert len(teller.schedule) == 1
+
+    def test_nested_changes_join_the_open_update(self, teller: Teller, products: Dict[str, Product]):
+        """Teller changes made inside an update join it instead of waiting for it."""
+        version = teller.offers_snapshot.version
+        with teller.update_offers() as update:
+            update.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+            teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0)
+            with teller.update_offers() as nested:
+                assert nested is update
+                nested.add_bundle_offer(Bundle([products["rice"], products["toothpaste"]], 3.5))
+            assert teller.offers_snapshot.version == version
+
+        assert teller.offers_snapshot.version == version + 1
+        assert set(teller.offers) == {products["toothbrush"], products["rice"]}
+        assert len(teller.bundles) == 1
+
+    def test_failed_update_publishes_nothing(self, teller: Teller, products: Dict[str, Product]):
+        """An update that raises leaves the published snapshot as it was."""
+        snapshot = teller.offers_snapshot
+        with pytest.raises(ValueError):
+            with teller.update_offers() as update:
+                update.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+                update.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["rice"], start=5.0, end=1.0)
+
+        assert teller.offers_snapshot is snapshot
+
+    def test_published_update_is_sealed(self, teller: Teller, products: Dict[str, Product]):
+        """An update kept after its block cannot change the snapshot it published."""
+        with teller.update_offers() as update:
+            update.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+        snapshot = teller.offers_snapshot
+
+        with pytest.raises(RuntimeError):
+            update.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["rice"])
+        with pytest.raises(RuntimeError):
+            update.add_bundle_offer(Bundle([products["rice"], products["toothpaste"]], 3.5))
+
+        assert list(snapshot.offers) == [products["toothbrush"]]
+        assert teller.offers_snapshot is snapshot
+
+    def test_offers_can_be_replaced_and_removed(self, teller: Teller, products: Dict[str, Product]):
+        """Adding an offer twice keeps one; replace and remove_offers drop the product's other offers."""
+        toothbrush, rice = products["toothbrush"], products["rice"]
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, toothbrush, 10.0)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, toothbrush, 10.0)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, rice, 5.0, start=0.0)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, rice, 5.0, start=0.0)
+        assert len(teller.offers[toothbrush]) == 1
+        assert len(teller.schedule) == 1
+
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, toothbrush, replace=True)
+        assert [offer.offer_type for offer in teller.offers[toothbrush]] == [SpecialOfferType.THREE_FOR_TWO]
+
+        version = teller.offers_snapshot.version
+        with teller.update_offers() as update:
+            update.remove_offers(rice)
+            update.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, rice, 20.0, start=10.0)
+            update.remove_offers(toothbrush)
+        assert teller.offers_snapshot.version == version + 1
+        assert toothbrush not in teller.offers
+        assert [offer.argument for offer in teller.schedule.offers] == [20.0]
+
+        teller.remove_offers(toothbrush)
+        assert teller.offers_snapshot.version == version + 1
+
+
+class TestConcurrentLanes:
+    """Stress test for checkouts on many threads while offers change."""
+
+    def test_lanes_see_consistent_snapshots(self):
+        """
+        One writer adds offers in updates of five products, in order, while lanes check out
+        carts of all products; every receipt must reflect one snapshot, i.e. a prefix of
+        those offers made of whole updates.
+        """
+        catalog = InMemoryCatalog()
+        products = [Product(f"lane product {index}", ProductUnit.EACH) for index in range(60)]
+        for product in products:
+            catalog.add_product(product, 1.0)
+        position = {product: index for index, product in enumerate(products)}
+        teller = Teller(catalog)
+        cart = ShoppingCart()
+        for product in products:
+            cart.add_item_quantity(product, 3)
+
+        errors: List[BaseException] = []
+        done = threading.Event()
+
+        def check(receipt) -> None:
+            discounted = sorted(position[discount.product] for discount in receipt.discounts)
+            assert discounted == list(range(len(discounted))) and len(discounted) % 5 == 0, discounted
+
+        def lane(batch: bool) -> None:
+            try:
+                while not done.is_set():
+                    if batch:
+                        for receipt in teller.checks_out_many([cart, cart]):
+                            check(receipt)
+                    else:
+                        check(teller.checks_out_articles_from(cart))
+            except BaseException as error:
+                errors.append(error)
+
+        def writer() -> None:
+            try:
+                for start in range(0, len(products), 5):
+                    with teller.update_offers() as update:
+                        for product in products[start:start + 5]:
+                            update.add_special_offer(SpecialOfferType.THREE_FOR_TWO, product)
+                            time.sleep(0.0002)
+            except BaseException as error:
+                errors.append(error)
+            finally:
+                done.set()
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=lane, args=(index % 2 == 1,)) for index in range(4)]
+            threads.append(threading.Thread(target=writer))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert errors == []
+        assert len(teller.checks_out_articles_from(cart).discounts) == len(products)
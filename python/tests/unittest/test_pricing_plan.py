@@ -0,0 +1,71 @@
+import pytest
+from typing import Dict
+from src.models import Offer, Product, SpecialOfferType
+from src.handlers.discount_calculator import IDiscountStrategyFactory
+from src.handlers.pricing_plan import PricingPlan
+from src.handlers.receipt import Receipt
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+class TestPricingPlan:
+    """Tests for the compiled pricing plan of the teller."""
+
+    def test_plan_is_reused_until_offers_change(self, teller: Teller, products: Dict[str, Product]):
+        """The plan is only rebuilt when add_special_offer changes the offers."""
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"], None)
+        plan = teller.pricing_plan
+
+        assert teller.pricing_plan is plan
+        assert products["toothbrush"] in plan
+
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["rice"], 10.0)
+        rebuilt = teller.pricing_plan
+
+        assert rebuilt is not plan
+        assert rebuilt.version > plan.version
+        assert len(rebuilt) == 2
+
+    def test_rule_uses_prebuilt_description(self, products: Dict[str, Product]):
+        """A compiled rule returns the same discount as the strategy would."""
+        toothpaste = products["toothpaste"]
+        teller = Teller(None)
+        teller.add_special_offer(SpecialOfferType.FIVE_FOR_AMOUNT, toothpaste, 7.49)
+        rule = teller.pricing_plan.rules[toothpaste]
+
+        (discount,) = rule(5, 1.79)
+
+        assert discount.product == toothpaste
+        assert discount.description == "5 for 7.49"
+        assert discount.discount_amount == pytest.approx(-1.46, 0.01)
+        assert rule(4, 1.79) == ()
+
+    def test_cart_accepts_an_offers_mapping(self, teller: Teller, products: Dict[str, Product], cart: ShoppingCart):
+        """handle_offers still takes the offers dict it took before plans, and prices it like the plan."""
+        toothbrush, rice = products["toothbrush"], products["rice"]
+        teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, toothbrush, None)
+        teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, rice, 10.0)
+        cart.add_item_quantity(toothbrush, 3)
+        cart.add_item_quantity(rice, 2)
+        offers = {
+            toothbrush: Offer(SpecialOfferType.THREE_FOR_TWO, toothbrush, None),
+            rice: Offer(SpecialOfferType.PERCENT_DISCOUNT, rice, 10.0),
+        }
+
+        from_mapping, from_plan = Receipt(), Receipt()
+        cart.handle_offers(from_mapping, offers, teller.catalog)
+        cart.handle_offers(from_plan, teller.pricing_plan, teller.catalog)
+
+        assert [(d.product, d.description, d.discount_amount) for d in from_mapping.discounts] == [
+            (d.product, d.description, d.discount_amount) for d in from_plan.discounts
+        ]
+        assert len(from_mapping.discounts) == 2
+
+    def test_strategies_are_shared(self):
+        """The factory hands out one strategy instance per offer type."""
+        for offer_type in SpecialOfferType:
+            assert IDiscountStrategyFactory.get_strategy(offer_type) is IDiscountStrategyFactory.get_strategy(offer_type)
+
+    def test_empty_plan(self):
+        """A plan without offers has no rules."""
+        assert len(PricingPlan({})) == 0
@@ -0,0 +1,49 @@
+import pytest
+from typing import Dict
+from src.models import Discount, Product, ReceiptItem
+from src.handlers.receipt import Receipt
+
+
+class TestReceipt:
+    """Tests for the running totals and read-only views of a receipt."""
+
+    def test_total_is_kept_up_to_date(self, products: Dict[str, Product]):
+        """The total follows every added item and discount."""
+        receipt = Receipt()
+        assert receipt.total_price() == 0
+
+        receipt.add_product(products["rice"], 2, 2.49, 4.98)
+        assert receipt.total_price() == pytest.approx(4.98)
+
+        receipt.add_items([ReceiptItem(products["apples"], 1, 1.99, 1.99)])
+        receipt.add_discount(Discount(products["rice"], "10.0% off", -0.498))
+        assert receipt.total_price() == pytest.approx(4.98 + 1.99 - 0.498)
+
+    def test_total_matches_summing_the_lines(self, products: Dict[str, Product]):
+        """The running total is summed in the same order as walking the lines."""
+        receipt = Receipt()
+        for index, product in enumerate(products.values()):
+            receipt.add_product(product, index + 0.1, 0.7, (index + 0.1) * 0.7)
+        receipt.add_discount(Discount(products["rice"], "x", -0.333))
+
+        expected = 0
+        for item in receipt.items:
+            expected += item.total_price
+        for discount in receipt.discounts:
+            expected += discount.discount_amount
+        assert receipt.total_price() == expected
+
+    def test_views_are_read_only_and_not_copied(self, products: Dict[str, Product]):
+        """Items and discounts are live views that cannot be modified."""
+        receipt = Receipt()
+        items = receipt.items
+        receipt.add_product(products["rice"], 1, 2.49, 2.49)
+
+        assert receipt.items is items
+        assert len(items) == 1
+        assert items[0].product == products["rice"]
+        assert receipt.discounts == []
+        with pytest.raises(TypeError):
+            items[0] = None
+        with pytest.raises(AttributeError):
+            items.append(None)
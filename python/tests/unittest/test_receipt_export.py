@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from typing import Dict
+from src.models import Product, SpecialOfferType
+from src.money import Money
+from src.handlers.exact_teller import ExactTeller
+from src.handlers.receipt_export import ReceiptColumns, ReceiptExporter, column_path
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+@pytest.fixture
+def receipts(teller: Teller, products: Dict[str, Product]):
+    """Fixture for two receipts, the first with two discounts."""
+    teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, products["toothbrush"])
+    teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["apples"], 20.0)
+    first, second = ShoppingCart(), ShoppingCart()
+    first.add_item_quantity(products["toothbrush"], 3)
+    first.add_item_quantity(products["apples"], 2.5)
+    second.add_item_quantity(products["rice"], 2)
+    return teller.checks_out_many([first, second])
+
+
+class TestReceiptExport:
+    """Tests for the columnar receipt export."""
+
+    def test_round_trip(self, tmp_path, receipts, products: Dict[str, Product]):
+        """Every item and discount is read back from the memory-mapped columns."""
+        assert ReceiptExporter(tmp_path).append(receipts) == 2
+        columns = ReceiptColumns(tmp_path)
+
+        assert len(columns) == 2
+        assert columns.receipts["total"].tolist() == pytest.approx([r.total_price() for r in receipts])
+        assert columns.items["receipt"].tolist() == [0, 0, 1]
+        assert [columns.products[i] for i in columns.items["product"]] == [
+            products["toothbrush"], products["apples"], products["rice"],
+        ]
+        assert columns.items["quantity"].tolist() == [3, 2.5, 2]
+        assert columns.items["price"].tolist() == [0.99, 1.99, 2.49]
+        assert columns.items["total"].tolist() == pytest.approx([2.97, 4.975, 4.98])
+        assert columns.discounts["receipt"].tolist() == [0, 0]
+        assert [columns.descriptions[i] for i in columns.discounts["description"]] == ["3 for 2", "20.0% off"]
+        assert columns.discounts["amount"].tolist() == pytest.approx([-0.99, -0.995])
+        assert isinstance(columns.items["total"], np.memmap)
+
+    def test_appending_continues_numbering(self, tmp_path, receipts, products: Dict[str, Product]):
+        """A later exporter appends after the existing receipts and reuses the dictionaries."""
+        ReceiptExporter(tmp_path).append(receipts)
+        ReceiptExporter(tmp_path).append(receipts[:1])
+        columns = ReceiptColumns(tmp_path)
+
+        assert len(columns) == 3
+        assert columns.items["receipt"].tolist() == [0, 0, 1, 2, 2]
+        assert columns.items["product"].tolist() == [0, 1, 2, 0, 1]
+        assert len(columns.products) == 3
+        assert len(columns.descriptions) == 2
+        assert np.bincount(columns.discounts["receipt"], minlength=len(columns)).tolist() == [2, 0, 2]
+
+    def test_interrupted_append_is_ignored(self, tmp_path, receipts):
+        """Columns cut short by an interrupted append are aligned to their shortest column."""
+        ReceiptExporter(tmp_path).append(receipts)
+        with open(column_path(tmp_path, "items", "quantity"), "ab") as f:
+            f.write(np.ones(2).tobytes())
+
+        assert len(ReceiptColumns(tmp_path).items["quantity"]) == 3
+
+    def test_append_after_interrupted_append(self, tmp_path, receipts, products: Dict[str, Product]):
+        """Rows written by an uncommitted append are dropped when the export is opened again."""
+        ReceiptExporter(tmp_path).append(receipts)
+        with open(column_path(tmp_path, "receipts", "total"), "ab") as f:
+            f.write(np.ones(1).tobytes())
+        with open(column_path(tmp_path, "items", "receipt"), "ab") as f:
+            f.write(np.full(2, 2, dtype=np.int64).tobytes())
+        with open(tmp_path / "products.csv", "a") as f:
+            f.write("half a prod")
+
+        ReceiptExporter(tmp_path).append(receipts[1:])
+        columns = ReceiptColumns(tmp_path)
+
+        assert len(columns) == 3
+        assert columns.items["receipt"].tolist() == [0, 0, 1, 2]
+        assert columns.items["product"].tolist() == [0, 1, 2, 2]
+        assert columns.products == [products["toothbrush"], products["apples"], products["rice"]]
+
+    def test_exact_receipts(self, tmp_path, catalog, products: Dict[str, Product]):
+        """Money amounts are exported as prices, not as cents."""
+        cart = ShoppingCart()
+        cart.add_item_quantity(products["toothpaste"], 2)
+        receipt = ExactTeller(catalog).checks_out_articles_from(cart)
+
+        ReceiptExporter(tmp_path).append([receipt])
+        columns = ReceiptColumns(tmp_path)
+
+        assert receipt.total_price() == Money(358)
+        assert columns.receipts["total"].tolist() == [3.58]
+        assert columns.items["price"].tolist() == [1.79]
+
+    def test_empty_export(self, tmp_path):
+        """An empty directory reads as empty columns."""
+        columns = ReceiptColumns(tmp_path)
+
+        assert len(columns) == 0
+        assert columns.items["total"].dtype == np.float64
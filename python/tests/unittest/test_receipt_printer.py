@@ -0,0 +1,72 @@
+import io
+from typing import Dict
+from src.models import Product, SpecialOfferType
+from src.handlers.receipt import Receipt
+from src.handlers.receipt_printer import ReceiptPrinter
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.teller import Teller
+
+
+def make_receipt(teller: Teller, products: Dict[str, Product], cart: ShoppingCart) -> Receipt:
+    teller.add_special_offer(SpecialOfferType.PERCENT_DISCOUNT, products["apples"], 20.0)
+    teller.add_special_offer(SpecialOfferType.FIVE_FOR_AMOUNT, products["toothpaste"], 7.49)
+    cart.add_item_quantity(products["apples"], 3)
+    cart.add_item_quantity(products["toothpaste"], 5)
+    cart.add_item(products["rice"])
+    return teller.checks_out_articles_from(cart)
+
+
+class TestReceiptPrinter:
+    """Tests for printing and streaming receipts."""
+
+    def test_print_receipt(self, teller: Teller, products: Dict[str, Product], cart: ShoppingCart):
+        """The printed receipt lists items, discounts and the total."""
+        printed = ReceiptPrinter().print_receipt(make_receipt(teller, products, cart))
+
+        assert printed == (
+            "apples                              5.97\n"
+            "  1.99 * 3\n"
+            "toothpaste                          8.95\n"
+            "  1.79 * 5\n"
+            "rice                                2.49\n"
+            "20.0% off (apples)                 -1.19\n"
+            "5 for 7.49 (toothpaste)            -1.46\n"
+            "\n"
+            "Total:                             14.76\n"
+        )
+
+    def test_iter_lines_matches_print_receipt(self, teller: Teller, products: Dict[str, Product], cart: ShoppingCart):
+        """Streaming the lines gives the same text, and the total matches the receipt."""
+        printer = ReceiptPrinter()
+        receipt = make_receipt(teller, products, cart)
+        lines = list(printer.iter_lines(receipt))
+
+        assert "".join(lines) == printer.print_receipt(receipt)
+        assert lines[-1] == printer.present_total(receipt)
+
+    def test_write_receipt_to_text_and_binary_sinks(
+        self, teller: Teller, products: Dict[str, Product], cart: ShoppingCart
+    ):
+        """A receipt can be written to text and binary file-like objects."""
+        printer = ReceiptPrinter()
+        receipt = make_receipt(teller, products, cart)
+        text, binary = io.StringIO(), io.BytesIO()
+
+        printer.write_receipt(receipt, text)
+        printer.write_receipt(receipt, binary)
+
+        assert text.getvalue() == printer.print_receipt(receipt)
+        assert binary.getvalue().decode("utf-8") == printer.print_receipt(receipt)
+
+    def test_write_many_receipts_with_small_buffer(
+        self, teller: Teller, products: Dict[str, Product], cart: ShoppingCart
+    ):
+        """Receipts are separated and fully written whatever the buffer size."""
+        printer = ReceiptPrinter()
+        receipt = make_receipt(teller, products, cart)
+        stream = io.StringIO()
+
+        printer.write_receipts([receipt, Receipt(), receipt], stream, buffer_size=16)
+
+        expected = "\n".join(printer.print_receipt(r) for r in (receipt, Receipt(), receipt))
+        assert stream.getvalue() == expected
@@ -0,0 +1,135 @@
+import multiprocessing
+import threading
+import uuid
+import pytest
+from typing import List, Optional, Tuple
+from src.models import Product, ProductUnit
+from src.handlers.shared_catalog import SharedCatalog, SharedCatalogLoader, segment_name
+
+_worker_catalog: Optional[SharedCatalog] = None
+
+
+def _attach_worker(name: str) -> None:
+    global _worker_catalog
+    _worker_catalog = SharedCatalog(name)
+
+
+def _worker_prices(skus: List[int]) -> Tuple[int, List[float]]:
+    products = [_worker_catalog.product_by_sku(sku) for sku in skus]
+    return _worker_catalog.generation, _worker_catalog.unit_prices(products)
+
+
+@pytest.fixture
+def loader():
+    """Fixture for a loader that published a small catalog as generation 1."""
+    with SharedCatalogLoader(f"srcat-{uuid.uuid4().hex[:8]}") as loader:
+        loader.publish(
+            [
+                ("shared rice", ProductUnit.EACH, 2.49, 5430001),
+                ("shared apples", ProductUnit.KILO, 1.99, 5430002),
+                ("shared cheddar", ProductUnit.EACH, 3.5, None),
+            ]
+        )
+        yield loader
+
+
+class TestSharedCatalog:
+    """Tests for the catalog shared between processes through shared memory."""
+
+    def test_lookups(self, loader: SharedCatalogLoader):
+        """A reader finds the published products by SKU, name and prefix, and cannot change them."""
+        catalog = SharedCatalog(loader.name)
+        try:
+            apples = catalog.product_by_sku(5430002)
+            assert apples is Product("shared apples", ProductUnit.KILO)
+            assert catalog.unit_prices([apples, Product("shared cheddar", ProductUnit.EACH)]) == [1.99, 3.5]
+            assert [product.name for product in catalog.products_with_prefix("shared ch")] == ["shared cheddar"]
+            assert len(catalog) == 3 and catalog.generation == 1
+            with pytest.raises(TypeError, match="read-only"):
+                catalog.add_product(apples, 1.0)
+        finally:
+            catalog.close()
+
+    def test_generation_swap(self, loader: SharedCatalogLoader):
+        """Readers move to a newly published generation, and the one before it is unlinked."""
+        catalog = SharedCatalog(loader.name)
+        rice = catalog.product_by_sku(5430001)
+        try:
+            assert loader.publish_products([(rice, 2.29)]) == 2
+            assert catalog.unit_price(rice) == 2.29
+            assert len(catalog) == 1 and catalog.generation == 2
+            with pytest.raises(FileNotFoundError):
+                SharedCatalog(segment_name(loader.name, 1))
+        finally:
+            catalog.close()
+
+    def test_lookups_during_swaps_see_one_generation(self, loader: SharedCatalogLoader):
+        """While generations are published, every bulk lookup prices all products from one of them."""
+        products = [Product(f"shared swap {index}", ProductUnit.EACH, sku=5440000 + index) for index in range(50)]
+        loader.publish_products((product, 1.0) for product in products)
+        catalog = SharedCatalog(loader.name)
+        seen: List[List[float]] = []
+        done = threading.Event()
+
+        def lookups() -> None:
+            while not done.is_set():
+                seen.append(catalog.unit_prices(products))
+
+        reader = threading.Thread(target=lookups)
+        reader.start()
+        try:
+            for generation in range(2, 40):
+                loader.publish_products((product, float(generation)) for product in products)
+        finally:
+            done.set()
+            reader.join()
+            catalog.close()
+
+        assert seen and all(len(set(prices)) == 1 for prices in seen)
+
+    def test_generation_in_use_survives_two_swaps(self, loader: SharedCatalogLoader):
+        """A generation a lookup still holds stays mapped across swaps, and is unmapped once released."""
+        catalog = SharedCatalog(loader.name)
+        rice = catalog.product_by_sku(5430001)
+        try:
+            image = catalog._image()
+            loader.publish_products([(rice, 2.29)])
+            assert catalog.unit_price(rice) == 2.29
+            loader.publish_products([(rice, 2.19)])
+            assert catalog.unit_price(rice) == 2.19
+
+            assert image.unit_price(rice) == 2.49
+            assert image.product_by_name("shared cheddar").sku is None
+            assert catalog.mapped_generations == 2
+
+            del image
+            loader.publish_products([(rice, 2.09)])
+            assert catalog.unit_price(rice) == 2.09
+            assert catalog.mapped_generations == 1
+        finally:
+            catalog.close()
+        assert catalog.mapped_generations == 0
+
+    def test_worker_processes_share_the_catalog(self, loader: SharedCatalogLoader):
+        """Worker processes attach to the loader's catalog and follow its generations."""
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        skus = [5430001, 5430002]
+        with context.Pool(2, initializer=_attach_worker, initargs=(loader.name,)) as pool:
+            assert pool.map(_worker_prices, [skus, skus]) == [(1, [2.49, 1.99])] * 2
+            loader.publish(
+                [
+                    ("shared rice", ProductUnit.EACH, 2.29, 5430001),
+                    ("shared apples", ProductUnit.KILO, 2.19, 5430002),
+                ]
+            )
+            assert pool.map(_worker_prices, [skus, skus]) == [(2, [2.29, 2.19])] * 2
+
+    def test_attaching_needs_a_published_catalog(self):
+        """Attaching to a missing or still empty catalog fails."""
+        name = f"srcat-{uuid.uuid4().hex[:8]}"
+        with pytest.raises(FileNotFoundError):
+            SharedCatalog(name)
+        with SharedCatalogLoader(name):
+            with pytest.raises(ValueError):
+                SharedCatalog(name)
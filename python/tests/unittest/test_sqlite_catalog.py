@@ -0,0 +1,72 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from src.models import Product, ProductUnit, SpecialOfferType
+from src.handlers.catalog import CachingCatalog, ISupermarketCatalog
+from src.handlers.shopping_cart import ShoppingCart
+from src.handlers.sqlite_catalog import SqliteCatalog
+from src.handlers.teller import Teller
+
+
+@pytest.fixture
+def sqlite_catalog(products: Dict[str, Product], catalog: ISupermarketCatalog):
+    """Fixture for a SQLite catalog holding the common products."""
+    sqlite = SqliteCatalog.in_memory(pool_size=2)
+    sqlite.add_products((product, catalog.unit_price(product)) for product in products.values())
+    yield sqlite
+    sqlite.close()
+
+
+class TestSqliteCatalog:
+    """Tests for the SQLite-backed catalog and the bulk price lookup."""
+
+    def test_unit_price(self, sqlite_catalog: SqliteCatalog, products: Dict[str, Product]):
+        """Single lookups return the stored price, or 0.0 for unknown products."""
+        assert sqlite_catalog.unit_price(products["rice"]) == 2.49
+        assert sqlite_catalog.unit_price(Product("unknown", ProductUnit.EACH)) == 0.0
+
+    def test_unit_prices_keeps_order_and_duplicates(self, sqlite_catalog: SqliteCatalog, products: Dict[str, Product]):
+        """Bulk lookups return one price per requested product, in order."""
+        rice, apples = products["rice"], products["apples"]
+        unknown = Product("unknown", ProductUnit.EACH)
+
+        assert sqlite_catalog.unit_prices([rice, unknown, apples, rice]) == [2.49, 0.0, 1.99, 2.49]
+        assert sqlite_catalog.unit_prices([]) == []
+
+    def test_unit_prices_spans_several_batches(self):
+        """Lookups larger than one IN (...) batch are split and padded."""
+        sqlite = SqliteCatalog.in_memory()
+        many = [(Product(f"item {i}", ProductUnit.EACH), float(i)) for i in range(1234)]
+        sqlite.add_products(many)
+
+        assert sqlite.unit_prices(product for product, _ in many) == [price for _, price in many]
+        sqlite.close()
+
+    def test_update_price(self, sqlite_catalog: SqliteCatalog, products: Dict[str, Product]):
+        """Adding a known product again updates its price."""
+        sqlite_catalog.add_product(products["rice"], 1.49)
+
+        assert sqlite_catalog.unit_price(products["rice"]) == 1.49
+
+    def test_concurrent_lookups_share_the_pool(self, sqlite_catalog: SqliteCatalog, products: Dict[str, Product]):
+        """More threads than pooled connections can look up prices safely."""
+        names = list(products.values()) * 20
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            prices = list(executor.map(sqlite_catalog.unit_price, names))
+
+        assert prices == sqlite_catalog.unit_prices(names)
+        assert len(sqlite_catalog.pool._opened) <= 2
+
+    def test_checkout_against_sqlite(self, sqlite_catalog: SqliteCatalog, products: Dict[str, Product]):
+        """The teller prices a cart through the bulk lookup, cached or not."""
+        for catalog in (sqlite_catalog, CachingCatalog(sqlite_catalog)):
+            teller = Teller(catalog)
+            teller.add_special_offer(SpecialOfferType.FIVE_FOR_AMOUNT, products["toothpaste"], 7.49)
+            cart = ShoppingCart()
+            cart.add_item_quantity(products["toothpaste"], 5)
+            cart.add_item_quantity(products["rice"], 2)
+
+            receipt = teller.checks_out_articles_from(cart)
+
+            assert receipt.total_price() == pytest.approx(7.49 + 2 * 2.49, 0.01)
+            assert len(receipt.discounts) == 1
@@ -7,3 +7,6 @@ class SupermarketCatalog:
     def unit_price(self, product):
         raise Exception("cannot be called from a unit test - it accesses the database")
 
+    def product_with_name(self, name):
+        raise Exception("cannot be called from a unit test - it accesses the database")
+
@@ -26,4 +26,4 @@ class Teller:
         return receipt
 
     def product_with_name(self, name):
-        return self.catalog.products.get(name, None)
\ No newline at end of file
+        return self.catalog.product_with_name(name)
\ No newline at end of file
@@ -2,9 +2,17 @@
 Start texttest from a command prompt in the same folder as this file with this command:
 
 texttest -a sr -d .
+
+To re-price a whole transaction log, pass a multi-basket CSV with the columns
+basket_id,name,quantity (rows of one basket must be consecutive):
+
+python texttest_fixture.py --baskets baskets.csv --workers 8 > receipts.txt
 """
 
+import argparse
 import sys,csv
+from itertools import groupby, islice
+from multiprocessing import Pool
 from pathlib import Path
 
 from model_objects import Product, SpecialOfferType, ProductUnit
@@ -29,6 +37,14 @@ def read_catalog(catalog_file):
     return catalog
 
 
+def product_named(catalog, name):
+    """Looks a product up by name in a catalog or teller; unknown names raise KeyError."""
+    product = catalog.product_with_name(name)
+    if product is None:
+        raise KeyError(f"unknown product: {name!r}")
+    return product
+
+
 def read_offers(offers_file, teller):
     if not offers_file.exists():
         return
@@ -38,7 +54,7 @@ def read_offers(offers_file, teller):
             name = row['name']
             offerType = SpecialOfferType[row['offer']]
             argument = float(row['argument'])
-            product = teller.product_with_name(name)
+            product = product_named(teller, name)
             teller.add_special_offer(offerType, product, argument)
 
 
@@ -51,19 +67,92 @@ def read_basket(cart_file, catalog):
         for row in reader:
             name = row['name']
             quantity = float(row['quantity'])
-            product = catalog.products[name]
+            product = product_named(catalog, name)
             cart.add_item_quantity(product, quantity)
     return cart
 
 
+def read_baskets(baskets_file):
+    """Streams (basket_id, [(name, quantity), ...]) from a CSV of consecutive basket rows."""
+    with open(baskets_file, "r", newline="") as f:
+        reader = csv.DictReader(f)
+        for basket_id, rows in groupby(reader, key=lambda row: row['basket_id']):
+            yield basket_id, [(row['name'], float(row['quantity'])) for row in rows]
+
+
+def chunked(baskets, chunk_size):
+    iterator = iter(baskets)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_worker_teller = None
+
+
+def _init_worker(catalog_file, offers_file):
+    """Loads the catalog and the offers once per worker process."""
+    global _worker_teller
+    catalog = read_catalog(Path(catalog_file))
+    _worker_teller = Teller(catalog)
+    read_offers(Path(offers_file), _worker_teller)
+
+
+def _price_chunk(chunk):
+    printer = ReceiptPrinter()
+    receipts = []
+    for basket_id, lines in chunk:
+        cart = ShoppingCart()
+        for name, quantity in lines:
+            cart.add_item_quantity(product_named(_worker_teller, name), quantity)
+        receipt = _worker_teller.checks_out_articles_from(cart)
+        receipts.append(f"basket {basket_id}\n{printer.print_receipt(receipt)}\n")
+    return "".join(receipts)
+
+
+def replay(baskets_file, out, catalog_file=Path("catalog.csv"), offers_file=Path("offers.csv"),
+           workers=None, chunk_size=256):
+    """
+    Re-prices every basket of a multi-basket CSV on a process pool and writes the
+    receipts to out in input order. Baskets are read lazily and sent to the workers
+    in chunks, so memory stays bounded however long the log is.
+    """
+    baskets = chunked(read_baskets(baskets_file), chunk_size)
+    initargs = (str(catalog_file), str(offers_file))
+    if workers == 1:
+        _init_worker(*initargs)
+        for chunk in baskets:
+            out.write(_price_chunk(chunk))
+        return
+    with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        for printed in pool.imap(_price_chunk, baskets):
+            out.write(printed)
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description="Print supermarket receipts.")
+    parser.add_argument("--baskets", type=Path, help="multi-basket CSV with a basket_id column")
+    parser.add_argument("--catalog", type=Path, default=Path("catalog.csv"))
+    parser.add_argument("--offers", type=Path, default=Path("offers.csv"))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="baskets sent to a worker at a time")
+    return parser.parse_args(args)
+
+
 def main(args):
-    catalog = read_catalog(Path("catalog.csv"))
+    options = parse_args(args)
+    if options.baskets is not None:
+        replay(options.baskets, sys.stdout, options.catalog, options.offers, options.workers, options.chunk_size)
+        return
+    catalog = read_catalog(options.catalog)
     teller = Teller(catalog)
-    read_offers(Path("offers.csv"), teller)
+    read_offers(options.offers, teller)
     basket = read_basket(Path("cart.csv"), catalog)
     receipt = teller.checks_out_articles_from(basket)
     print(ReceiptPrinter().print_receipt(receipt))
 
 
 if __name__ == "__main__":
-    main(sys.argv[1:])
\ No newline at end of file
+    main(sys.argv[1:])
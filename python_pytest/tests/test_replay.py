@@ -0,0 +1,76 @@
+import io
+
+import pytest
+
+from model_objects import Product, SpecialOfferType, ProductUnit
+from shopping_cart import ShoppingCart
+from teller import Teller
+from tests.fake_catalog import FakeCatalog
+from tests.receipt_printer import ReceiptPrinter
+from texttest_fixture import read_basket, replay
+
+
+def write_files(tmp_path):
+    catalog_file = tmp_path / "catalog.csv"
+    catalog_file.write_text("name,unit,price\ntoothbrush,EACH,0.99\napples,KILO,1.99\nrice,EACH,2.49\n")
+    offers_file = tmp_path / "offers.csv"
+    offers_file.write_text("name,offer,argument\ntoothbrush,THREE_FOR_TWO,0\nrice,TEN_PERCENT_DISCOUNT,10\n")
+    baskets_file = tmp_path / "baskets.csv"
+    rows = ["basket_id,name,quantity"]
+    for basket in range(50):
+        rows.append(f"b{basket},toothbrush,{basket % 5}")
+        rows.append(f"b{basket},apples,{basket / 10}")
+        if basket % 2:
+            rows.append(f"b{basket},rice,{basket % 3 + 1}")
+    baskets_file.write_text("\n".join(rows) + "\n")
+    return catalog_file, offers_file, baskets_file
+
+
+def expected_receipts():
+    catalog = FakeCatalog()
+    toothbrush = Product("toothbrush", ProductUnit.EACH)
+    apples = Product("apples", ProductUnit.KILO)
+    rice = Product("rice", ProductUnit.EACH)
+    catalog.add_product(toothbrush, 0.99)
+    catalog.add_product(apples, 1.99)
+    catalog.add_product(rice, 2.49)
+    teller = Teller(catalog)
+    teller.add_special_offer(SpecialOfferType.THREE_FOR_TWO, toothbrush, 0.0)
+    teller.add_special_offer(SpecialOfferType.TEN_PERCENT_DISCOUNT, rice, 10.0)
+    printed = []
+    for basket in range(50):
+        cart = ShoppingCart()
+        cart.add_item_quantity(toothbrush, float(basket % 5))
+        cart.add_item_quantity(apples, basket / 10)
+        if basket % 2:
+            cart.add_item_quantity(rice, float(basket % 3 + 1))
+        printed.append(f"basket b{basket}\n{ReceiptPrinter().print_receipt(teller.checks_out_articles_from(cart))}\n")
+    return "".join(printed)
+
+
+def test_replay_keeps_input_order_across_workers(tmp_path):
+    catalog_file, offers_file, baskets_file = write_files(tmp_path)
+    out = io.StringIO()
+
+    replay(baskets_file, out, catalog_file, offers_file, workers=2, chunk_size=7)
+
+    assert expected_receipts() == out.getvalue()
+
+
+def test_replay_in_process(tmp_path):
+    catalog_file, offers_file, baskets_file = write_files(tmp_path)
+    out = io.StringIO()
+
+    replay(baskets_file, out, catalog_file, offers_file, workers=1)
+
+    assert expected_receipts() == out.getvalue()
+
+
+def test_read_basket_rejects_unknown_products(tmp_path):
+    cart_file = tmp_path / "cart.csv"
+    cart_file.write_text("name,quantity\ntoothbrush,1\nbananas,2\n")
+    catalog = FakeCatalog()
+    catalog.add_product(Product("toothbrush", ProductUnit.EACH), 0.99)
+
+    with pytest.raises(KeyError, match="bananas"):
+        read_basket(cart_file, catalog)